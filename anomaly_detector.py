@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Streaming anomaly detector for hourly cluster credits
+Keeps a seasonal EWMA baseline (mean and variance for each of the 168 hours of
+the week) per cluster and scores every new hour once, as it is ingested;
+the whole state is a few KB per cluster and persists between runs
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+
+from consumption_cube import ConsumptionCube
+from cdp_aggregation import EPOCH_WEEKDAY
+
+STATE_FILE = Path(__file__).with_name('anomaly_state.json')
+ANOMALY_INDEX = 'cdp-consumption-anomalies'
+
+HOURS_PER_WEEK = 168
+# Weight of each new observation in its hour-of-week baseline
+ALPHA = 0.3
+# Observations a baseline slot needs before it can flag anything (3 weeks)
+WARMUP = 3
+Z_THRESHOLD = 4.0
+# Deviation floors, so flat baselines do not flag tiny changes
+MIN_STD = 0.5
+MIN_RELATIVE_STD = 0.1
+
+
+def hour_of_week(epoch_hours):
+    """Hour of the week (0 = Monday 00:00) of hours counted from the Unix epoch"""
+    return ((np.asarray(epoch_hours) // 24 + EPOCH_WEEKDAY) % 7) * 24 + np.asarray(epoch_hours) % 24
+
+
+class SeasonalEWMADetector:
+    """
+    Per-cluster hour-of-week EWMA baselines
+
+    Each observation x in slot s is scored as z = (x - mean[s]) / std[s] with
+    std floored at max(MIN_STD, MIN_RELATIVE_STD * mean[s]); z above
+    Z_THRESHOLD is a spike. The baseline is then updated with x winsorized to
+    the threshold, so one spike does not inflate the baseline for weeks.
+    """
+
+    def __init__(self, state=None, alpha=ALPHA, threshold=Z_THRESHOLD, warmup=WARMUP):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.clusters = {}
+        for cluster, saved in (state or {}).items():
+            self.clusters[cluster] = {
+                'mean': np.array(saved['mean'], dtype=np.float64),
+                'var': np.array(saved['var'], dtype=np.float64),
+                'count': np.array(saved['count'], dtype=np.int64),
+                'last_hour': int(saved['last_hour']),
+            }
+
+    @classmethod
+    def load(cls, path=STATE_FILE, **options):
+        path = Path(path)
+        if not path.exists():
+            return cls(**options)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f), **options)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Advertencia: estado del detector de anomalías ignorado ({e})")
+            return cls(**options)
+
+    def save(self, path=STATE_FILE):
+        state = {
+            cluster: {
+                'mean': s['mean'].round(6).tolist(),
+                'var': s['var'].round(6).tolist(),
+                'count': s['count'].tolist(),
+                'last_hour': s['last_hour'],
+            }
+            for cluster, s in self.clusters.items()
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+
+    def _state(self, cluster, first_hour):
+        if cluster not in self.clusters:
+            self.clusters[cluster] = {
+                'mean': np.zeros(HOURS_PER_WEEK),
+                'var': np.zeros(HOURS_PER_WEEK),
+                'count': np.zeros(HOURS_PER_WEEK, dtype=np.int64),
+                'last_hour': first_hour - 1,
+            }
+        return self.clusters[cluster]
+
+    def update(self, clusters, first_hour, credits, ends=None):
+        """
+        Score and learn contiguous runs of hourly credits starting at first_hour
+
+        credits is (len(clusters), n_hours); each step updates every cluster at
+        once. ends gives, per cluster, how many of those hours are final (all
+        by default): later ones are left for the next run. Hours a cluster
+        already saw in a previous run are skipped, so overlapping ingestion
+        windows are scored once. Returns the anomalies found.
+        """
+        credits = np.atleast_2d(np.asarray(credits, dtype=np.float64))
+        states = [self._state(cluster, first_hour) for cluster in clusters]
+        if not states:
+            return []
+        ends = np.full(len(states), credits.shape[1]) if ends is None else np.asarray(ends)
+        mean = np.stack([s['mean'] for s in states])
+        var = np.stack([s['var'] for s in states])
+        count = np.stack([s['count'] for s in states])
+        first_new = np.array([s['last_hour'] + 1 - first_hour for s in states])
+        rows = np.arange(len(states))
+        alpha, threshold = self.alpha, self.threshold
+
+        anomalies = []
+        for offset in range(max(first_new.min(), 0), min(ends.max(), credits.shape[1])):
+            hour = first_hour + offset
+            slot = int(hour_of_week(hour))
+            new = (first_new <= offset) & (offset < ends)
+            x = credits[:, offset]
+            m, v, n = mean[:, slot], var[:, slot], count[:, slot]
+            std = np.maximum(np.maximum(np.sqrt(v), MIN_STD), MIN_RELATIVE_STD * m)
+            z = (x - m) / std
+            spike = new & (n >= self.warmup) & (z > threshold)
+            for r in np.flatnonzero(spike):
+                anomalies.append({
+                    'cluster_name': clusters[r],
+                    'hour': hour,
+                    'credits': float(x[r]),
+                    'expected': float(m[r]),
+                    'score': float(z[r]),
+                })
+            x = np.where(spike, m + threshold * std, x)
+
+            delta = x - m
+            mean[:, slot] = np.where(new, np.where(n == 0, x, m + alpha * delta), m)
+            var[:, slot] = np.where(new & (n > 0), (1 - alpha) * (v + alpha * delta * delta), v)
+            count[:, slot] = n + new
+
+        for r, state in zip(rows, states):
+            state.update(mean=mean[r], var=var[r], count=count[r],
+                         last_hour=max(state['last_hour'], first_hour + int(ends[r]) - 1))
+        return anomalies
+
+    def score_cube(self, cube):
+        """
+        Feed every cluster's hourly credits from a ConsumptionCube
+
+        The cube's day axis is contiguous, so each cluster is one run of hours.
+        A cluster is scored up to its own last hour with records: the hours
+        after it may belong to a block that has not been ingested yet, so they
+        wait for the cluster's next record instead of being learned as zero.
+        """
+        hours = cube.hour_range()
+        if hours is None:
+            return []
+        first_hour, end_hour = hours
+        n_clusters = len(cube.labels['cluster'])
+        hourly = cube.rollup('cluster', 'day', 'hour', measure='credits').reshape(n_clusters, -1)
+        records = cube.rollup('cluster', 'day', 'hour', measure='records').reshape(n_clusters, -1) > 0
+        seen = records.any(axis=1)
+        ends = np.where(seen, records.shape[1] - np.argmax(records[:, ::-1], axis=1), 0)
+        clusters = [cluster for cluster, has_records in zip(cube.labels['cluster'], seen) if has_records]
+        return self.update(clusters, first_hour, hourly[seen, :end_hour - first_hour], ends[seen])
+
+
+def anomaly_docs(anomalies, index_name=ANOMALY_INDEX, detected=None):
+    """Bulk actions with deterministic cluster|hour IDs (re-detections overwrite)"""
+    docs = []
+    for anomaly in anomalies:
+        timestamp = str(np.datetime64(anomaly['hour'], 'h').astype('datetime64[s]')) + 'Z'
+        source = {key: value for key, value in anomaly.items() if key != 'hour'}
+        source.update({'@timestamp': timestamp, 'detected_at': detected})
+        docs.append({
+            '_index': index_name,
+            '_id': f"{anomaly['cluster_name']}|{timestamp}",
+            '_source': source,
+        })
+    return docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Detectar picos de consumo horario por cluster')
+    parser.add_argument('--cube', default='cdp_consumption_cube.npz',
+                        help='Cubo de consumo guardado por cdp_dashboard.py')
+    parser.add_argument('--state', default=str(STATE_FILE), help='Fichero de estado del detector')
+    parser.add_argument('--threshold', type=float, default=Z_THRESHOLD, help='Puntuación z mínima de un pico')
+    parser.add_argument('--save', action='store_true',
+                        help='Guardar el estado actualizado (es el que usa cdp_to_elasticsearch.py al indexar '
+                             'anomalías: las horas puntuadas aquí no se volverían a indexar)')
+    args = parser.parse_args()
+
+    detector = SeasonalEWMADetector.load(args.state, threshold=args.threshold)
+    anomalies = detector.score_cube(ConsumptionCube.load(args.cube))
+    if args.save:
+        detector.save(args.state)
+
+    print(f"{len(anomalies)} anomalías detectadas")
+    for anomaly in anomalies:
+        hour = np.datetime64(anomaly['hour'], 'h')
+        print(f"  {str(hour)}  {anomaly['cluster_name']:30s} {anomaly['credits']:10.2f} créditos "
+              f"(esperado {anomaly['expected']:.2f}, z={anomaly['score']:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Content-hashed cache of dashboard static assets
+Logos are base64-encoded and CDN chart libraries downloaded once, stored under
+their content hash and reused across runs; build_self_contained() inlines them
+into a single minified HTML file that opens offline
+"""
+
+import base64
+import hashlib
+import json
+import re
+import urllib.request
+from pathlib import Path
+
+ASSET_CACHE_DIR = Path(__file__).with_name('.asset_cache')
+DOWNLOAD_TIMEOUT = 30
+
+MIME_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.svg': 'image/svg+xml',
+    '.gif': 'image/gif'
+}
+
+SCRIPT_TAG = re.compile(r'<script src="(https?://[^"]+)"></script>')
+HTML_COMMENT = re.compile(r'<!--(?!\[).*?-->', re.DOTALL)
+
+
+def content_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class AssetCache:
+    """
+    Encoded assets stored as <content hash>.<ext> files in a cache directory
+
+    index.json maps each source (a local file, keyed by its size and mtime, or
+    a URL) to the hash of its stored content, so an unchanged source is never
+    read, encoded or downloaded again.
+    """
+
+    def __init__(self, directory=ASSET_CACHE_DIR):
+        self.directory = Path(directory)
+        self.index_path = self.directory / 'index.json'
+        self.index = {}
+        self.loaded = {}
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self.index = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Advertencia: índice de la caché de recursos ignorado ({e})")
+
+    def _lookup(self, source, version, ext):
+        entry = self.index.get(source)
+        if entry and entry[0] == version:
+            path = self.directory / f"{entry[1]}{ext}"
+            if path.exists():
+                if path not in self.loaded:
+                    self.loaded[path] = path.read_text(encoding='utf-8')
+                return self.loaded[path]
+        return None
+
+    def _store(self, source, version, ext, text):
+        digest = content_hash(text.encode('utf-8'))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{digest}{ext}"
+        if not path.exists():
+            path.write_text(text, encoding='utf-8')
+        self.loaded[path] = text
+        self.index[source] = [version, digest]
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=2)
+        return text
+
+    def data_uri(self, file_path):
+        """data: URI for an image file, or '' if it does not exist"""
+        path = Path(file_path)
+        if not path.is_file():
+            return ''
+        stat = path.stat()
+        source = str(path.resolve())
+        version = f"{stat.st_size}:{stat.st_mtime_ns}"
+        cached = self._lookup(source, version, '.uri')
+        if cached is not None:
+            return cached
+
+        mime_type = MIME_TYPES.get(path.suffix.lower(), 'image/jpeg')
+        encoded = base64.b64encode(path.read_bytes()).decode('ascii')
+        return self._store(source, version, '.uri', f"data:{mime_type};base64,{encoded}")
+
+    def script(self, url):
+        """Contents of a CDN script, downloaded on first use; None if unavailable"""
+        cached = self._lookup(url, url, '.js')
+        if cached is not None:
+            return cached
+        try:
+            with urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT) as response:
+                text = response.read().decode('utf-8')
+        except (OSError, ValueError) as e:
+            print(f"Advertencia: no se pudo descargar {url} ({e}); se mantiene el enlace al CDN")
+            return None
+        return self._store(url, url, '.js', text)
+
+
+_default_cache = None
+
+
+def default_cache():
+    """Process-wide AssetCache in ASSET_CACHE_DIR"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = AssetCache()
+    return _default_cache
+
+
+def inline_scripts(html, cache=None):
+    """Replace <script src="https://..."> tags with the cached library contents"""
+    cache = cache or default_cache()
+
+    def replace(match):
+        text = cache.script(match.group(1))
+        if text is None:
+            return match.group(0)
+        return '<script>' + text.replace('</script', '<\\/script') + '</script>'
+
+    return SCRIPT_TAG.sub(replace, html)
+
+
+def minify_html(html):
+    """
+    Conservative whitespace minification
+
+    Drops HTML comments, indentation and blank lines, but keeps line breaks so
+    inline scripts without semicolons keep working. The dashboards contain no
+    <pre> or <textarea> blocks, where whitespace would matter.
+    """
+    html = HTML_COMMENT.sub('', html)
+    return '\n'.join(line.strip() for line in html.splitlines() if line.strip())
+
+
+def build_self_contained(html, cache=None):
+    """Single-file dashboard: markup minified and CDN libraries inlined
+
+    The libraries are inlined after minifying, so their (already minified)
+    code is embedded untouched.
+    """
+    return inline_scripts(minify_html(html), cache)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Rolling-origin backtesting of the forecast engines
+Replays the daily consumption history with successive cut-offs, forecasts the
+following days with every engine and compares them against what actually
+happened (MAPE, interval coverage, fit time and memory per series)
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from forecast_with_prophet import (PROPHET_AVAILABLE, active_clusters, batch_forecast_frames,
+                                   get_daily_history, prophet_forecast)
+
+SEASON = 7
+
+
+def seasonal_naive_forecast(df, periods=7):
+    """Baseline: each day repeats the same weekday of the last week"""
+    if df.empty:
+        return pd.DataFrame()
+    # Position must match the calendar: days missing from df had no consumption
+    days = pd.date_range(df['ds'].min(), df['ds'].max(), freq='D')
+    y = df.groupby('ds')['y'].sum().reindex(days, fill_value=0.0).to_numpy(dtype=np.float64)
+    if len(y) < 2 * SEASON:
+        return pd.DataFrame()
+    yhat = np.resize(y[-SEASON:], periods)
+    margin = 1.96 * np.std(y[SEASON:] - y[:-SEASON])
+    return pd.DataFrame({
+        'ds': df['ds'].max() + pd.to_timedelta(np.arange(1, periods + 1), unit='D'),
+        'yhat': yhat,
+        'yhat_lower': np.maximum(yhat - margin, 0),
+        'yhat_upper': yhat + margin
+    })
+
+
+def batch_engine(df, periods=7):
+    return batch_forecast_frames({None: df}, periods)[None]
+
+
+def prophet_engine(df, periods=7):
+    """Prophet alone: an error is a failure of this engine, not a batch forecast"""
+    if len(df) < 7:
+        return pd.DataFrame()
+    return prophet_forecast(df, periods)
+
+
+ENGINES = {
+    'naive': seasonal_naive_forecast,
+    'batch': batch_engine,
+}
+if PROPHET_AVAILABLE:
+    ENGINES['prophet'] = prophet_engine
+
+
+def cutoffs(df, folds, horizon, step):
+    """Last training day of each fold, oldest first, leaving horizon days to score"""
+    last = df['ds'].max() - pd.Timedelta(days=horizon)
+    return [last - pd.Timedelta(days=step * i) for i in reversed(range(folds))]
+
+
+def score(forecast, actual):
+    """(absolute percentage errors, inside-interval flags) on the days with actual consumption"""
+    merged = forecast.merge(actual, on='ds')
+    merged = merged[merged['y'] > 0]
+    errors = (merged['yhat'] - merged['y']).abs() / merged['y']
+    inside = (merged['y'] >= merged['yhat_lower']) & (merged['y'] <= merged['yhat_upper'])
+    return errors.tolist(), inside.tolist()
+
+
+def backtest_series(name, df, engines, folds, horizon, step, train_days):
+    """Process pool worker: one result row per engine for one series"""
+    rows = []
+    for engine in engines:
+        forecast_fn = ENGINES[engine]
+        errors, inside, seconds, peak, failures = [], [], 0.0, 0, 0
+        for cutoff in cutoffs(df, folds, horizon, step):
+            train = df[(df['ds'] <= cutoff) & (df['ds'] > cutoff - pd.Timedelta(days=train_days))]
+            actual = df.loc[df['ds'] > cutoff, ['ds', 'y']].head(horizon)
+
+            tracemalloc.start()
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                try:
+                    forecast = forecast_fn(train, periods=horizon)
+                except Exception:
+                    forecast = pd.DataFrame()
+                    failures += 1
+            seconds += time.perf_counter() - started
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+            if not forecast.empty:
+                fold_errors, fold_inside = score(forecast, actual)
+                errors += fold_errors
+                inside += fold_inside
+
+        rows.append({
+            'series': name or 'Total',
+            'engine': engine,
+            'points': len(errors),
+            'failures': failures,
+            'mape': float(np.mean(errors)) if errors else None,
+            'coverage': float(np.mean(inside)) if inside else None,
+            'fit_seconds': round(seconds, 4),
+            'peak_mb': round(peak / 2 ** 20, 2),
+        })
+    return rows
+
+
+def summarize(rows):
+    """Per-engine aggregate over all series"""
+    summary = {}
+    for engine in dict.fromkeys(row['engine'] for row in rows):
+        engine_rows = [row for row in rows if row['engine'] == engine]
+        scored = [row for row in engine_rows if row['mape'] is not None]
+        summary[engine] = {
+            'series': len(scored),
+            'failures': sum(row['failures'] for row in engine_rows),
+            'mape_mean': float(np.mean([row['mape'] for row in scored])) if scored else None,
+            'mape_median': float(np.median([row['mape'] for row in scored])) if scored else None,
+            'coverage': (sum(row['coverage'] * row['points'] for row in scored) /
+                         max(sum(row['points'] for row in scored), 1)) if scored else None,
+            'fit_seconds': round(sum(row['fit_seconds'] for row in engine_rows), 3),
+            'peak_mb': max(row['peak_mb'] for row in engine_rows),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtesting de los motores de prediccion con origen rodante')
+    parser.add_argument('--days', type=int, default=120, help='Dias de historico a descargar')
+    parser.add_argument('--train-days', type=int, default=30, help='Dias de entrenamiento antes de cada corte')
+    parser.add_argument('--horizon', type=int, default=7, help='Dias predichos y evaluados en cada corte')
+    parser.add_argument('--folds', type=int, default=8, help='Numero de cortes')
+    parser.add_argument('--step', type=int, default=7, help='Dias entre cortes consecutivos')
+    parser.add_argument('--engines', nargs='+', choices=sorted(ENGINES), default=sorted(ENGINES))
+    parser.add_argument('--workers', type=int, help='Procesos en paralelo (por defecto, uno por CPU)')
+    parser.add_argument('--output', default='backtest_report.json', help='Fichero JSON del informe')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Backtesting de Predicciones de Consumo CDP")
+    print("=" * 70)
+    if not PROPHET_AVAILABLE:
+        print("[INFO] Prophet no instalado: solo se evaluan los motores naive y batch")
+
+    print(f"\n1. Obteniendo {args.days} dias de historico diario...")
+    df_total, cluster_history = get_daily_history(days=args.days)
+    series = {None: df_total} if not df_total.empty else {}
+    series.update({cluster: cluster_history[cluster] for cluster in active_clusters(cluster_history)})
+    print(f"   {len(series)} series")
+    if not series:
+        print("[WARNING] No hay datos historicos")
+        return
+
+    print(f"\n2. Evaluando {', '.join(args.engines)} con {args.folds} cortes de {args.horizon} dias...")
+    started = time.perf_counter()
+    workers = args.workers or min(len(series), os.cpu_count() or 1)
+    with multiprocessing.Pool(workers) as pool:
+        results = pool.starmap(backtest_series, [
+            (name, df, args.engines, args.folds, args.horizon, args.step, args.train_days)
+            for name, df in series.items()
+        ])
+    rows = [row for series_rows in results for row in series_rows]
+    summary = summarize(rows)
+    print(f"   Completado en {time.perf_counter() - started:.1f}s")
+
+    print(f"\n{'Motor':10s} {'Series':>6s} {'Fallos':>6s} {'MAPE medio':>11s} {'MAPE mediana':>13s} {'Cobertura':>10s} {'Ajuste (s)':>11s} {'Pico MB':>8s}")
+    fmt = lambda value, spec: format(value, spec) if value is not None else 'N/A'
+    for engine, stats in summary.items():
+        print(f"{engine:10s} {stats['series']:6d} {stats['failures']:6d} {fmt(stats['mape_mean'], '11.1%')} {fmt(stats['mape_median'], '13.1%')} "
+              f"{fmt(stats['coverage'], '10.1%')} {stats['fit_seconds']:11.2f} {stats['peak_mb']:8.1f}")
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'settings': {key: value for key, value in vars(args).items() if key != 'output'},
+        'summary': summary,
+        'series': rows,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[OK] Informe guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Dashboard Generation Benchmarks
+Feeds synthetic CDP consumption records and GCP inventories of increasing size
+through analysis and rendering, and records time, peak memory and output size
+per stage as JSON so regressions can be compared between runs
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+RECORD_SIZES = (10_000, 100_000, 1_000_000, 10_000_000)
+DEFAULT_RECORD_SIZES = (10_000, 100_000, 1_000_000)
+INVENTORY_SIZES = (10, 100, 1_000, 10_000)
+# Relative slowdown reported as a regression by --compare
+REGRESSION_THRESHOLD = 0.20
+
+
+def synthetic_records(n, days=30, clusters=40, instance_types=12, environments=3, seed=0):
+    """CDP compute usage records shaped like list-compute-usage-records output"""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2025-01-01T00', 'h')
+    starts = start + rng.integers(0, days * 6, n) * 4
+    timestamps = np.datetime_as_string(starts, unit='s')
+    cluster = rng.integers(0, clusters, n)
+    instance_type = rng.integers(0, instance_types, n)
+    environment = cluster % environments
+    credits = rng.gamma(2.0, 2.5, n)
+    quantity = rng.uniform(1, 40, n)
+
+    cluster_names = [f'cluster-{c:03d}' for c in range(clusters)]
+    type_names = [f'n2-standard-{t}' for t in range(instance_types)]
+    env_names = [f'env-{e}' for e in range(environments)]
+    return [
+        {
+            'clusterName': cluster_names[c],
+            'instanceType': type_names[t],
+            'environmentName': env_names[e],
+            'usageStartTimestamp': ts + 'Z',
+            'grossCharge': g,
+            'hours': 4.0,
+            'quantity': q,
+        }
+        for c, t, e, ts, g, q in zip(cluster.tolist(), instance_type.tolist(), environment.tolist(),
+                                     timestamps.tolist(), credits.tolist(), quantity.tolist())
+    ]
+
+
+def synthetic_inventory(clusters=40):
+    """CDP Data Hub clusters and data lakes matching synthetic_records"""
+    return {
+        'datahubs': {'clusters': [
+            {
+                'clusterName': f'cluster-{c:03d}',
+                'status': 'STOPPED' if c % 7 == 0 else 'AVAILABLE',
+                'workloadType': 'DataEngineering',
+                'environmentName': f'env-{c % 3}',
+                'nodeCount': 3 + c % 5,
+                'cloudPlatform': 'GCP',
+                'creationDate': '2024-01-01T00:00:00Z',
+            }
+            for c in range(clusters)
+        ]},
+        'datalakes': {'datalakes': [{'datalakeName': 'datalake', 'status': 'RUNNING', 'creationDate': '2024-01-01'}]},
+    }
+
+
+def synthetic_gcp_project(n, project_id='bench-project', days=365, seed=0):
+    """GCP current + historical data with n buckets and n instances"""
+    rng = np.random.default_rng(seed)
+    machine_types = [f'n2-standard-{2 ** i}' for i in range(4)] + ['e2-standard-2', 'e2-standard-4']
+    regions = ['europe-west1', 'europe-west4', 'us-central1']
+
+    data = {
+        'project_id': project_id,
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'instances': {'running': [], 'stopped': [], 'total': n},
+        'machine_types': {},
+        'disks': {'types': {'pd-ssd': {'count': n, 'total_gb': 100.0 * n}}, 'total_gb': 100.0 * n, 'count': n},
+        'storage': {'buckets': [], 'total_gb': 0},
+        'costs': {'compute': 0, 'storage': 0, 'total': 0},
+        'regions': {region: {'instances': 0, 'disks': 0} for region in regions},
+    }
+    for i in range(n):
+        machine_type = machine_types[i % len(machine_types)]
+        region = regions[i % len(regions)]
+        running = rng.random() < 0.7
+        info = data['machine_types'].setdefault(machine_type, {'count': 0, 'running': 0, 'stopped': 0})
+        info['count'] += 1
+        info['running' if running else 'stopped'] += 1
+        data['regions'][region]['instances'] += 1
+        data['regions'][region]['disks'] += 1
+        data['instances']['running' if running else 'stopped'].append(
+            {'name': f'instance-{i}', 'machine_type': machine_type, 'zone': f'{region}-b',
+             'status': 'RUNNING' if running else 'TERMINATED'})
+
+        size_gb = float(rng.gamma(1.5, 200))
+        data['storage']['buckets'].append({'name': f'bucket-{i:05d}', 'location': region.upper(), 'size_gb': size_gb})
+        data['storage']['total_gb'] += size_gb
+    data['costs']['storage'] = data['storage']['total_gb'] * 0.020
+    data['costs']['compute'] = len(data['instances']['running']) * 0.1 * 730
+    data['costs']['total'] = data['costs']['compute'] + data['costs']['storage']
+
+    dates = np.datetime_as_string(np.datetime64('2025-01-01') + np.arange(days), unit='D').tolist()
+    storage = dict(zip(dates, (data['storage']['total_gb'] * (1 + np.cumsum(rng.normal(0, 0.01, days)))).tolist()))
+    instances = {date: int(n * 0.7) for date in dates}
+    historical = {}
+    for period, period_days in (('1month', 30), ('3months', 90), ('6months', 180), ('1year', 365)):
+        kept = dates[-period_days:]
+        historical[period] = {
+            'storage': {d: storage[d] for d in kept},
+            'instances': {d: instances[d] for d in kept},
+            'costs': {d: {'storage': storage[d] * 0.02, 'compute': instances[d] * 100,
+                          'total': storage[d] * 0.02 + instances[d] * 100} for d in kept},
+            'days': period_days,
+        }
+    return {'current': data, 'historical': historical}
+
+
+class StageRecorder:
+    """Collects one result row per measured stage"""
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.results = []
+
+    @contextlib.contextmanager
+    def stage(self, suite, size, name):
+        row = {'suite': suite, 'size': size, 'stage': name}
+        if self.trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            # Generators print progress; keep the benchmark output readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                yield row
+        finally:
+            row['seconds'] = round(time.perf_counter() - started, 4)
+            if self.trace_memory:
+                row['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+                tracemalloc.stop()
+            self.results.append(row)
+            output = f", {row['output_bytes'] / 1024:,.0f} KB" if 'output_bytes' in row else ''
+            memory = f", pico {row['peak_mb']:,.1f} MB" if 'peak_mb' in row else ''
+            print(f"  {suite:<5} {size:>10,} {name:<22} {row['seconds']:>9.3f}s{memory}{output}")
+
+
+def bench_cdp(recorder, sizes, days):
+    from cdp_dashboard import CDPDashboard, render_dashboard
+
+    inventory = synthetic_inventory()
+    for size in sizes:
+        records = synthetic_records(size, days=days)
+        with contextlib.redirect_stdout(io.StringIO()):
+            dashboard = CDPDashboard(logo_path='')
+        dashboard.data = dict(inventory, consumption={
+            'records': records, 'from_date': '2025-01-01T00:00:00Z', 'to_date': '2025-01-31T23:59:59Z', 'days': days})
+        clusters = inventory['datahubs']['clusters']
+        datalakes = inventory['datalakes']['datalakes']
+
+        with recorder.stage('cdp', size, 'analyze'):
+            analysis = dashboard.analyze_data()
+        with recorder.stage('cdp', size, 'payload') as row:
+            row['output_bytes'] = len(dashboard.build_payload(analysis))
+        with recorder.stage('cdp', size, 'render'):
+            sections = dashboard.render_sections(analysis, clusters, datalakes)
+        with recorder.stage('cdp', size, 'render_cached'):
+            sections = dashboard.render_sections(analysis, clusters, datalakes)
+        with recorder.stage('cdp', size, 'template') as row:
+            row['output_bytes'] = len(render_dashboard(sections).encode('utf-8'))
+        del records, dashboard, analysis
+
+
+def bench_gcp(recorder, sizes):
+    try:
+        import generate_gcp_dashboard
+        import generate_gcp_dashboard_combined
+        import generate_gcp_dashboard_multiproject
+    except ImportError as e:
+        print(f"  [WARNING] Benchmarks GCP omitidos, faltan dependencias: {e}")
+        return
+
+    for size in sizes:
+        project = synthetic_gcp_project(size)
+        projects = {'bench-dev': project, 'bench-prod': synthetic_gcp_project(size, 'bench-prod', seed=1)}
+        with recorder.stage('gcp', size, 'basic') as row:
+            row['output_bytes'] = len(generate_gcp_dashboard.generate_html_dashboard(project['current']).encode('utf-8'))
+        with recorder.stage('gcp', size, 'combined') as row:
+            html = generate_gcp_dashboard_combined.generate_combined_html_dashboard(project['current'], project['historical'])
+            row['output_bytes'] = len(html.encode('utf-8'))
+        with recorder.stage('gcp', size, 'multiproject') as row:
+            html = generate_gcp_dashboard_multiproject.generate_multiproject_html_dashboard(projects)
+            row['output_bytes'] = len(html.encode('utf-8'))
+
+
+def compare(results, baseline_path, threshold=REGRESSION_THRESHOLD):
+    """Print stages that got slower than threshold against a previous results file"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['suite'], r['size'], r['stage']): r for r in json.load(f)['results']}
+
+    regressions = 0
+    print(f"\nComparación con {baseline_path}:")
+    for row in results:
+        previous = baseline.get((row['suite'], row['size'], row['stage']))
+        if not previous or previous['seconds'] <= 0:
+            continue
+        change = row['seconds'] / previous['seconds'] - 1
+        flag = '  <-- REGRESIÓN' if change > threshold else ''
+        regressions += bool(flag)
+        print(f"  {row['suite']:<5} {row['size']:>10,} {row['stage']:<22} {previous['seconds']:>9.3f}s -> {row['seconds']:>9.3f}s ({change:+.0%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks de generación de dashboards con datos sintéticos')
+    parser.add_argument('--records', type=int, nargs='+', default=list(DEFAULT_RECORD_SIZES),
+                        help=f'Tamaños de consumo CDP (registros); el conjunto completo es {" ".join(map(str, RECORD_SIZES))}, '
+                             '10M registros necesita ~10 GB de RAM')
+    parser.add_argument('--inventory', type=int, nargs='+', default=list(INVENTORY_SIZES),
+                        help='Número de buckets e instancias GCP')
+    parser.add_argument('--days', type=int, default=30, help='Días cubiertos por los registros sintéticos')
+    parser.add_argument('--suite', choices=('all', 'cdp', 'gcp'), default='all')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='No medir memoria pico (tracemalloc añade sobrecoste a los tiempos)')
+    parser.add_argument('--output', default='benchmark_results.json', help='Fichero JSON de resultados')
+    parser.add_argument('--compare', help='Resultados anteriores con los que comparar')
+    args = parser.parse_args()
+
+    recorder = StageRecorder(trace_memory=not args.no_memory)
+    print("=" * 80)
+    print("Benchmarks de generación de dashboards")
+    print("=" * 80)
+    if args.suite in ('all', 'cdp'):
+        bench_cdp(recorder, args.records, args.days)
+    if args.suite in ('all', 'gcp'):
+        bench_gcp(recorder, args.inventory)
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'memory_traced': recorder.trace_memory,
+        'results': recorder.results,
+    }
+    output_path = Path(args.output)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[OK] Resultados guardados en {output_path.absolute()}")
+
+    if args.compare and compare(recorder.results, args.compare):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
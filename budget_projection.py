@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Month-end budget burn projection
+Adds month-to-date credits to a forecast of the rest of the month for every
+cluster and environment, with a confidence band; computed from the consumption
+cube already built at ingest, so refreshing it after every load costs one
+vectorized forecast
+"""
+
+import argparse
+
+import numpy as np
+
+from batch_forecast import HARMONICS, INTERVAL_LEVEL, SEASON_PERIODS, batch_forecast
+from consumption_cube import ConsumptionCube
+
+PROJECTION_INDEX = 'cdp-budget-projection'
+# Row holding the sum over every cluster (and the key of the global budget)
+TOTAL = 'Total'
+
+
+def monthly_budgets():
+    """{cluster_name or 'Total': monthly credits} from MONTHLY_BUDGETS in config.py"""
+    try:
+        import config
+    except ImportError:
+        return {}
+    return dict(getattr(config, 'MONTHLY_BUDGETS', {}))
+
+
+def month_end_projection(cube, budgets=None, level=INTERVAL_LEVEL):
+    """
+    Project the current month's credits per cluster and environment
+
+    The current month and hour are those of the last record in the cube.
+    Complete days before it train the batch forecaster (trend plus weekly
+    seasonality), which covers the rest of today pro rata and every later
+    day of the month. Series too short to fit fall back to their hourly run
+    rate, with no band. Bands add up the daily bounds, i.e. assume forecast
+    errors of different days move together: a conservative range for alerting.
+    Month-to-date actuals are only as complete as the cube's day window.
+    """
+    hours = cube.hour_range()
+    if hours is None:
+        return []
+    budgets = monthly_budgets() if budgets is None else budgets
+    first_hour, end_hour = hours
+    first_day, today, hours_today = first_hour // 24, end_hour // 24, end_hour % 24
+
+    month = np.datetime64(today, 'D').astype('datetime64[M]')
+    month_start = int(month.astype('datetime64[D]').astype(np.int64))
+    month_end = int((month + 1).astype('datetime64[D]').astype(np.int64))
+    remaining_days = month_end - today
+
+    seen = cube.rollup('cluster', 'environment', measure='records') > 0
+    pairs = np.argwhere(seen)
+    daily = cube.rollup('cluster', 'environment', 'day', measure='credits')[pairs[:, 0], pairs[:, 1]]
+    actual = daily[:, max(month_start - first_day, 0):].sum(axis=1)
+
+    # Days before a cluster first appears are unknown, not zero consumption
+    history = daily[:, :today - first_day].copy()
+    active = np.cumsum(history > 0, axis=1) > 0
+    history[~active] = np.nan
+
+    # Share of each remaining day still to come: the rest of today, then full days
+    weights = np.ones(remaining_days)
+    weights[0] = (24 - hours_today) / 24
+    remaining = np.full(len(pairs), np.nan)
+    lower = upper = remaining
+    if history.shape[1]:
+        forecast = batch_forecast(history, remaining_days, SEASON_PERIODS, HARMONICS, level)
+        remaining = forecast['yhat'] @ weights
+        lower = forecast['lower'] @ weights
+        upper = forecast['upper'] @ weights
+
+    fitted = ~np.isnan(remaining)
+    # Run rate since each series first appeared (including today's hours)
+    first_active = np.where(active.any(axis=1), np.argmax(active, axis=1), history.shape[1])
+    observed_hours = (history.shape[1] - first_active) * 24 + hours_today
+    total = daily.sum(axis=1)
+    run_rate = np.divide(total, observed_hours, out=np.zeros(len(pairs)), where=observed_hours > 0)
+    run_rate_remaining = run_rate * (remaining_days * 24 - hours_today)
+    remaining = np.where(fitted, remaining, run_rate_remaining)
+    lower = np.where(fitted, lower, run_rate_remaining)
+    upper = np.where(fitted, upper, run_rate_remaining)
+
+    observed_until = str(np.datetime64(end_hour, 'h').astype('datetime64[s]')) + 'Z'
+    common = {
+        'month': str(month),
+        'observed_until': observed_until,
+        'days_remaining': round(float(weights.sum()), 3),
+    }
+
+    def row(cluster, environment, actual, remaining, lower, upper, method):
+        projected = actual + remaining
+        budget = budgets.get(cluster)
+        return dict(common, **{
+            'cluster_name': cluster,
+            'environment_name': environment,
+            'actual_credits': float(actual),
+            'remaining_credits': float(remaining),
+            'projected_credits': float(projected),
+            'projected_credits_lower': float(actual + lower),
+            'projected_credits_upper': float(actual + upper),
+            'method': method,
+            'budget_credits': float(budget) if budget else None,
+            'budget_used_pct': float(projected / budget * 100) if budget else None,
+            'over_budget': bool(projected > budget) if budget else None,
+            'over_budget_risk': bool(actual + upper > budget) if budget else None,
+        })
+
+    rows = [
+        row(cube.labels['cluster'][c], cube.labels['environment'][e], actual[i], remaining[i], lower[i], upper[i],
+            'forecast' if fitted[i] else 'run_rate')
+        for i, (c, e) in enumerate(pairs)
+    ]
+    rows.append(row(TOTAL, TOTAL, actual.sum(), remaining.sum(), lower.sum(), upper.sum(),
+                    'forecast' if fitted.any() else 'run_rate'))
+    return rows
+
+
+def projection_docs(rows, index_name=PROJECTION_INDEX, updated=None):
+    """Bulk actions with month|cluster|environment IDs: each refresh overwrites the previous one"""
+    return [
+        {
+            '_index': index_name,
+            '_id': f"{row['month']}|{row['cluster_name']}|{row['environment_name']}",
+            '_source': dict(row, **{'@timestamp': updated, 'projection_updated': updated}),
+        }
+        for row in rows
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Proyección de consumo a fin de mes por cluster y entorno')
+    parser.add_argument('--cube', default='cdp_consumption_cube.npz',
+                        help='Cubo de consumo guardado por cdp_dashboard.py')
+    parser.add_argument('--top', type=int, default=20, help='Clusters a mostrar (por consumo proyectado)')
+    args = parser.parse_args()
+
+    rows = month_end_projection(ConsumptionCube.load(args.cube))
+    if not rows:
+        print("No hay datos de consumo")
+        return
+
+    total = rows[-1]
+    print(f"Proyección a fin de mes {total['month']} (datos hasta {total['observed_until']}, "
+          f"quedan {total['days_remaining']:.1f} días)")
+    print(f"{'Cluster':30s} {'Entorno':20s} {'Actual':>10s} {'Proyectado':>11s} {'Rango':>23s}  Presupuesto")
+    clusters = sorted(rows[:-1], key=lambda row: row['projected_credits'], reverse=True)[:args.top]
+    for row in clusters + [total]:
+        budget = f"{row['budget_used_pct']:.0f}%" if row['budget_credits'] else '-'
+        if row['over_budget_risk']:
+            budget += ' [EXCEDE]' if row['over_budget'] else ' [RIESGO]'
+        band = f"{row['projected_credits_lower']:,.0f} - {row['projected_credits_upper']:,.0f}"
+        print(f"{row['cluster_name'][:30]:30s} {row['environment_name'][:20]:20s} {row['actual_credits']:>10,.0f} "
+              f"{row['projected_credits']:>11,.0f} {band:>23s}  {budget}")
+
+
+if __name__ == "__main__":
+    main()
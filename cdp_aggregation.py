@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+CDP Consumption Aggregation Engine
+Loads consumption records into columnar arrays once and computes every
+group-by used by the dashboard in vectorized passes
+"""
+
+import numpy as np
+
+# Width used to hold ISO timestamps as fixed-size unicode arrays
+TIMESTAMP_WIDTH = 32
+# Offset between numpy's epoch weekday (1970-01-01 was a Thursday) and Monday=0
+EPOCH_WEEKDAY = 3
+
+
+def _encode(values):
+    """Encode a sequence of labels as integer codes, keeping first-appearance order"""
+    mapping = {}
+    codes = np.fromiter((mapping.setdefault(v, len(mapping)) for v in values), dtype=np.int64)
+    return codes, list(mapping)
+
+
+class ConsumptionColumns:
+    """Consumption records stored as columnar numpy arrays"""
+
+    def __init__(self, records):
+        n = len(records)
+        self.size = n
+
+        # Measures
+        self.credits = np.fromiter((r.get('grossCharge', 0) or 0 for r in records), dtype=np.float64, count=n)
+        self.hours = np.fromiter((r.get('hours', 0) or 0 for r in records), dtype=np.float64, count=n)
+        # 'quantity' is the total billable hours (hours * instanceCount)
+        self.quantity = np.fromiter((r.get('quantity', 0) or 0 for r in records), dtype=np.float64, count=n)
+
+        # Dimensions as integer codes + label lists
+        self.cluster, self.cluster_labels = _encode([r.get('clusterName') or 'Unknown' for r in records])
+        self.instance_type, self.instance_type_labels = _encode([r.get('instanceType') or 'Unknown' for r in records])
+        self.environment, self.environment_labels = _encode([r.get('environmentName') or 'Unknown' for r in records])
+
+        starts = np.array([r.get('usageStartTimestamp', '') or '' for r in records],
+                          dtype=f'U{TIMESTAMP_WIDTH}')
+        self._parse_timestamps(starts)
+
+    def _parse_timestamps(self, starts):
+        """Derive date, hour of day and weekday columns without per-record parsing"""
+        n = self.size
+        # Date key (YYYY-MM-DD), 'Unknown' when the record has no timestamp
+        date_keys = starts.astype('U10')
+        date_keys[starts == ''] = 'Unknown'
+        self.date, self.date_labels = _encode(date_keys.tolist())
+
+        # Hour of day read straight from the 'THH' characters of the ISO string
+        chars = starts.view(np.uint32).reshape(n, TIMESTAMP_WIDTH) if n else np.zeros((0, TIMESTAMP_WIDTH), np.uint32)
+        tens = chars[:, 11].astype(np.int64) - ord('0')
+        units = chars[:, 12].astype(np.int64) - ord('0')
+        separator = chars[:, 10]
+        hour = tens * 10 + units
+        valid_hour = (
+            ((separator == ord('T')) | (separator == ord(' ')))
+            & (tens >= 0) & (tens <= 9) & (units >= 0) & (units <= 9) & (hour < 24)
+        )
+
+        # Weekday computed once per distinct date, then broadcast to the records
+        date_weekday = np.full(len(self.date_labels), -1, dtype=np.int64)
+        for code, label in enumerate(self.date_labels):
+            try:
+                days = np.datetime64(label, 'D').astype(np.int64)
+            except ValueError:
+                continue
+            date_weekday[code] = (days + EPOCH_WEEKDAY) % 7
+        weekday = date_weekday[self.date] if n else np.zeros(0, dtype=np.int64)
+
+        # A timestamp is usable only if both the date and the hour parse
+        valid = valid_hour & (weekday >= 0)
+        self.hour_of_day = np.where(valid, hour, -1)
+        self.day_of_week = np.where(valid, weekday, -1)
+
+    def group_sum(self, codes, size, values):
+        """Sum a measure by integer group codes"""
+        return np.bincount(codes, weights=values, minlength=size)
+
+    def group_count(self, codes, size):
+        """Count records by integer group codes"""
+        return np.bincount(codes, minlength=size)
+
+
+def aggregate_consumption(records):
+    """
+    Compute every consumption group-by used by CDPDashboard.analyze_data
+
+    Returns plain dicts with the same shape analyze_data used to build with
+    nested defaultdicts: by_cluster, by_instance_type, by_environment, by_date,
+    by_cluster_and_date, by_hour_of_day and by_day_of_week.
+    """
+    cols = ConsumptionColumns(records)
+    return summarize_columns(cols)
+
+
+def summarize_columns(cols):
+    """Build the analysis consumption dicts from already loaded columns"""
+    n_clusters = len(cols.cluster_labels)
+    n_types = len(cols.instance_type_labels)
+    n_envs = len(cols.environment_labels)
+    n_dates = len(cols.date_labels)
+
+    # By cluster
+    cluster_credits = cols.group_sum(cols.cluster, n_clusters, cols.credits)
+    cluster_hours = cols.group_sum(cols.cluster, n_clusters, cols.quantity)
+
+    # Instances seen per cluster (cluster x instance type presence)
+    pairs = np.unique(cols.cluster * max(n_types, 1) + cols.instance_type)
+    cluster_instances = [set() for _ in range(n_clusters)]
+    for pair in pairs.tolist():
+        cluster_instances[pair // max(n_types, 1)].add(cols.instance_type_labels[pair % max(n_types, 1)])
+
+    # Cluster x hour of day and cluster x weekday
+    has_hour = cols.hour_of_day >= 0
+    hour_codes = cols.cluster[has_hour] * 24 + cols.hour_of_day[has_hour]
+    cluster_hour_credits = cols.group_sum(hour_codes, n_clusters * 24, cols.credits[has_hour]).reshape(n_clusters, 24)
+    cluster_hour_seen = cols.group_count(hour_codes, n_clusters * 24).reshape(n_clusters, 24) > 0
+
+    has_day = cols.day_of_week >= 0
+    day_codes = cols.cluster[has_day] * 7 + cols.day_of_week[has_day]
+    cluster_day_credits = cols.group_sum(day_codes, n_clusters * 7, cols.credits[has_day]).reshape(n_clusters, 7)
+    cluster_day_seen = cols.group_count(day_codes, n_clusters * 7).reshape(n_clusters, 7) > 0
+
+    by_cluster = {}
+    for c, name in enumerate(cols.cluster_labels):
+        by_cluster[name] = {
+            'credits': float(cluster_credits[c]),
+            'hours': float(cluster_hours[c]),
+            'instances': cluster_instances[c],
+            'by_hour': {h: float(cluster_hour_credits[c, h]) for h in np.flatnonzero(cluster_hour_seen[c]).tolist()},
+            'by_day': {d: float(cluster_day_credits[c, d]) for d in np.flatnonzero(cluster_day_seen[c]).tolist()},
+        }
+
+    # By instance type
+    type_credits = cols.group_sum(cols.instance_type, n_types, cols.credits)
+    type_hours = cols.group_sum(cols.instance_type, n_types, cols.quantity)
+    type_count = cols.group_count(cols.instance_type, n_types)
+    by_instance_type = {
+        name: {'credits': float(type_credits[i]), 'hours': float(type_hours[i]), 'count': int(type_count[i])}
+        for i, name in enumerate(cols.instance_type_labels)
+    }
+
+    # By environment
+    env_credits = cols.group_sum(cols.environment, n_envs, cols.credits)
+    env_hours = cols.group_sum(cols.environment, n_envs, cols.quantity)
+    by_environment = {
+        name: {'credits': float(env_credits[e]), 'hours': float(env_hours[e])}
+        for e, name in enumerate(cols.environment_labels)
+    }
+
+    # By date
+    date_credits = cols.group_sum(cols.date, n_dates, cols.credits)
+    date_hours = cols.group_sum(cols.date, n_dates, cols.quantity)
+    by_date = {
+        name: {'credits': float(date_credits[d]), 'hours': float(date_hours[d])}
+        for d, name in enumerate(cols.date_labels)
+    }
+
+    # By cluster and date (for stacked chart)
+    date_cluster_codes = cols.date * n_clusters + cols.cluster
+    date_cluster_credits = cols.group_sum(date_cluster_codes, n_dates * n_clusters, cols.credits)
+    date_cluster_seen = cols.group_count(date_cluster_codes, n_dates * n_clusters) > 0
+    by_cluster_and_date = {name: {} for name in cols.date_labels}
+    for code in np.flatnonzero(date_cluster_seen).tolist():
+        d, c = divmod(code, n_clusters)
+        by_cluster_and_date[cols.date_labels[d]][cols.cluster_labels[c]] = float(date_cluster_credits[code])
+
+    # By hour of day and day of week (all clusters)
+    hour_credits = cluster_hour_credits.sum(axis=0)
+    hour_seen = cluster_hour_seen.any(axis=0)
+    day_credits = cluster_day_credits.sum(axis=0)
+    day_seen = cluster_day_seen.any(axis=0)
+
+    return {
+        'total_credits': float(cols.credits.sum()),
+        'total_hours': float(cols.quantity.sum()),
+        'by_cluster': by_cluster,
+        'by_instance_type': by_instance_type,
+        'by_environment': by_environment,
+        'by_date': by_date,
+        'by_cluster_and_date': by_cluster_and_date,
+        'by_hour_of_day': {h: float(hour_credits[h]) for h in np.flatnonzero(hour_seen).tolist()},
+        'by_day_of_week': {d: float(day_credits[d]) for d in np.flatnonzero(day_seen).tolist()},
+    }
+
+
+def horizon_summary(by_date, horizons=(7, 30, 90, 365)):
+    """
+    Multi-horizon views from one pass over daily cumulative arrays
+
+    by_date is the {YYYY-MM-DD: {'credits', 'hours'}} dict built by the
+    aggregation. Daily totals are laid on a contiguous calendar, prefix sums
+    are taken once and every window (last N days, month-to-date, this week vs
+    previous week) is the difference of two prefix-sum entries. Windows longer
+    than the available data are clipped and report the days actually covered.
+    """
+    days = {}
+    for label, data in by_date.items():
+        try:
+            days[np.datetime64(label, 'D')] = data
+        except ValueError:
+            continue
+    if not days:
+        return {'as_of': None, 'horizons': {}, 'month_to_date': None, 'week_over_week': None}
+
+    first, last = min(days), max(days)
+    n_days = int((last - first).astype(np.int64)) + 1
+    credits = np.zeros(n_days)
+    hours = np.zeros(n_days)
+    for day, data in days.items():
+        i = int((day - first).astype(np.int64))
+        credits[i] = data['credits']
+        hours[i] = data['hours']
+    cum_credits = np.concatenate(([0.0], np.cumsum(credits)))
+    cum_hours = np.concatenate(([0.0], np.cumsum(hours)))
+
+    def window(start, end):
+        """Totals for calendar positions [start, end), clipped to the available data"""
+        start = max(0, start)
+        covered = max(0, end - start)
+        total_credits = float(cum_credits[end] - cum_credits[start]) if covered else 0.0
+        return {
+            'credits': total_credits,
+            'hours': float(cum_hours[end] - cum_hours[start]) if covered else 0.0,
+            'days_covered': covered,
+            'daily_avg': total_credits / covered if covered else 0.0,
+            'monthly_projection': total_credits / covered * 30 if covered else 0.0,
+        }
+
+    result = {'as_of': str(last), 'horizons': {}}
+    for horizon in horizons:
+        view = window(n_days - horizon, n_days)
+        view['days'] = horizon
+        result['horizons'][str(horizon)] = view
+
+    # Month to date, projected to the end of the month
+    month_start = last.astype('datetime64[M]')
+    days_in_month = int(((month_start + 1).astype('datetime64[D]') - month_start.astype('datetime64[D]')).astype(np.int64))
+    elapsed = int((last - month_start.astype('datetime64[D]')).astype(np.int64)) + 1
+    mtd = window(n_days - elapsed, n_days)
+    mtd['days_in_month'] = days_in_month
+    mtd['month_end_projection'] = mtd['daily_avg'] * days_in_month
+    result['month_to_date'] = mtd
+
+    # Last 7 days against the 7 days before
+    current = window(n_days - 7, n_days)
+    previous = window(n_days - 14, n_days - 7)
+    delta = current['credits'] - previous['credits']
+    result['week_over_week'] = {
+        'current': current['credits'],
+        'previous': previous['credits'],
+        'delta': delta,
+        'delta_pct': delta / previous['credits'] * 100 if previous['credits'] > 0 else None,
+    }
+    return result
+
+
+# CDP reports consumption in 4-hour blocks
+BLOCK_HOURS = (0, 4, 8, 12, 16, 20)
+BLOCK_LABELS = ('00:00-04:00', '04:00-08:00', '08:00-12:00', '12:00-16:00', '16:00-20:00', '20:00-00:00')
+# Block positions of 00:00-04:00, 04:00-08:00 and 20:00-00:00
+NIGHT_BLOCKS = (0, 1, 5)
+WEEKEND_DAYS = (5, 6)
+
+
+def underutilization_summary(by_cluster, low_ratio=0.2, schedule_threshold=0.15, schedule_savings=0.7):
+    """
+    Per-cluster underutilization insights by 4-hour block and weekday
+
+    by_cluster is the analysis dict with sparse 'by_hour'/'by_day' credits.
+    Every cluster is laid on dense (clusters x 24) and (clusters x 7) arrays
+    and all the checks run as column operations: blocks without consumption,
+    blocks under low_ratio of the cluster's average block, night (20:00-08:00)
+    and weekend credits. The suggested action is a night schedule or a weekend
+    stop when either exceeds schedule_threshold of the cluster's credits,
+    saving schedule_savings of those credits. Returns one dict per cluster
+    with at least one finding, in by_cluster order.
+    """
+    names = list(by_cluster)
+    if not names:
+        return []
+
+    by_hour = np.zeros((len(names), 24))
+    by_day = np.zeros((len(names), 7))
+    for c, name in enumerate(names):
+        data = by_cluster[name]
+        by_hour[c, list(data['by_hour'])] = list(data['by_hour'].values())
+        by_day[c, list(data['by_day'])] = list(data['by_day'].values())
+
+    blocks = by_hour[:, list(BLOCK_HOURS)]
+    totals = by_hour.sum(axis=1)
+    average_block = totals / len(BLOCK_HOURS)
+
+    zero = blocks == 0
+    low = (blocks > 0) & (blocks < average_block[:, None] * low_ratio)
+    night = blocks[:, list(NIGHT_BLOCKS)]
+    night_credits = night.sum(axis=1)
+    weekend_credits = by_day[:, list(WEEKEND_DAYS)].sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        night_pct = np.where(totals > 0, night_credits / totals * 100, 0.0)
+        weekend_pct = np.where(totals > 0, weekend_credits / totals * 100, 0.0)
+
+    flagged = zero.any(axis=1) | low.any(axis=1) | (night_credits > 0) | (weekend_credits > 0)
+    night_schedule = night_credits > totals * schedule_threshold
+    weekend_schedule = ~night_schedule & (weekend_credits > totals * schedule_threshold)
+
+    night_labels = [BLOCK_LABELS[b] for b in NIGHT_BLOCKS]
+    insights = []
+    for c in np.flatnonzero(flagged).tolist():
+        if night_schedule[c]:
+            action, savings = 'night_schedule', float(night_credits[c]) * schedule_savings
+        elif weekend_schedule[c]:
+            action, savings = 'weekend_stop', float(weekend_credits[c]) * schedule_savings
+        else:
+            action, savings = 'review', 0.0
+        insights.append({
+            'name': names[c],
+            'credits': by_cluster[names[c]]['credits'],
+            'hours': by_cluster[names[c]]['hours'],
+            'zero_blocks': [BLOCK_LABELS[b] for b in np.flatnonzero(zero[c]).tolist()],
+            'low_blocks': [BLOCK_LABELS[b] for b in np.flatnonzero(low[c]).tolist()],
+            'night_credits': float(night_credits[c]),
+            'night_pct': float(night_pct[c]),
+            'night_blocks': [label for label, used in zip(night_labels, night[c] > 0) if used],
+            'weekend_credits': float(weekend_credits[c]),
+            'weekend_pct': float(weekend_pct[c]),
+            'action': action,
+            'savings': savings,
+        })
+    return insights
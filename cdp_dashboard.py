@@ -4,13 +4,33 @@ CDP Dashboard Generator
 Generates an interactive HTML dashboard with CDP resource information
 """
 
+import argparse
 import subprocess
 import json
 import sys
-import base64
 from datetime import datetime, timedelta
 from pathlib import Path
-from collections import defaultdict
+
+from cdp_aggregation import ConsumptionColumns, summarize_columns, horizon_summary, underutilization_summary
+from consumption_cube import ConsumptionCube
+from budget_projection import month_end_projection
+from savings_rules import RULES, evaluate_rules
+from html_template import load_template
+from asset_cache import build_self_contained, default_cache
+from dashboard_payload import PAYLOAD_MODES, compact_payload, encode_payload
+from section_cache import SectionCache
+from virtual_table import VIRTUAL_TABLE_ASSETS, column, virtual_table
+
+DASHBOARD_TEMPLATE = Path(__file__).with_name('cdp_dashboard_template.html')
+SECTION_CACHE_FILE = Path(__file__).with_name('cdp_dashboard.sections.json')
+# Rendering code mixed into the section fingerprints
+SECTION_SOURCES = (__file__, Path(__file__).with_name('virtual_table.py'))
+
+
+def render_dashboard(sections, template_path=DASHBOARD_TEMPLATE):
+    """Fill the cached dashboard shell with the rendered sections"""
+    return load_template(template_path).render(**sections)
+
 
 class CDPDashboard:
     def __init__(self, cdp_cli_path=r"C:\Program Files\Python312\Scripts\cdp.exe",
@@ -18,30 +38,18 @@ class CDPDashboard:
         self.cdp_cli = cdp_cli_path
         self.logo_path = logo_path
         self.data = {}
+        self.cube = None
+        # Rendered sections reused while their input data is unchanged
+        self.section_cache = SectionCache(sources=SECTION_SOURCES)
         self.logo_base64 = self.encode_logo_to_base64()
 
     def encode_logo_to_base64(self):
-        """Encode logo image to base64 for embedding in HTML"""
+        """Logo as a base64 data URI for embedding in HTML, cached by content (see asset_cache.py)"""
         try:
-            logo_file = Path(self.logo_path)
-            if logo_file.exists():
-                with open(logo_file, 'rb') as f:
-                    logo_data = f.read()
-                    encoded = base64.b64encode(logo_data).decode('utf-8')
-                    # Determine MIME type based on extension
-                    ext = logo_file.suffix.lower()
-                    mime_types = {
-                        '.jpg': 'image/jpeg',
-                        '.jpeg': 'image/jpeg',
-                        '.png': 'image/png',
-                        '.svg': 'image/svg+xml',
-                        '.gif': 'image/gif'
-                    }
-                    mime_type = mime_types.get(ext, 'image/jpeg')
-                    return f"data:{mime_type};base64,{encoded}"
-            else:
-                print(f"Advertencia: Logo no encontrado en {self.logo_path}")
-                return ""
+            if Path(self.logo_path).is_file():
+                return default_cache().data_uri(self.logo_path)
+            print(f"Advertencia: Logo no encontrado en {self.logo_path}")
+            return ""
         except Exception as e:
             print(f"Error al cargar el logo: {e}")
             return ""
@@ -65,7 +73,7 @@ class CDPDashboard:
             print(f"Error parsing JSON: {e}", file=sys.stderr)
             return {}
 
-    def collect_data(self):
+    def collect_data(self, days=30):
         """Collect all CDP data"""
         print("Recopilando datos de CDP...")
 
@@ -81,24 +89,26 @@ class CDPDashboard:
         print("  - Listando entornos...")
         self.data['environments'] = self.run_cdp_command('environments', 'list-environments')
 
-        print("  - Obteniendo datos de consumo (último mes)...")
-        self.data['consumption'] = self.collect_consumption_data()
+        print(f"  - Obteniendo datos de consumo (últimos {days} días)...")
+        self.data['consumption'] = self.collect_consumption_data(days=days)
 
         print("Datos recopilados exitosamente!\n")
 
-    def collect_consumption_data(self, days=30):
-        """Collect consumption data for the last N days"""
+    def collect_consumption_data(self, days=30, from_timestamp=None):
+        """Collect consumption data for the last N days (or since from_timestamp)"""
         to_date = datetime.utcnow()
         from_date = to_date - timedelta(days=days)
 
-        from_timestamp = from_date.strftime('%Y-%m-%dT00:00:00Z')
+        from_timestamp = from_timestamp or from_date.strftime('%Y-%m-%dT00:00:00Z')
         to_timestamp = to_date.strftime('%Y-%m-%dT23:59:59Z')
 
         try:
             # Get all consumption records (may require pagination)
             all_records = []
+            complete = True
             next_token = None
-            max_pages = 100  # Safety limit
+            # Safety limit, scaled with the window (a year needs about a million records)
+            max_pages = 100 * max(1, -(-days // 30))
             page_count = 0
 
             while page_count < max_pages:
@@ -114,8 +124,12 @@ class CDPDashboard:
 
                 result = self.run_cdp_command(*args)
 
-                if 'records' in result:
-                    all_records.extend(result['records'])
+                # run_cdp_command returns {} when the CLI call fails
+                if 'records' not in result:
+                    print(f"    Advertencia: Respuesta de consumo incompleta (página {page_count + 1})")
+                    complete = False
+                    break
+                all_records.extend(result['records'])
 
                 next_token = result.get('nextToken')
                 page_count += 1
@@ -123,12 +137,18 @@ class CDPDashboard:
                 if not next_token:
                     break
 
+            if next_token and complete:
+                print(f"    Advertencia: Límite de {max_pages} páginas alcanzado, consumo truncado")
+                complete = False
+
             print(f"    Obtenidos {len(all_records)} registros de consumo")
-            return {'records': all_records, 'from_date': from_timestamp, 'to_date': to_timestamp}
+            return {'records': all_records, 'from_date': from_timestamp, 'to_date': to_timestamp, 'days': days,
+                    'complete': complete}
 
         except Exception as e:
             print(f"    Advertencia: No se pudieron obtener datos de consumo: {e}")
-            return {'records': [], 'from_date': from_timestamp, 'to_date': to_timestamp}
+            return {'records': [], 'from_date': from_timestamp, 'to_date': to_timestamp, 'days': days,
+                    'complete': False}
 
     def analyze_data(self):
         """Analyze collected data and generate metrics"""
@@ -188,86 +208,27 @@ class CDPDashboard:
         consumption_data = self.data.get('consumption', {})
         records = consumption_data.get('records', [])
 
-        analysis['consumption'] = {
-            'total_credits': 0,
-            'total_hours': 0,
-            'by_cluster': defaultdict(lambda: {'credits': 0, 'hours': 0, 'instances': set(),
-                                               'by_hour': defaultdict(float), 'by_day': defaultdict(float)}),
-            'by_instance_type': defaultdict(lambda: {'credits': 0, 'hours': 0, 'count': 0}),
-            'by_environment': defaultdict(lambda: {'credits': 0, 'hours': 0}),
-            'by_date': defaultdict(lambda: {'credits': 0, 'hours': 0}),
-            'by_cluster_and_date': defaultdict(lambda: defaultdict(float)),  # For stacked chart
-            'by_hour_of_day': defaultdict(float),  # Total credits by hour (0-23)
-            'by_day_of_week': defaultdict(float),  # Total credits by day (0-6, Mon-Sun)
-            'period_days': 30,
+        # Columnar aggregation: records are loaded once, every group-by is computed
+        # in vectorized passes and the same columns feed the shared consumption cube
+        columns = ConsumptionColumns(records)
+        self.cube = ConsumptionCube.from_columns(columns)
+        analysis['consumption'] = summarize_columns(columns)
+        analysis['consumption'].update({
+            'period_days': consumption_data.get('days', 30),
             'from_date': consumption_data.get('from_date', 'N/A'),
             'to_date': consumption_data.get('to_date', 'N/A'),
-            'has_data': len(records) > 0
-        }
-
-        for record in records:
-            credits = record.get('grossCharge', 0)
-            # Use 'quantity' which is the total billable hours (hours * instanceCount)
-            # NOT 'hours' which is per-instance hours
-            hours = record.get('quantity', 0)
-            cluster_name = record.get('clusterName', 'Unknown')
-            instance_type = record.get('instanceType', 'Unknown')
-            env_name = record.get('environmentName', 'Unknown')
-            usage_start = record.get('usageStartTimestamp', '')
-
-            # Extract date from timestamp (YYYY-MM-DD)
-            date_key = usage_start[:10] if usage_start else 'Unknown'
-
-            # Extract hour and day of week from timestamp
-            try:
-                if usage_start:
-                    timestamp = datetime.fromisoformat(usage_start.replace('Z', '+00:00'))
-                    hour_of_day = timestamp.hour
-                    day_of_week = timestamp.weekday()  # 0=Monday, 6=Sunday
-                else:
-                    hour_of_day = None
-                    day_of_week = None
-            except:
-                hour_of_day = None
-                day_of_week = None
-
-            analysis['consumption']['total_credits'] += credits
-            analysis['consumption']['total_hours'] += hours
-
-            # By cluster
-            analysis['consumption']['by_cluster'][cluster_name]['credits'] += credits
-            analysis['consumption']['by_cluster'][cluster_name]['hours'] += hours
-            analysis['consumption']['by_cluster'][cluster_name]['instances'].add(instance_type)
-
-            # By hour and day for this cluster
-            if hour_of_day is not None:
-                analysis['consumption']['by_cluster'][cluster_name]['by_hour'][hour_of_day] += credits
-            if day_of_week is not None:
-                analysis['consumption']['by_cluster'][cluster_name]['by_day'][day_of_week] += credits
-
-            # By instance type
-            analysis['consumption']['by_instance_type'][instance_type]['credits'] += credits
-            analysis['consumption']['by_instance_type'][instance_type]['hours'] += hours
-            analysis['consumption']['by_instance_type'][instance_type]['count'] += 1
-
-            # By environment
-            analysis['consumption']['by_environment'][env_name]['credits'] += credits
-            analysis['consumption']['by_environment'][env_name]['hours'] += hours
-
-            # By date (for trends)
-            analysis['consumption']['by_date'][date_key]['credits'] += credits
-            analysis['consumption']['by_date'][date_key]['hours'] += hours
-
-            # By cluster and date (for stacked chart)
-            analysis['consumption']['by_cluster_and_date'][date_key][cluster_name] += credits
-
-            # By hour of day (aggregated for all clusters)
-            if hour_of_day is not None:
-                analysis['consumption']['by_hour_of_day'][hour_of_day] += credits
-
-            # By day of week (aggregated for all clusters)
-            if day_of_week is not None:
-                analysis['consumption']['by_day_of_week'][day_of_week] += credits
+            'has_data': len(records) > 0,
+            'complete': consumption_data.get('complete', True)
+        })
+        # 7/30/90/365-day views, month-to-date and week-over-week from daily prefix sums
+        analysis['consumption']['horizons'] = horizon_summary(analysis['consumption']['by_date'])
+        # Truncated collections lose records: the views cannot be trusted as complete
+        analysis['consumption']['horizons']['partial'] = not analysis['consumption']['complete']
+        # Month-end total: month-to-date actuals plus the forecast of the remaining days
+        projection = month_end_projection(self.cube)
+        analysis['consumption']['month_end'] = projection[-1] if projection else None
+        # Underutilization by 4h block and weekday, rendered as static HTML
+        analysis['consumption']['underutilization'] = underutilization_summary(analysis['consumption']['by_cluster'])
 
         # Cost estimate: use real data if available, otherwise use simplified estimate
         if analysis['consumption']['has_data']:
@@ -285,348 +246,90 @@ class CDPDashboard:
 
         return analysis
 
-    def generate_recommendations(self, analysis, clusters):
-        """Generate detailed savings recommendations based on usage patterns"""
-        recommendations = []
-
-        # Recommendation 1: Stopped clusters that could be deleted
-        stopped_clusters = [c for c in clusters if c.get('status') == 'STOPPED']
-        if stopped_clusters:
-            potential_savings = len(stopped_clusters) * 5 * 730  # Approximate savings
-            recommendations.append({
-                'title': 'Clusters Detenidos',
-                'severity': 'medium',
-                'savings': potential_savings,
-                'description': f'Tienes {len(stopped_clusters)} cluster(s) detenido(s). Si no los necesitas, considera eliminarlos para evitar costos de almacenamiento.',
-                'clusters': [c.get('clusterName') for c in stopped_clusters],
-                'action': 'Revisar y eliminar clusters que ya no se necesitan'
-            })
-
-        # Recommendation 2: High consumption clusters
-        if analysis['consumption']['has_data']:
-            # Find clusters with high consumption
-            high_consumption = [(name, data['credits']) for name, data in
-                              analysis['consumption']['by_cluster'].items()
-                              if data['credits'] > analysis['consumption']['total_credits'] * 0.2]
-
-            if high_consumption:
-                total_high = sum(c[1] for c in high_consumption)
-                recommendations.append({
-                    'title': 'Clusters de Alto Consumo',
-                    'severity': 'high',
-                    'savings': total_high * 0.15,  # Potential 15% savings through optimization
-                    'description': f'{len(high_consumption)} cluster(s) representan más del 20% del consumo total cada uno.',
-                    'clusters': [c[0] for c in high_consumption],
-                    'action': 'Revisar configuración de instancias, considerar auto-scaling o reducción de nodos'
-                })
-
-            # Recommendation 3: Expensive instance types
-            expensive_instances = sorted(
-                [(itype, data['credits']) for itype, data in analysis['consumption']['by_instance_type'].items()],
-                key=lambda x: x[1],
-                reverse=True
-            )[:3]
-
-            if expensive_instances:
-                total_expensive = sum(i[1] for i in expensive_instances)
-                recommendations.append({
-                    'title': 'Tipos de Instancia Costosos',
-                    'severity': 'medium',
-                    'savings': total_expensive * 0.20,  # Potential 20% savings
-                    'description': f'Los 3 tipos de instancia más costosos representan {(total_expensive/analysis["consumption"]["total_credits"]*100):.1f}% del gasto.',
-                    'instances': [i[0] for i in expensive_instances],
-                    'action': 'Evaluar si se pueden usar tipos de instancia más económicos sin afectar rendimiento'
-                })
-
-            # Recommendation 4: Low utilization analysis (based on hours vs potential)
-            for cluster_name, cluster_data in analysis['consumption']['by_cluster'].items():
-                cluster_info = next((c for c in clusters if c.get('clusterName') == cluster_name), None)
-                if cluster_info and cluster_info.get('status') == 'AVAILABLE':
-                    node_count = cluster_info.get('nodeCount', 1)
-                    # Calculate potential hours (30 days * 24 hours * nodes)
-                    potential_hours = 30 * 24 * node_count
-                    actual_hours = cluster_data['hours']
-                    utilization = (actual_hours / potential_hours * 100) if potential_hours > 0 else 0
-
-                    if utilization < 30:  # Less than 30% utilization
-                        potential_savings = cluster_data['credits'] * 0.5
-                        recommendations.append({
-                            'title': f'Baja Utilización: {cluster_name}',
-                            'severity': 'low',
-                            'savings': potential_savings,
-                            'description': f'Utilización estimada: {utilization:.1f}%. El cluster está infrautilizado.',
-                            'clusters': [cluster_name],
-                            'action': 'Considerar apagar en horarios no productivos o reducir número de nodos'
-                        })
-
-        # Recommendation 5: Consider autoscaling
-        active_clusters_count = analysis.get('active_clusters', 0)
-        if active_clusters_count > 3:
-            recommendations.append({
-                'title': 'Considerar Auto-scaling',
-                'severity': 'low',
-                'savings': analysis['cost_estimate'] * 0.10,  # Potential 10% savings
-                'description': f'Tienes {active_clusters_count} clusters activos. El auto-scaling puede ayudar a reducir costos.',
-                'clusters': [],
-                'action': 'Implementar políticas de auto-scaling para ajustar capacidad según demanda'
-            })
-
-        # Sort by potential savings
-        recommendations.sort(key=lambda x: x.get('savings', 0), reverse=True)
-
-        return recommendations
-
-    def generate_html(self, output_file='cdp_dashboard.html'):
-        """Generate HTML dashboard"""
+    def generate_recommendations(self, analysis, clusters, rules=RULES):
+        """Generate detailed savings recommendations based on usage patterns
+
+        Rules are declared in savings_rules.RULES and evaluated in one pass over
+        precomputed per-cluster, per-instance-type and per-environment metrics.
+        """
+        return evaluate_rules(analysis, clusters, rules)
+
+    def generate_html(self, output_file='cdp_dashboard.html', payload_mode='gzip', self_contained=False):
+        """Generate HTML dashboard
+
+        The static shell (CSS, layout and chart code) lives in
+        cdp_dashboard_template.html and is compiled once per process; each run
+        only renders the dynamic sections and the data payload (see
+        dashboard_payload.py for the payload modes). With self_contained the
+        page is minified and Chart.js inlined, so it opens offline.
+        """
+        if self_contained and payload_mode == 'sidecar':
+            print("    Modo autocontenido: datos embebidos en lugar de fichero .data.js")
+            payload_mode = 'gzip'
         analysis = self.analyze_data()
         clusters = self.data.get('datahubs', {}).get('clusters', [])
         datalakes = self.data.get('datalakes', {}).get('datalakes', [])
-        user_info = self.data.get('user', {}).get('user', {})
-
-        html = f"""<!DOCTYPE html>
-<html lang="es">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>CDP Dashboard - {datetime.now().strftime('%Y-%m-%d %H:%M')}</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, sans-serif;
-            background: linear-gradient(135deg, #FF7900 0%, #000000 100%);
-            padding: 20px;
-            min-height: 100vh;
-        }}
-
-        .container {{
-            max-width: 1400px;
-            margin: 0 auto;
-        }}
-
-        header {{
-            background: white;
-            padding: 30px;
-            border-radius: 15px;
-            box-shadow: 0 10px 40px rgba(0,0,0,0.1);
-            margin-bottom: 30px;
-        }}
-
-        h1 {{
-            color: #000000;
-            font-size: 2.2em;
-        }}
-
-        .subtitle {{
-            color: #666;
-            font-size: 1.0em;
-        }}
-
-        .grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 20px;
-            margin-bottom: 30px;
-        }}
-
-        .card {{
-            background: white;
-            padding: 25px;
-            border-radius: 15px;
-            box-shadow: 0 10px 40px rgba(0,0,0,0.1);
-            transition: transform 0.3s ease, box-shadow 0.3s ease;
-        }}
-
-        .card:hover {{
-            transform: translateY(-5px);
-            box-shadow: 0 15px 50px rgba(0,0,0,0.15);
-        }}
-
-        .card-title {{
-            color: #666;
-            font-size: 0.9em;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-            margin-bottom: 10px;
-        }}
-
-        .card-value {{
-            color: #333;
-            font-size: 2.5em;
-            font-weight: bold;
-            margin-bottom: 5px;
-        }}
-
-        .card-subtitle {{
-            color: #999;
-            font-size: 0.9em;
-        }}
-
-        .status-badge {{
-            display: inline-block;
-            padding: 5px 12px;
-            border-radius: 20px;
-            font-size: 0.85em;
-            font-weight: 600;
-            margin-left: 10px;
-        }}
-
-        .status-running {{
-            background: #d4edda;
-            color: #155724;
-        }}
-
-        .status-stopped {{
-            background: #f8d7da;
-            color: #721c24;
-        }}
-
-        .status-available {{
-            background: #d1ecf1;
-            color: #0c5460;
-        }}
-
-        .cluster-table {{
-            width: 100%;
-            border-collapse: collapse;
-            margin-top: 15px;
-        }}
-
-        .cluster-table th {{
-            background: #f8f9fa;
-            padding: 12px;
-            text-align: left;
-            font-weight: 600;
-            border-bottom: 2px solid #dee2e6;
-        }}
-
-        .cluster-table td {{
-            padding: 12px;
-            border-bottom: 1px solid #dee2e6;
-        }}
-
-        .cluster-table tr:hover {{
-            background: #f8f9fa;
-        }}
-
-        .progress-bar {{
-            width: 100%;
-            height: 30px;
-            background: #e9ecef;
-            border-radius: 15px;
-            overflow: hidden;
-            margin: 10px 0;
-        }}
-
-        .progress-fill {{
-            height: 100%;
-            background: linear-gradient(90deg, #FF7900 0%, #FF5500 100%);
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            color: white;
-            font-weight: bold;
-            font-size: 0.9em;
-        }}
-
-        .chart-container {{
-            margin-top: 20px;
-        }}
-
-        .bar-chart {{
-            display: flex;
-            flex-direction: column;
-            gap: 10px;
-        }}
-
-        .bar {{
-            display: flex;
-            align-items: center;
-            gap: 10px;
-        }}
-
-        .bar-label {{
-            min-width: 150px;
-            font-size: 0.9em;
-            color: #666;
-        }}
-
-        .bar-fill {{
-            flex: 1;
-            height: 30px;
-            background: #e9ecef;
-            border-radius: 5px;
-            overflow: hidden;
-        }}
-
-        .bar-inner {{
-            height: 100%;
-            background: linear-gradient(90deg, #FF7900 0%, #FF5500 100%);
-            display: flex;
-            align-items: center;
-            padding-left: 10px;
-            color: white;
-            font-weight: bold;
-            font-size: 0.85em;
-        }}
-
-        .cost-card {{
-            background: linear-gradient(135deg, #FF7900 0%, #000000 100%);
-            color: white;
-            border: 2px solid #FF7900;
-        }}
-
-        .cost-card .card-title,
-        .cost-card .card-subtitle {{
-            color: rgba(255,255,255,0.95);
-        }}
-
-        .cost-card .card-value {{
-            color: white;
-        }}
-
-        .timestamp {{
-            text-align: center;
-            color: white;
-            margin-top: 30px;
-            font-size: 0.9em;
-        }}
-
-        .section {{
-            background: white;
-            padding: 30px;
-            border-radius: 15px;
-            box-shadow: 0 10px 40px rgba(0,0,0,0.1);
-            margin-bottom: 30px;
-        }}
-
-        h2 {{
-            color: #000000;
-            margin-bottom: 20px;
-            font-size: 1.8em;
-            border-left: 4px solid #FF7900;
-            padding-left: 15px;
-        }}
-    </style>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.min.js"></script>
-</head>
-<body>
-    <div class="container">
-        <header>
-            <div style="display: flex; align-items: center; gap: 30px; margin-bottom: 10px;">
-                {f'<img src="{self.logo_base64}" alt="MasOrange Logo" style="height: 60px;">' if self.logo_base64 else ''}
-                <div style="flex: 1;">
-                    <h1 style="margin: 0;">Cloudera GCP Dashboard</h1>
-                    <p class="subtitle" style="margin: 5px 0 0 0;">Cloudera Data Platform on Google Cloud Platform</p>
-                </div>
-            </div>
-        </header>
 
-        <!-- Métricas principales -->
+        output_path = Path(output_file)
+        sidecar_path = output_path.with_name(output_path.stem + '.data.js')
+        self.section_cache = SectionCache(SECTION_CACHE_FILE, sources=SECTION_SOURCES)
+        html = render_dashboard(self.render_sections(analysis, clusters, datalakes, payload_mode, sidecar_path))
+        self.section_cache.save()
+        print(f"    Secciones: {self.section_cache.summary()}")
+        if self_contained:
+            html = build_self_contained(html)
+
+        # Write HTML file
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+
+        print(f"[OK] Dashboard generado exitosamente: {output_path.absolute()}")
+        return str(output_path.absolute())
+
+    def render_sections(self, analysis, clusters, datalakes, payload_mode='gzip', sidecar_path=None):
+        """Render every dynamic section of the dashboard template
+
+        Each section is fingerprinted on the analysis fields it reads and only
+        re-rendered when they changed (see section_cache.py).
+        """
+        now = datetime.now()
+        consumption = analysis['consumption']
+        totals = {key: analysis.get(key) for key in (
+            'total_clusters', 'active_clusters', 'stopped_clusters', 'total_nodes', 'active_nodes',
+            'total_datalakes', 'cost_estimate', 'cost_source')}
+        overview = {key: consumption.get(key) for key in (
+            'has_data', 'period_days', 'from_date', 'to_date', 'total_credits', 'total_hours',
+            'horizons', 'underutilization', 'month_end')}
+        tables = {key: consumption.get(key) for key in (
+            'has_data', 'period_days', 'total_credits', 'by_cluster', 'by_instance_type')}
+
+        sections = {
+            'summary_cards': (totals, lambda: self.render_summary_cards(analysis)),
+            'consumption_overview': ([overview, analysis.get('cost_estimate')], lambda: self.render_consumption_overview(analysis)),
+            'datalakes': ([analysis.get('total_datalakes'), datalakes], lambda: self.render_datalakes(analysis, datalakes)),
+            'environments': ([analysis.get('total_clusters'), analysis.get('clusters_by_env')], lambda: self.render_environments(analysis)),
+            'clusters': (clusters, lambda: self.render_clusters(clusters)),
+            'consumption_tables': (tables, lambda: self.render_consumption_tables(analysis)),
+            'cost_analysis': (totals, lambda: self.render_cost_analysis(analysis)),
+            'recommendations': (analysis.get('recommendations', []), lambda: self.render_recommendations(analysis)),
+        }
+        rendered = {name: self.section_cache.render(name, inputs, render) for name, (inputs, render) in sections.items()}
+        rendered.update({
+            'generated_title': now.strftime('%Y-%m-%d %H:%M'),
+            'generated_at': now.strftime('%d/%m/%Y a las %H:%M:%S'),
+            'logo': f'<img src="{self.logo_base64}" alt="MasOrange Logo" style="height: 60px;">' if self.logo_base64 else '',
+            'virtual_table_assets': VIRTUAL_TABLE_ASSETS,
+            'dashboard_data': self.build_payload(analysis, payload_mode, sidecar_path),
+        })
+        return rendered
+
+    def build_payload(self, analysis, mode='gzip', sidecar_path=None):
+        """Compact, encoded data payload consumed by the dashboard charts"""
+        return encode_payload(compact_payload(analysis), mode, sidecar_path)
+
+    def render_summary_cards(self, analysis):
+        """Main metric cards"""
+        return f"""        <!-- Métricas principales -->
         <div class="grid">
             <div class="card">
                 <div class="card-title">Total Clusters</div>
@@ -651,10 +354,32 @@ class CDPDashboard:
                 <div class="card-value">{analysis['cost_estimate']:,.2f}</div>
                 <div class="card-subtitle">{'Créditos CDP/mes (datos reales)' if analysis.get('cost_source') == 'real' else 'Créditos/mes (estimado)'}</div>
             </div>
-        </div>
+        </div>"""
+
+    def render_consumption_overview(self, analysis):
+        """Consumption summary, horizon views and chart containers (only with real data)"""
+        if not analysis['consumption']['has_data']:
+            return ''
+
+        # Horizon views (7/30/90/365 days, month-to-date, week-over-week)
+        horizons = analysis['consumption'].get('horizons', {})
+        month_to_date = horizons.get('month_to_date') or {'credits': 0, 'days_covered': 0, 'days_in_month': 0, 'month_end_projection': 0}
+        week_over_week = horizons.get('week_over_week') or {'current': 0, 'previous': 0, 'delta': 0, 'delta_pct': None}
+        wow_color = '#dc3545' if week_over_week['delta'] > 0 else '#28a745'
+        wow_pct = f"{week_over_week['delta_pct']:+.1f}%" if week_over_week['delta_pct'] is not None else 'N/A'
+        partial_notice = (
+            '<p style="color: #dc3545; margin-bottom: 15px;"><strong>⚠ Datos de consumo incompletos:</strong> '
+            'la recopilación se interrumpió, los totales de estos horizontes pueden estar por debajo del real.</p>'
+            if horizons.get('partial') else ''
+        )
+        month_end = analysis['consumption'].get('month_end')
+        if month_end:
+            month_end_subtitle = (f"Cierre de {month_end['month']}: {month_end['projected_credits_lower']:,.0f} - "
+                                  f"{month_end['projected_credits_upper']:,.0f} créditos")
+        else:
+            month_end_subtitle = 'Créditos CDP (basado en uso real)'
 
-        <!-- Consumption Summary (if real data available) -->
-        {f"""
+        return f"""
         <div class="section" style="background: linear-gradient(135deg, #FFF5E6 0%, #FFFFFF 100%); border-left: 4px solid #FF7900;">
             <h2>💳 Resumen de Consumo Real (Últimos {analysis['consumption']['period_days']} días)</h2>
             <div class="grid">
@@ -678,8 +403,48 @@ class CDPDashboard:
 
                 <div class="card">
                     <div class="card-title">Proyección Mensual</div>
-                    <div class="card-value" style="color: #000000;">{analysis['cost_estimate']:,.2f}</div>
-                    <div class="card-subtitle">Créditos CDP (basado en uso real)</div>
+                    <div class="card-value" style="color: #000000;">{month_end['projected_credits'] if month_end else analysis['cost_estimate']:,.2f}</div>
+                    <div class="card-subtitle">{month_end_subtitle}</div>
+                </div>
+            </div>
+        </div>
+
+        <!-- Vista por Horizonte Temporal -->
+        <div class="section">
+            <h2>🔭 Vista por Horizonte Temporal</h2>
+            {partial_notice}
+            <div style="margin-bottom: 20px;">
+                <label for="horizonSelector" style="color: #666; margin-right: 10px;"><strong>Horizonte:</strong></label>
+                <select id="horizonSelector" style="padding: 8px 12px; border-radius: 5px; border: 2px solid #FF7900; font-size: 1em;">
+                    <option value="7">Últimos 7 días</option>
+                    <option value="30" selected>Últimos 30 días</option>
+                    <option value="90">Últimos 90 días</option>
+                    <option value="365">Últimos 365 días</option>
+                </select>
+            </div>
+            <div class="grid">
+                <div class="card">
+                    <div class="card-title">Créditos en el Horizonte</div>
+                    <div class="card-value" style="color: #FF7900;" id="horizonCredits">-</div>
+                    <div class="card-subtitle" id="horizonCoverage">-</div>
+                </div>
+
+                <div class="card">
+                    <div class="card-title">Promedio Diario</div>
+                    <div class="card-value" style="color: #000000;" id="horizonDailyAvg">-</div>
+                    <div class="card-subtitle">Créditos/día</div>
+                </div>
+
+                <div class="card">
+                    <div class="card-title">Mes en Curso</div>
+                    <div class="card-value" style="color: #FF7900;">{month_to_date['credits']:,.2f}</div>
+                    <div class="card-subtitle">{month_to_date['days_covered']} de {month_to_date['days_in_month']} días · cierre estimado {month_to_date['month_end_projection']:,.2f}</div>
+                </div>
+
+                <div class="card">
+                    <div class="card-title">Semana vs Anterior</div>
+                    <div class="card-value" style="color: {wow_color};">{wow_pct}</div>
+                    <div class="card-subtitle">{week_over_week['current']:,.2f} vs {week_over_week['previous']:,.2f} créditos</div>
                 </div>
             </div>
         </div>
@@ -755,13 +520,57 @@ class CDPDashboard:
             <p style="color: #666; margin-bottom: 20px;">
                 Detalle de patrones de uso por cluster para identificar oportunidades específicas de optimización.
             </p>
-            <div id="underutilizationAnalysis"></div>
+            <div id="underutilizationAnalysis">{self.render_underutilization(analysis)}</div>
         </div>
-        """ if analysis['consumption']['has_data'] else ''}
+        """
+
+    def render_underutilization(self, analysis):
+        """Underutilization cards per cluster (precomputed in analyze_data)"""
+        insights = analysis['consumption'].get('underutilization', [])
+        if not insights:
+            return '''<div class="card"><p style="color: #28a745; font-size: 1.1em; text-align: center;"><strong>✅ No se detectaron patrones significativos de infrautilización por franjas horarias.</strong></p></div>'''
+
+        cards = []
+        for insight in insights:
+            findings = []
+            if insight['zero_blocks']:
+                findings.append(f"<li><strong>✅ Sin consumo en:</strong> {', '.join(insight['zero_blocks'])} ({len(insight['zero_blocks'])} franjas de 4h)</li>")
+            if insight['night_credits'] > 0:
+                findings.append(f"<li><strong>⚠️ Uso nocturno (20:00-08:00):</strong> {insight['night_credits']:.2f} créditos ({insight['night_pct']:.1f}%) en las franjas: {', '.join(insight['night_blocks'])}.</li>")
+            if insight['weekend_credits'] > 0:
+                findings.append(f"<li><strong>⚠️ Uso en fin de semana:</strong> {insight['weekend_credits']:.2f} créditos ({insight['weekend_pct']:.1f}%). Evalúa si es necesario.</li>")
+            if insight['low_blocks']:
+                findings.append(f"<li><strong>Baja utilización en:</strong> {', '.join(insight['low_blocks'])} (menos del 20% del promedio).</li>")
+
+            if insight['action'] == 'night_schedule':
+                action = f"Implementa schedule para apagar este cluster de 22:00 a 06:00. Ahorro estimado: <strong>{insight['savings']:.2f} créditos/mes</strong>."
+            elif insight['action'] == 'weekend_stop':
+                action = f"Detén este cluster durante fines de semana. Ahorro estimado: <strong>{insight['savings']:.2f} créditos/mes</strong>."
+            else:
+                action = "Revisa si este cluster puede reducir nodos o consolidarse con otro cluster."
 
+            cards.append(f"""
+                    <div class="card" style="margin-bottom: 20px; border-left: 4px solid #FF7900;">
+                        <h3 style="color: #000; margin-bottom: 15px; font-size: 1.3em;">
+                            🖥️ {insight['name']}
+                        </h3>
+                        <div style="background: #f8f9fa; padding: 15px; border-radius: 8px; margin-bottom: 15px;">
+                            <strong>Consumo total:</strong> {insight['credits']:.2f} créditos |
+                            <strong>Horas totales:</strong> {insight['hours']:.1f}h
+                        </div>
+                        <ul style="margin: 0; padding-left: 20px; line-height: 2;">
+                    {''.join(findings)}
+                        </ul>
+                        <div style="background: #FF7900; color: white; padding: 12px; border-radius: 5px; margin-top: 15px; font-weight: 500;">
+                            <strong>💡 Recomendación:</strong> {action}
+                        </div>
+                    </div>
+                    """)
+        return ''.join(cards)
 
-        <!-- Data Lakes -->
-        <div class="section">
+    def render_datalakes(self, analysis, datalakes):
+        """Data Lakes table"""
+        html = f"""        <div class="section">
             <h2>🏞️ Data Lakes ({analysis['total_datalakes']})</h2>
             <table class="cluster-table">
                 <thead>
@@ -794,10 +603,12 @@ class CDPDashboard:
         html += """
                 </tbody>
             </table>
-        </div>
+        </div>"""
+        return html
 
-        <!-- Distribución por Entorno -->
-        <div class="section">
+    def render_environments(self, analysis):
+        """Cluster distribution by environment"""
+        html = """        <div class="section">
             <h2>🌍 Distribución por Entorno</h2>
             <div class="chart-container">
                 <div class="bar-chart">
@@ -819,75 +630,69 @@ class CDPDashboard:
         html += """
                 </div>
             </div>
-        </div>
-
-        <!-- Detalles de Clusters -->
-        <div class="section">
-            <h2>🔧 Data Hub Clusters</h2>
-            <table class="cluster-table">
-                <thead>
-                    <tr>
-                        <th>Nombre</th>
-                        <th>Estado</th>
-                        <th>Tipo</th>
-                        <th>Entorno</th>
-                        <th>Nodos</th>
-                        <th>Plataforma</th>
-                        <th>Fecha Creación</th>
-                    </tr>
-                </thead>
-                <tbody>
-"""
+        </div>"""
+        return html
 
+    def render_clusters(self, clusters):
+        """Data Hub clusters table (virtualized, sortable and filterable in the browser)"""
         # Sort clusters by status (AVAILABLE first, then STOPPED)
         sorted_clusters = sorted(clusters, key=lambda x: (x.get('status') != 'AVAILABLE', x.get('clusterName', '')))
 
-        for cluster in sorted_clusters:
-            status = cluster.get('status', 'UNKNOWN')
-            status_class = 'status-available' if status == 'AVAILABLE' else 'status-stopped'
-            html += f"""
-                    <tr>
-                        <td><strong>{cluster.get('clusterName', 'N/A')}</strong></td>
-                        <td><span class="status-badge {status_class}">{status}</span></td>
-                        <td>{cluster.get('workloadType', 'N/A')}</td>
-                        <td>{cluster.get('environmentName', 'N/A')}</td>
-                        <td><strong>{cluster.get('nodeCount', 0)}</strong> nodos</td>
-                        <td>{cluster.get('cloudPlatform', 'N/A')}</td>
-                        <td>{cluster.get('creationDate', 'N/A')[:10]}</td>
-                    </tr>
-"""
-
-        html += f"""
-                </tbody>
-            </table>
-        </div>
-
-        <!-- Consumption by Cluster (if real data available) -->
-        {'''
+        columns = [
+            column('Nombre', bold=True),
+            column('Estado', 'badge', classes={'AVAILABLE': 'status-available'}, default_class='status-stopped'),
+            column('Tipo'),
+            column('Entorno'),
+            column('Nodos', 'number', bold=True, suffix=' nodos'),
+            column('Plataforma'),
+            column('Fecha Creación'),
+        ]
+        rows = [
+            [
+                cluster.get('clusterName', 'N/A'),
+                cluster.get('status', 'UNKNOWN'),
+                cluster.get('workloadType', 'N/A'),
+                cluster.get('environmentName', 'N/A'),
+                cluster.get('nodeCount', 0),
+                cluster.get('cloudPlatform', 'N/A'),
+                cluster.get('creationDate', 'N/A')[:10],
+            ]
+            for cluster in sorted_clusters
+        ]
+
+        return f"""        <div class="section">
+            <h2>🔧 Data Hub Clusters</h2>
+            {virtual_table('clustersTable', columns, rows, table_class='cluster-table')}
+        </div>"""
+
+    def render_consumption_tables(self, analysis):
+        """Consumption by cluster and by instance type tables (only with real data)"""
+        if not analysis['consumption']['has_data']:
+            return ''
+
+        total_credits = analysis['consumption']['total_credits']
+        columns = [
+            column('Cluster', bold=True),
+            column('Créditos Consumidos', 'number', decimals=2, suffix=' créditos'),
+            column('Horas de Computación', 'number', decimals=1, suffix=' horas'),
+            column('Costo/Hora Promedio', 'number', decimals=3),
+            column('% del Total', 'number', decimals=1, suffix='%'),
+        ]
+        rows = [
+            [
+                cluster_name,
+                data['credits'],
+                data['hours'],
+                data['credits'] / data['hours'] if data['hours'] > 0 else 0,
+                data['credits'] / total_credits * 100 if total_credits > 0 else 0,
+            ]
+            for cluster_name, data in sorted(analysis['consumption']['by_cluster'].items(), key=lambda x: x[1]['credits'], reverse=True)
+        ]
+
+        return '''
         <div class="section">
             <h2>📊 Consumo por Cluster (Últimos ''' + str(analysis['consumption']['period_days']) + ''' días)</h2>
-            <table class="cluster-table">
-                <thead>
-                    <tr>
-                        <th>Cluster</th>
-                        <th>Créditos Consumidos</th>
-                        <th>Horas de Computación</th>
-                        <th>Costo/Hora Promedio</th>
-                        <th>% del Total</th>
-                    </tr>
-                </thead>
-                <tbody>
-''' + ''.join([f'''
-                    <tr>
-                        <td><strong>{cluster_name}</strong></td>
-                        <td>{data["credits"]:,.2f} créditos</td>
-                        <td>{data["hours"]:,.1f} horas</td>
-                        <td>{(data["credits"]/data["hours"]) if data["hours"] > 0 else 0:.3f}</td>
-                        <td>{(data["credits"]/analysis["consumption"]["total_credits"]*100) if analysis["consumption"]["total_credits"] > 0 else 0:.1f}%</td>
-                    </tr>
-''' for cluster_name, data in sorted(analysis['consumption']['by_cluster'].items(), key=lambda x: x[1]['credits'], reverse=True)]) + '''
-                </tbody>
-            </table>
+            ''' + virtual_table('consumptionByClusterTable', columns, rows, table_class='cluster-table') + '''
         </div>
 
         <!-- Consumption by Instance Type (if real data available) -->
@@ -908,10 +713,11 @@ class CDPDashboard:
                 </div>
             </div>
         </div>
-        ''' if analysis['consumption']['has_data'] else ''}
+        '''
 
-        <!-- Análisis de Costos -->
-        <div class="section">
+    def render_cost_analysis(self, analysis):
+        """Cost analysis cards"""
+        return f"""        <div class="section">
             <h2>💰 Análisis de Costos</h2>
             <div class="grid">
                 <div class="card">
@@ -941,10 +747,11 @@ class CDPDashboard:
                 <strong>Nota:</strong> Los costos son estimaciones aproximadas. Los costos reales pueden variar según el tipo de instancia,
                 región, y servicios adicionales utilizados. Consulta tu factura de GCP para costos precisos.
             </p>
-        </div>
+        </div>"""
 
-        <!-- Recommendations Section -->
-        <div class="section" style="background: #FFF5E6; border: 2px solid #FF7900;">
+    def render_recommendations(self, analysis):
+        """Savings recommendations and total savings summary"""
+        html = """        <div class="section" style="background: #FFF5E6; border: 2px solid #FF7900;">
             <h2>💡 Recomendaciones de Ahorro</h2>
             <p style="margin-bottom: 20px; color: #666;">
                 Basado en el análisis de consumo, hemos identificado las siguientes oportunidades de optimización:
@@ -1002,7 +809,7 @@ class CDPDashboard:
 
         total_savings = sum(rec.get('savings', 0) for rec in analysis.get('recommendations', []))
 
-        html += recommendations_html + f"""
+        return html + recommendations_html + f"""
             <div style="background: #000; color: white; padding: 20px; border-radius: 10px; margin-top: 20px;">
                 <h3 style="color: #FF7900; margin-bottom: 10px;">📊 Resumen de Ahorro Total</h3>
                 <div style="font-size: 2em; font-weight: bold;">
@@ -1012,726 +819,95 @@ class CDPDashboard:
                     Implementando estas recomendaciones podrías reducir tu gasto mensual significativamente.
                 </p>
             </div>
-        </div>
-
-        <div class="timestamp">
-            📅 Generado el {datetime.now().strftime('%d/%m/%Y a las %H:%M:%S')}
-        </div>
-    </div>
-
-    <script>
-        console.log('=== CDP Dashboard JavaScript Starting ===');
-
-        // Prepare data for consumption trends chart
-        const consumptionByDate = {json.dumps(dict(sorted(analysis['consumption']['by_date'].items()))) if analysis['consumption']['has_data'] else '{}'};
-        console.log('consumptionByDate loaded:', Object.keys(consumptionByDate).length, 'days');
-
-        if (Object.keys(consumptionByDate).length > 0) {{
-            const dates = Object.keys(consumptionByDate).sort();
-            const credits = dates.map(date => consumptionByDate[date].credits);
-            const hours = dates.map(date => consumptionByDate[date].hours);
-
-            // Consumption Trends Line Chart
-            try {{
-                console.log('Creating consumptionTrendsChart...');
-                const ctx = document.getElementById('consumptionTrendsChart');
-                if (!ctx) throw new Error('Element consumptionTrendsChart not found');
-                new Chart(ctx, {{
-                type: 'line',
-                data: {{
-                    labels: dates,
-                    datasets: [
-                        {{
-                            label: 'Créditos Consumidos',
-                            data: credits,
-                            borderColor: '#FF7900',
-                            backgroundColor: 'rgba(255, 121, 0, 0.1)',
-                            borderWidth: 3,
-                            fill: true,
-                            tension: 0.4,
-                            yAxisID: 'y'
-                        }},
-                        {{
-                            label: 'Horas de Computación',
-                            data: hours,
-                            borderColor: '#000000',
-                            backgroundColor: 'rgba(0, 0, 0, 0.05)',
-                            borderWidth: 2,
-                            fill: true,
-                            tension: 0.4,
-                            yAxisID: 'y1'
-                        }}
-                    ]
-                }},
-                options: {{
-                    responsive: true,
-                    maintainAspectRatio: true,
-                    interaction: {{
-                        mode: 'index',
-                        intersect: false
-                    }},
-                    plugins: {{
-                        legend: {{
-                            display: true,
-                            position: 'top'
-                        }},
-                        title: {{
-                            display: false
-                        }}
-                    }},
-                    scales: {{
-                        y: {{
-                            type: 'linear',
-                            display: true,
-                            position: 'left',
-                            title: {{
-                                display: true,
-                                text: 'Créditos CDP',
-                                color: '#FF7900',
-                                font: {{
-                                    weight: 'bold'
-                                }}
-                            }},
-                            ticks: {{
-                                color: '#FF7900'
-                            }}
-                        }},
-                        y1: {{
-                            type: 'linear',
-                            display: true,
-                            position: 'right',
-                            title: {{
-                                display: true,
-                                text: 'Horas de Computación',
-                                color: '#000000',
-                                font: {{
-                                    weight: 'bold'
-                                }}
-                            }},
-                            ticks: {{
-                                color: '#000000'
-                            }},
-                            grid: {{
-                                drawOnChartArea: false
-                            }}
-                        }}
-                    }}
-                }}
-            }});
-                console.log('✓ consumptionTrendsChart created');
-            }} catch(e) {{
-                console.error('✗ Error creating consumptionTrendsChart:', e);
-            }}
-
-            // Daily Credits Bar Chart
-            try {{
-                console.log('Creating dailyCreditsChart...');
-            const ctx2 = document.getElementById('dailyCreditsChart');
-            new Chart(ctx2, {{
-                type: 'bar',
-                data: {{
-                    labels: dates,
-                    datasets: [{{
-                        label: 'Créditos Consumidos',
-                        data: credits,
-                        backgroundColor: 'rgba(255, 121, 0, 0.7)',
-                        borderColor: '#FF7900',
-                        borderWidth: 2
-                    }}]
-                }},
-                options: {{
-                    responsive: true,
-                    maintainAspectRatio: true,
-                    plugins: {{
-                        legend: {{
-                            display: false
-                        }},
-                        tooltip: {{
-                            callbacks: {{
-                                label: function(context) {{
-                                    return 'Créditos: ' + context.parsed.y.toFixed(2);
-                                }}
-                            }}
-                        }}
-                    }},
-                    scales: {{
-                        y: {{
-                            beginAtZero: true,
-                            title: {{
-                                display: true,
-                                text: 'Créditos CDP',
-                                color: '#FF7900',
-                                font: {{
-                                    weight: 'bold',
-                                    size: 14
-                                }}
-                            }},
-                            ticks: {{
-                                color: '#000'
-                            }},
-                            grid: {{
-                                color: 'rgba(0, 0, 0, 0.05)'
-                            }}
-                        }},
-                        x: {{
-                            ticks: {{
-                                color: '#000'
-                            }},
-                            grid: {{
-                                display: false
-                            }}
-                        }}
-                    }}
-                }}
-            }});
-                console.log('✓ dailyCreditsChart created');
-            }} catch(e) {{
-                console.error('✗ Error creating dailyCreditsChart:', e);
-            }}
-
-            // Stacked Bar Chart by Cluster
-            try {{
-                console.log('Creating clusterStackedChart...');
-            const clusterData = {json.dumps(dict(sorted(analysis['consumption']['by_cluster_and_date'].items())))};
-            const allClusters = [...new Set(Object.values(clusterData).flatMap(Object.keys))];
-
-            // Define colors for each cluster (using Orange palette)
-            const clusterColors = {{
-                0: {{ bg: 'rgba(255, 121, 0, 0.8)', border: '#FF7900' }},
-                1: {{ bg: 'rgba(0, 0, 0, 0.7)', border: '#000000' }},
-                2: {{ bg: 'rgba(255, 165, 0, 0.7)', border: '#FFA500' }},
-                3: {{ bg: 'rgba(128, 64, 0, 0.7)', border: '#804000' }},
-                4: {{ bg: 'rgba(255, 200, 100, 0.7)', border: '#FFC864' }},
-                5: {{ bg: 'rgba(64, 64, 64, 0.7)', border: '#404040' }},
-                6: {{ bg: 'rgba(255, 100, 0, 0.7)', border: '#FF6400' }}
-            }};
-
-            const datasets = allClusters.map((cluster, idx) => ({{
-                label: cluster,
-                data: dates.map(date => clusterData[date]?.[cluster] || 0),
-                backgroundColor: clusterColors[idx % 7].bg,
-                borderColor: clusterColors[idx % 7].border,
-                borderWidth: 1
-            }}));
-
-            const ctx3 = document.getElementById('clusterStackedChart');
-            new Chart(ctx3, {{
-                type: 'bar',
-                data: {{
-                    labels: dates,
-                    datasets: datasets
-                }},
-                options: {{
-                    responsive: true,
-                    maintainAspectRatio: true,
-                    plugins: {{
-                        legend: {{
-                            display: true,
-                            position: 'top',
-                            labels: {{
-                                color: '#000',
-                                font: {{
-                                    size: 11
-                                }}
-                            }}
-                        }},
-                        tooltip: {{
-                            mode: 'index',
-                            callbacks: {{
-                                footer: function(tooltipItems) {{
-                                    let total = 0;
-                                    tooltipItems.forEach(item => {{
-                                        total += item.parsed.y;
-                                    }});
-                                    return 'Total: ' + total.toFixed(2) + ' créditos';
-                                }}
-                            }}
-                        }}
-                    }},
-                    scales: {{
-                        x: {{
-                            stacked: true,
-                            ticks: {{
-                                color: '#000'
-                            }},
-                            grid: {{
-                                display: false
-                            }}
-                        }},
-                        y: {{
-                            stacked: true,
-                            beginAtZero: true,
-                            title: {{
-                                display: true,
-                                text: 'Créditos CDP',
-                                color: '#FF7900',
-                                font: {{
-                                    weight: 'bold',
-                                    size: 14
-                                }}
-                            }},
-                            ticks: {{
-                                color: '#000'
-                            }},
-                            grid: {{
-                                color: 'rgba(0, 0, 0, 0.05)'
-                            }}
-                        }}
-                    }}
-                }}
-            }});
-                console.log('✓ clusterStackedChart created');
-            }} catch(e) {{
-                console.error('✗ Error creating clusterStackedChart:', e);
-            }}
-
-            // Pie Chart - Usage Hours by Cluster
-            try {{
-                console.log('Creating clusterPieChart...');
-            const clusterUsageHours = {json.dumps({k: v['hours'] for k, v in analysis['consumption']['by_cluster'].items()})};
-            const clusterNames = Object.keys(clusterUsageHours);
-            const clusterValues = Object.values(clusterUsageHours);
-            const totalHours = clusterValues.reduce((a, b) => a + b, 0);
-
-            // Generate dynamic colors for pie chart (Orange palette)
-            const pieColors = [
-                '#FF7900',  // Orange primary
-                '#000000',  // Black
-                '#FFA500',  // Light orange
-                '#FF6400',  // Dark orange
-                '#FFC864',  // Golden
-                '#804000',  // Brown
-                '#404040',  // Dark grey
-                '#FF8C00',  // Dark orange 2
-                '#FFB347',  // Pastel orange
-                '#CC5500'   // Burnt orange
-            ];
-
-            const ctx4 = document.getElementById('clusterPieChart');
-            new Chart(ctx4, {{
-                type: 'doughnut',  // Using doughnut for modern look
-                data: {{
-                    labels: clusterNames,
-                    datasets: [{{
-                        data: clusterValues,
-                        backgroundColor: pieColors.slice(0, clusterNames.length),
-                        borderColor: '#FFFFFF',
-                        borderWidth: 3
-                    }}]
-                }},
-                options: {{
-                    responsive: true,
-                    maintainAspectRatio: true,
-                    plugins: {{
-                        legend: {{
-                            display: true,
-                            position: 'bottom',
-                            labels: {{
-                                color: '#000',
-                                font: {{
-                                    size: 12,
-                                    weight: '500'
-                                }},
-                                padding: 15,
-                                generateLabels: function(chart) {{
-                                    const data = chart.data;
-                                    return data.labels.map((label, i) => {{
-                                        const value = data.datasets[0].data[i];
-                                        const percentage = ((value / totalHours) * 100).toFixed(1);
-                                        return {{
-                                            text: `${{label}}: ${{percentage}}%`,
-                                            fillStyle: data.datasets[0].backgroundColor[i],
-                                            hidden: false,
-                                            index: i
-                                        }};
-                                    }});
-                                }}
-                            }}
-                        }},
-                        tooltip: {{
-                            callbacks: {{
-                                label: function(context) {{
-                                    const label = context.label || '';
-                                    const value = context.parsed;
-                                    const percentage = ((value / totalHours) * 100).toFixed(1);
-                                    return `${{label}}: ${{value.toFixed(1)}} horas (${{percentage}}%)`;
-                                }}
-                            }}
-                        }}
-                    }}
-                }}
-            }});
-
-            // Generate insights for pie chart
-            const sortedClusters = clusterNames
-                .map((name, idx) => ({{ name, value: clusterValues[idx], percentage: (clusterValues[idx] / totalHours * 100).toFixed(1) }}))
-                .sort((a, b) => b.value - a.value);
-
-            let insightsHTML = '<ul style="margin: 0; padding-left: 20px;">';
-            insightsHTML += `<li><strong>${{sortedClusters[0].name}}</strong> es el cluster más utilizado, consumiendo el <strong style="color: #FF7900;">${{sortedClusters[0].percentage}}%</strong> del tiempo total de computación (<strong>${{sortedClusters[0].value.toFixed(1)}} horas</strong>).</li>`;
-
-            if (sortedClusters.length > 1) {{
-                const top3 = sortedClusters.slice(0, 3);
-                const top3Total = top3.reduce((sum, c) => sum + parseFloat(c.percentage), 0).toFixed(1);
-                const top3Hours = top3.reduce((sum, c) => sum + parseFloat(c.value), 0).toFixed(1);
-                insightsHTML += `<li>Los 3 clusters más activos (<strong>${{top3.map(c => c.name).join(', ')}}</strong>) representan el <strong style="color: #FF7900;">${{top3Total}}%</strong> del tiempo de uso (<strong>${{top3Hours}} horas</strong>).</li>`;
-            }}
-
-            if (sortedClusters.length > 3) {{
-                const others = sortedClusters.slice(3);
-                const othersTotal = others.reduce((sum, c) => sum + parseFloat(c.percentage), 0).toFixed(1);
-                const othersHours = others.reduce((sum, c) => sum + parseFloat(c.value), 0).toFixed(1);
-                insightsHTML += `<li>Los ${{others.length}} clusters restantes representan solo el <strong>${{othersTotal}}%</strong> del tiempo de uso (<strong>${{othersHours}} horas</strong>).</li>`;
-            }}
-
-            insightsHTML += '</ul>';
-            document.getElementById('pieChartInsights').innerHTML = insightsHTML;
-                console.log('✓ clusterPieChart created');
-            }} catch(e) {{
-                console.error('✗ Error creating clusterPieChart:', e);
-            }}
-
-            // Hourly Pattern Chart (4-hour blocks as reported by CDP)
-            try {{
-                console.log('Creating hourlyPatternChart...');
-            const hourlyData = {json.dumps(dict(sorted(analysis['consumption']['by_hour_of_day'].items())))};
-            // CDP reports in 4-hour blocks: 00-04, 04-08, 08-12, 12-16, 16-20, 20-24
-            const timeBlocks = [0, 4, 8, 12, 16, 20];
-            const blockLabels = ['00:00-04:00', '04:00-08:00', '08:00-12:00', '12:00-16:00', '16:00-20:00', '20:00-00:00'];
-            const hourlyCredits = timeBlocks.map(h => hourlyData[h] || 0);
-            const totalHourlyCredits = hourlyCredits.reduce((a, b) => a + b, 0);
-
-            const ctx5 = document.getElementById('hourlyPatternChart');
-            new Chart(ctx5, {{
-                type: 'bar',
-                data: {{
-                    labels: blockLabels,
-                    datasets: [{{
-                        label: 'Créditos Consumidos',
-                        data: hourlyCredits,
-                        backgroundColor: hourlyCredits.map(val => {{
-                            const intensity = totalHourlyCredits > 0 ? val / Math.max(...hourlyCredits) : 0;
-                            return intensity > 0.7 ? 'rgba(255, 121, 0, 0.9)' :
-                                   intensity > 0.4 ? 'rgba(255, 121, 0, 0.6)' :
-                                   'rgba(255, 121, 0, 0.3)';
-                        }}),
-                        borderColor: '#FF7900',
-                        borderWidth: 1
-                    }}]
-                }},
-                options: {{
-                    responsive: true,
-                    maintainAspectRatio: true,
-                    plugins: {{
-                        legend: {{
-                            display: false
-                        }},
-                        tooltip: {{
-                            callbacks: {{
-                                label: function(context) {{
-                                    const percentage = totalHourlyCredits > 0 ? (context.parsed.y / totalHourlyCredits * 100).toFixed(1) : 0;
-                                    return `Créditos: ${{context.parsed.y.toFixed(2)}} (${{percentage}}%)`;
-                                }}
-                            }}
-                        }}
-                    }},
-                    scales: {{
-                        y: {{
-                            beginAtZero: true,
-                            title: {{
-                                display: true,
-                                text: 'Créditos CDP',
-                                color: '#FF7900',
-                                font: {{
-                                    weight: 'bold',
-                                    size: 14
-                                }}
-                            }},
-                            ticks: {{
-                                color: '#000'
-                            }},
-                            grid: {{
-                                color: 'rgba(0, 0, 0, 0.05)'
-                            }}
-                        }},
-                        x: {{
-                            ticks: {{
-                                color: '#000',
-                                font: {{
-                                    size: 10
-                                }}
-                            }},
-                            grid: {{
-                                display: false
-                            }}
-                        }}
-                    }}
-                }}
-            }});
-
-            // Generate insights for 4-hour blocks
-            const blockData = timeBlocks.map((hour, idx) => ({{
-                label: blockLabels[idx],
-                hour: hour,
-                credits: hourlyCredits[idx],
-                percentage: totalHourlyCredits > 0 ? (hourlyCredits[idx] / totalHourlyCredits * 100) : 0
-            }})).filter(b => b.credits > 0).sort((a, b) => b.credits - a.credits);
-
-            const peakBlock = blockData[0];
-
-            // Business hours blocks (08:00-20:00): blocks starting at 8, 12, 16
-            const businessBlocks = blockData.filter(b => b.hour >= 8 && b.hour < 20);
-            const businessCredits = businessBlocks.reduce((sum, b) => sum + b.credits, 0);
-            const businessPercentage = totalHourlyCredits > 0 ? (businessCredits / totalHourlyCredits * 100).toFixed(1) : 0;
-
-            // Night blocks (20:00-08:00): blocks starting at 20, 0, 4
-            const nightBlocks = blockData.filter(b => b.hour === 20 || b.hour === 0 || b.hour === 4);
-            const nightCredits = nightBlocks.reduce((sum, b) => sum + b.credits, 0);
-            const nightPercentage = totalHourlyCredits > 0 ? (nightCredits / totalHourlyCredits * 100).toFixed(1) : 0;
-
-            let hourlyInsightsHTML = '<ul style="margin: 0; padding-left: 20px;">';
-            hourlyInsightsHTML += `<li><strong>ℹ️ Nota:</strong> CDP reporta consumo en franjas de 4 horas. Los datos muestran estas franjas agregadas de los últimos 30 días.</li>`;
-
-            if (peakBlock) {{
-                hourlyInsightsHTML += `<li><strong>Franja pico:</strong> ${{peakBlock.label}} con <strong style="color: #FF7900;">${{peakBlock.credits.toFixed(2)}} créditos</strong> (${{peakBlock.percentage.toFixed(1)}}% del total).</li>`;
-            }}
-
-            hourlyInsightsHTML += `<li><strong>Horario laboral (08:00-20:00):</strong> <strong style="color: #FF7900;">${{businessPercentage}}%</strong> del consumo (${{businessCredits.toFixed(2)}} créditos).</li>`;
-
-            if (nightCredits > 0) {{
-                hourlyInsightsHTML += `<li><strong>⚠️ Uso nocturno (20:00-08:00):</strong> <strong style="color: #dc3545;">${{nightPercentage}}%</strong> del consumo (${{nightCredits.toFixed(2)}} créditos). Evalúa si es necesario mantener clusters activos en estas franjas.</li>`;
-            }}
-
-            hourlyInsightsHTML += '</ul>';
-            document.getElementById('hourlyInsights').innerHTML = hourlyInsightsHTML;
-                console.log('✓ hourlyPatternChart created');
-            }} catch(e) {{
-                console.error('✗ Error creating hourlyPatternChart:', e);
-            }}
-
-            // Weekly Pattern Chart (Mon-Sun)
-            try {{
-                console.log('Creating weeklyPatternChart...');
-            const weeklyData = {json.dumps(dict(sorted(analysis['consumption']['by_day_of_week'].items())))};
-            const dayNames = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo'];
-            const weeklyCredits = [0, 1, 2, 3, 4, 5, 6].map(d => weeklyData[d] || 0);
-            const totalWeeklyCredits = weeklyCredits.reduce((a, b) => a + b, 0);
-
-            const ctx6 = document.getElementById('weeklyPatternChart');
-            new Chart(ctx6, {{
-                type: 'bar',
-                data: {{
-                    labels: dayNames,
-                    datasets: [{{
-                        label: 'Créditos Consumidos',
-                        data: weeklyCredits,
-                        backgroundColor: weeklyCredits.map((val, idx) => {{
-                            // Weekend days (Saturday=5, Sunday=6) in different color
-                            return idx >= 5 ? 'rgba(0, 0, 0, 0.7)' : 'rgba(255, 121, 0, 0.8)';
-                        }}),
-                        borderColor: weeklyCredits.map((val, idx) => idx >= 5 ? '#000000' : '#FF7900'),
-                        borderWidth: 2
-                    }}]
-                }},
-                options: {{
-                    responsive: true,
-                    maintainAspectRatio: true,
-                    plugins: {{
-                        legend: {{
-                            display: false
-                        }},
-                        tooltip: {{
-                            callbacks: {{
-                                label: function(context) {{
-                                    const percentage = totalWeeklyCredits > 0 ? (context.parsed.y / totalWeeklyCredits * 100).toFixed(1) : 0;
-                                    return `Créditos: ${{context.parsed.y.toFixed(2)}} (${{percentage}}%)`;
-                                }}
-                            }}
-                        }}
-                    }},
-                    scales: {{
-                        y: {{
-                            beginAtZero: true,
-                            title: {{
-                                display: true,
-                                text: 'Créditos CDP',
-                                color: '#FF7900',
-                                font: {{
-                                    weight: 'bold',
-                                    size: 14
-                                }}
-                            }},
-                            ticks: {{
-                                color: '#000'
-                            }},
-                            grid: {{
-                                color: 'rgba(0, 0, 0, 0.05)'
-                            }}
-                        }},
-                        x: {{
-                            ticks: {{
-                                color: '#000'
-                            }},
-                            grid: {{
-                                display: false
-                            }}
-                        }}
-                    }}
-                }}
-            }});
-
-            // Generate weekly insights
-            const weekdayCredits = weeklyCredits.slice(0, 5).reduce((a, b) => a + b, 0);
-            const weekendCredits = weeklyCredits.slice(5).reduce((a, b) => a + b, 0);
-            const weekdayPercentage = totalWeeklyCredits > 0 ? (weekdayCredits / totalWeeklyCredits * 100).toFixed(1) : 0;
-            const weekendPercentage = totalWeeklyCredits > 0 ? (weekendCredits / totalWeeklyCredits * 100).toFixed(1) : 0;
-
-            const peakDay = dayNames[weeklyCredits.indexOf(Math.max(...weeklyCredits))];
-            const peakDayCredits = Math.max(...weeklyCredits);
-            const peakDayPercentage = totalWeeklyCredits > 0 ? (peakDayCredits / totalWeeklyCredits * 100).toFixed(1) : 0;
-
-            let weeklyInsightsHTML = '<ul style="margin: 0; padding-left: 20px;">';
-            weeklyInsightsHTML += `<li><strong>Día de mayor consumo:</strong> ${{peakDay}} con <strong style="color: #FF7900;">${{peakDayCredits.toFixed(2)}} créditos</strong> (${{peakDayPercentage}}%).</li>`;
-            weeklyInsightsHTML += `<li><strong>Días laborables (Lun-Vie):</strong> <strong style="color: #FF7900;">${{weekdayPercentage}}%</strong> del consumo (${{weekdayCredits.toFixed(2)}} créditos).</li>`;
-
-            if (weekendCredits > 0) {{
-                weeklyInsightsHTML += `<li><strong>⚠️ Fin de semana (Sáb-Dom):</strong> <strong style="color: #dc3545;">${{weekendPercentage}}%</strong> del consumo (${{weekendCredits.toFixed(2)}} créditos). Evalúa si es necesario mantener clusters activos durante el fin de semana.</li>`;
-            }} else {{
-                weeklyInsightsHTML += `<li><strong>✅ Fin de semana:</strong> Sin consumo registrado. Excelente optimización!</li>`;
-            }}
-
-            weeklyInsightsHTML += '</ul>';
-            document.getElementById('weeklyInsights').innerHTML = weeklyInsightsHTML;
-                console.log('✓ weeklyPatternChart created');
-            }} catch(e) {{
-                console.error('✗ Error creating weeklyPatternChart:', e);
-            }}
-
-            // Detailed underutilization analysis by cluster
-            try {{
-                console.log('Creating underutilization analysis...');
-            const clusterAnalysis = {json.dumps({name: {'hours': data['hours'], 'credits': data['credits'], 'by_hour': dict(data['by_hour']), 'by_day': dict(data['by_day'])} for name, data in analysis['consumption']['by_cluster'].items()})};
-
-            let underutilHTML = '';
-
-            for (const [clusterName, clusterData] of Object.entries(clusterAnalysis)) {{
-                const hourlyData = clusterData.by_hour;
-                const dailyData = clusterData.by_day;
-
-                // CDP reports in 4-hour blocks
-                const clusterTimeBlocks = [0, 4, 8, 12, 16, 20];
-                const clusterBlockLabels = ['00:00-04:00', '04:00-08:00', '08:00-12:00', '12:00-16:00', '16:00-20:00', '20:00-00:00'];
-                const clusterBlocks = clusterTimeBlocks.map((h, idx) => ({{
-                    hour: h,
-                    label: clusterBlockLabels[idx],
-                    credits: hourlyData[h] || 0
-                }}));
-
-                const clusterTotalCredits = Object.values(hourlyData).reduce((a, b) => a + b, 0);
-                const avgBlockCredits = clusterTotalCredits / 6;  // 6 blocks of 4 hours
-
-                // Blocks with less than 20% of average usage
-                const lowUsageBlocks = clusterBlocks.filter(b => b.credits < avgBlockCredits * 0.2 && b.credits > 0);
-
-                // Blocks with zero usage
-                const zeroUsageBlocks = clusterBlocks.filter(b => b.credits === 0);
-
-                // Night usage (blocks 20:00-00:00, 00:00-04:00, 04:00-08:00)
-                const nightBlocks = clusterBlocks.filter(b => b.hour === 20 || b.hour === 0 || b.hour === 4);
-                const nightCredits = nightBlocks.reduce((sum, b) => sum + b.credits, 0);
-
-                // Weekend usage
-                const weekendCredits = (dailyData[5] || 0) + (dailyData[6] || 0);
-                const weekendPercentage = clusterTotalCredits > 0 ? (weekendCredits / clusterTotalCredits * 100).toFixed(1) : 0;
-
-                if (lowUsageBlocks.length > 0 || zeroUsageBlocks.length > 0 || nightCredits > 0 || weekendCredits > 0) {{
-                    underutilHTML += `
-                    <div class="card" style="margin-bottom: 20px; border-left: 4px solid #FF7900;">
-                        <h3 style="color: #000; margin-bottom: 15px; font-size: 1.3em;">
-                            🖥️ ${{clusterName}}
-                        </h3>
-                        <div style="background: #f8f9fa; padding: 15px; border-radius: 8px; margin-bottom: 15px;">
-                            <strong>Consumo total:</strong> ${{clusterData.credits.toFixed(2)}} créditos |
-                            <strong>Horas totales:</strong> ${{clusterData.hours.toFixed(1)}}h
-                        </div>
-                        <ul style="margin: 0; padding-left: 20px; line-height: 2;">
-                    `;
-
-                    if (zeroUsageBlocks.length > 0) {{
-                        const zeroBlockLabels = zeroUsageBlocks.map(b => b.label).join(', ');
-                        underutilHTML += `<li><strong>✅ Sin consumo en:</strong> ${{zeroBlockLabels}} (${{zeroUsageBlocks.length}} franjas de 4h)</li>`;
-                    }}
-
-                    if (nightCredits > 0) {{
-                        const nightPercentage = (nightCredits / clusterTotalCredits * 100).toFixed(1);
-                        const nightBlocksWithUsage = nightBlocks.filter(b => b.credits > 0).map(b => b.label).join(', ');
-                        underutilHTML += `<li><strong>⚠️ Uso nocturno (20:00-08:00):</strong> ${{nightCredits.toFixed(2)}} créditos (${{nightPercentage}}%) en las franjas: ${{nightBlocksWithUsage}}.</li>`;
-                    }}
-
-                    if (weekendCredits > 0) {{
-                        underutilHTML += `<li><strong>⚠️ Uso en fin de semana:</strong> ${{weekendCredits.toFixed(2)}} créditos (${{weekendPercentage}}%). Evalúa si es necesario.</li>`;
-                    }}
-
-                    if (lowUsageBlocks.length > 0) {{
-                        const lowBlockLabels = lowUsageBlocks.map(b => b.label).join(', ');
-                        underutilHTML += `<li><strong>Baja utilización en:</strong> ${{lowBlockLabels}} (menos del 20% del promedio).</li>`;
-                    }}
-
-                    underutilHTML += `
-                        </ul>
-                        <div style="background: #FF7900; color: white; padding: 12px; border-radius: 5px; margin-top: 15px; font-weight: 500;">
-                            <strong>💡 Recomendación:</strong> `;
-
-                    if (nightCredits > clusterTotalCredits * 0.15) {{
-                        underutilHTML += `Implementa schedule para apagar este cluster de 22:00 a 06:00. Ahorro estimado: <strong>${{(nightCredits * 0.7).toFixed(2)}} créditos/mes</strong>.`;
-                    }} else if (weekendCredits > clusterTotalCredits * 0.15) {{
-                        underutilHTML += `Detén este cluster durante fines de semana. Ahorro estimado: <strong>${{(weekendCredits * 0.7).toFixed(2)}} créditos/mes</strong>.`;
-                    }} else {{
-                        underutilHTML += `Revisa si este cluster puede reducir nodos o consolidarse con otro cluster.`;
-                    }}
-
-                    underutilHTML += `
-                        </div>
-                    </div>
-                    `;
-                }}
-            }}
-
-            if (underutilHTML === '') {{
-                underutilHTML = '<div class="card"><p style="color: #28a745; font-size: 1.1em; text-align: center;"><strong>✅ No se detectaron patrones significativos de infrautilización por franjas horarias.</strong></p></div>';
-            }}
-
-            document.getElementById('underutilizationAnalysis').innerHTML = underutilHTML;
-                console.log('✓ Underutilization analysis created');
-            }} catch(e) {{
-                console.error('✗ Error creating underutilization analysis:', e);
-            }}
-
-            console.log('=== All charts created successfully ===');
-        }}
-    </script>
-</body>
-</html>
-"""
-
-        # Write HTML file
-        output_path = Path(output_file)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html)
-
-        print(f"[OK] Dashboard generado exitosamente: {output_path.absolute()}")
+        </div>"""
+
+
+    def refresh_data(self):
+        """Refresh inventory and fetch only the consumption records of recent days
+
+        Records from the last collected day onwards are fetched again (CDP may
+        still restate the current day's blocks) and replace the old ones, but
+        only when the fetch completes and returns records: otherwise the old
+        records are kept. Records older than the collection window are
+        dropped. Returns the number of records fetched.
+        """
+        consumption = self.data.get('consumption', {})
+        days = consumption.get('days', 30)
+        records = consumption.get('records', [])
+        latest = max((r.get('usageStartTimestamp') or '' for r in records), default='')
+        if not latest:
+            self.collect_data(days=days)
+            return len(self.data['consumption']['records'])
+
+        for key, args in (('datalakes', ('datalake', 'list-datalakes')), ('datahubs', ('datahub', 'list-clusters'))):
+            result = self.run_cdp_command(*args)
+            if result:
+                self.data[key] = result
+
+        since_day = latest[:10]
+        fresh = self.collect_consumption_data(days=days, from_timestamp=f'{since_day}T00:00:00Z')
+        cutoff = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d')
+        kept = [
+            r for r in records
+            if not r.get('usageStartTimestamp') or cutoff <= r['usageStartTimestamp'][:10] < since_day
+        ]
+        replaced = fresh.get('complete', True) and bool(fresh['records'])
+        if replaced:
+            recent, to_date = fresh['records'], fresh['to_date']
+        else:
+            print("    Advertencia: Consulta de consumo fallida o vacía, se conservan los registros anteriores")
+            recent = [r for r in records if (r.get('usageStartTimestamp') or '')[:10] >= since_day]
+            to_date = consumption.get('to_date', fresh['to_date'])
+        self.data['consumption'] = {
+            'records': kept + recent,
+            'from_date': f'{cutoff}T00:00:00Z',
+            'to_date': to_date,
+            'days': days,
+            # A truncated initial collection stays incomplete: refreshes only refetch recent days
+            'complete': consumption.get('complete', True),
+        }
+        return len(recent) if replaced else 0
+
+    def save_cube(self, output_file='cdp_consumption_cube.npz'):
+        """Save the consumption cube built by analyze_data so other tools can reuse it"""
+        if self.cube is None:
+            return None
+        output_path = self.cube.save(output_file)
+        print(f"[OK] Cubo de consumo guardado: {output_path.absolute()}")
         return str(output_path.absolute())
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description='CDP Dashboard Generator')
+    parser.add_argument('--days', type=int, default=30,
+                        help='Días de consumo a recopilar (365 para todos los horizontes)')
+    parser.add_argument('--payload', choices=PAYLOAD_MODES, default='gzip',
+                        help='Formato de los datos de las gráficas: gzip embebido, json embebido o fichero .data.js aparte')
+    parser.add_argument('--serve', action='store_true',
+                        help='Servir el dashboard en local con endpoints JSON y actualización en segundo plano')
+    parser.add_argument('--port', type=int, default=8050, help='Puerto del modo --serve')
+    parser.add_argument('--refresh-minutes', type=int, default=15,
+                        help='Minutos entre actualizaciones de datos en el modo --serve')
+    parser.add_argument('--self-contained', action='store_true',
+                        help='Generar un único HTML minificado con Chart.js embebido (sin CDN)')
+    parser.add_argument('--logo', help='Ruta del logo a incrustar en la cabecera')
+    args = parser.parse_args()
+
     print("=" * 60)
     print("CDP Dashboard Generator")
     print("=" * 60)
     print()
 
-    dashboard = CDPDashboard()
-    dashboard.collect_data()
-    output_file = dashboard.generate_html()
+    dashboard = CDPDashboard(logo_path=args.logo) if args.logo else CDPDashboard()
+    dashboard.collect_data(days=args.days)
+
+    if args.serve:
+        from dashboard_server import serve
+        serve(dashboard, port=args.port, refresh_seconds=args.refresh_minutes * 60)
+        return
+
+    output_file = dashboard.generate_html(payload_mode=args.payload, self_contained=args.self_contained)
+    dashboard.save_cube()
 
     print()
     print("=" * 60)
@@ -11,6 +11,11 @@ from datetime import datetime, timedelta, timezone
 from elasticsearch import Elasticsearch
 from elasticsearch.helpers import bulk
 import urllib3
+import numpy as np
+
+from consumption_cube import ConsumptionCube, MEASURES
+from anomaly_detector import SeasonalEWMADetector, ANOMALY_INDEX, anomaly_docs
+from budget_projection import PROJECTION_INDEX, month_end_projection, projection_docs
 
 # Disable SSL warnings if needed (for self-signed certificates)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -47,6 +52,8 @@ class CDPToElasticsearch:
 
         self.index_name_records = 'cdp-consumption-records'
         self.index_name_summary = 'cdp-consumption-summary'
+        self.index_name_anomalies = ANOMALY_INDEX
+        self.index_name_projection = PROJECTION_INDEX
 
     def run_cdp_command(self, *args):
         """Execute CDP CLI command and return JSON result"""
@@ -179,9 +186,63 @@ class CDPToElasticsearch:
             }
         }
 
+        # Template for hourly credit anomalies
+        anomalies_template = {
+            "index_patterns": [self.index_name_anomalies],
+            "template": {
+                "settings": {
+                    "number_of_shards": 1,
+                    "number_of_replicas": 1
+                },
+                "mappings": {
+                    "properties": {
+                        "@timestamp": {"type": "date"},
+                        "detected_at": {"type": "date"},
+                        "cluster_name": {"type": "keyword"},
+                        "credits": {"type": "float"},
+                        "expected": {"type": "float"},
+                        "score": {"type": "float"}
+                    }
+                }
+            }
+        }
+
+        # Template for the month-end projection (one document per cluster and environment)
+        projection_template = {
+            "index_patterns": [self.index_name_projection],
+            "template": {
+                "settings": {
+                    "number_of_shards": 1,
+                    "number_of_replicas": 1
+                },
+                "mappings": {
+                    "properties": {
+                        "@timestamp": {"type": "date"},
+                        "projection_updated": {"type": "date"},
+                        "observed_until": {"type": "date"},
+                        "month": {"type": "keyword"},
+                        "cluster_name": {"type": "keyword"},
+                        "environment_name": {"type": "keyword"},
+                        "method": {"type": "keyword"},
+                        "days_remaining": {"type": "float"},
+                        "actual_credits": {"type": "float"},
+                        "remaining_credits": {"type": "float"},
+                        "projected_credits": {"type": "float"},
+                        "projected_credits_lower": {"type": "float"},
+                        "projected_credits_upper": {"type": "float"},
+                        "budget_credits": {"type": "float"},
+                        "budget_used_pct": {"type": "float"},
+                        "over_budget": {"type": "boolean"},
+                        "over_budget_risk": {"type": "boolean"}
+                    }
+                }
+            }
+        }
+
         try:
             # Delete old templates if they exist
-            for template_name in [f"{self.index_name_records}-template", f"{self.index_name_summary}-template"]:
+            for template_name in [f"{self.index_name_records}-template", f"{self.index_name_summary}-template",
+                                  f"{self.index_name_anomalies}-template", f"{self.index_name_projection}-template"]:
                 try:
                     self.es.options(ignore_status=404).indices.delete_index_template(name=template_name)
                 except:
@@ -200,6 +261,18 @@ class CDPToElasticsearch:
             )
             print(f"[OK] Template creado para {self.index_name_summary}")
 
+            self.es.indices.put_index_template(
+                name=f"{self.index_name_anomalies}-template",
+                body=anomalies_template
+            )
+            print(f"[OK] Template creado para {self.index_name_anomalies}")
+
+            self.es.indices.put_index_template(
+                name=f"{self.index_name_projection}-template",
+                body=projection_template
+            )
+            print(f"[OK] Template creado para {self.index_name_projection}")
+
         except Exception as e:
             print(f"Advertencia: No se pudieron crear templates: {e}")
 
@@ -352,7 +425,7 @@ class CDPToElasticsearch:
         except Exception as e:
             print(f"Advertencia: Error eliminando índices antiguos: {e}")
 
-    def index_summary(self, records):
+    def index_summary(self, records, cube=None):
         """Index aggregated summary data"""
 
         if not records:
@@ -360,45 +433,34 @@ class CDPToElasticsearch:
 
         print(f"\nGenerando datos agregados...")
 
-        from collections import defaultdict
-
-        # Aggregate by date and cluster
-        summary = defaultdict(lambda: {
-            'credits': 0,
-            'hours': 0,
-            'quantity': 0,
-            'instance_types': set()
-        })
-
-        for record in records:
-            usage_start = record.get('usageStartTimestamp', '')
-            date_key = usage_start[:10] if usage_start else 'unknown'
-            cluster_name = record.get('clusterName', 'Unknown')
-            env_name = record.get('environmentName', 'Unknown')
-
-            key = (date_key, cluster_name, env_name)
-
-            summary[key]['credits'] += record.get('grossCharge', 0)
-            summary[key]['hours'] += record.get('hours', 0)
-            summary[key]['quantity'] += record.get('quantity', 0)
-            summary[key]['instance_types'].add(record.get('instanceType', 'Unknown'))
+        # Aggregate by date, cluster and environment from the shared consumption cube
+        if cube is None:
+            cube = ConsumptionCube.from_records(records)
+        totals = cube.rollup('day', 'cluster', 'environment')
+        per_type = cube.rollup('day', 'cluster', 'environment', 'instance_type', measure='records')
+        credits_idx = MEASURES.index('credits')
+        hours_idx = MEASURES.index('hours')
+        quantity_idx = MEASURES.index('quantity')
+        records_idx = MEASURES.index('records')
 
         # Create documents
         docs = []
-        for (date, cluster, env), data in summary.items():
-            if date == 'unknown':
-                continue
+        for d, c, e in zip(*np.nonzero(totals[..., records_idx])):
+            date = cube.labels['day'][d]
+            cell = totals[d, c, e]
+            credits = float(cell[credits_idx])
+            hours = float(cell[hours_idx])
 
             doc = {
                 '@timestamp': f"{date}T00:00:00Z",
                 'date': date,
-                'cluster_name': cluster,
-                'environment_name': env,
-                'total_credits': data['credits'],
-                'total_hours': data['hours'],
-                'total_quantity': data['quantity'],
-                'instance_types': list(data['instance_types']),
-                'avg_credits_per_hour': data['credits'] / data['hours'] if data['hours'] > 0 else 0
+                'cluster_name': cube.labels['cluster'][c],
+                'environment_name': cube.labels['environment'][e],
+                'total_credits': credits,
+                'total_hours': hours,
+                'total_quantity': float(cell[quantity_idx]),
+                'instance_types': [cube.labels['instance_type'][i] for i in np.flatnonzero(per_type[d, c, e])],
+                'avg_credits_per_hour': credits / hours if hours > 0 else 0
             }
             docs.append(doc)
 
@@ -419,6 +481,65 @@ class CDPToElasticsearch:
         except Exception as e:
             print(f"Error indexando resumen: {e}")
 
+    def index_anomalies(self, cube):
+        """Score the new hours of every cluster and index the credit spikes found"""
+
+        print(f"\nDetectando anomalías de consumo horario...")
+
+        detector = SeasonalEWMADetector.load()
+        anomalies = detector.score_cube(cube)
+        detected = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+        try:
+            if anomalies:
+                success, failed = bulk(self.es, anomaly_docs(anomalies, self.index_name_anomalies, detected),
+                                       chunk_size=500, raise_on_error=False)
+                print(f"[OK] Indexadas: {success} anomalías en {self.index_name_anomalies}")
+                if failed:
+                    # Keep the old state so the same hours are scored again next run
+                    print(f"[ERROR] Fallidas: {len(failed)} anomalías, estado del detector sin guardar")
+                    return
+            else:
+                print("  No se detectaron anomalías")
+        except Exception as e:
+            print(f"Error indexando anomalías: {e}, estado del detector sin guardar")
+            return
+
+        detector.save()
+
+    def index_budget_projection(self, cube):
+        """Refresh the month-end projection per cluster and environment"""
+
+        print(f"\nProyectando consumo a fin de mes...")
+
+        rows = month_end_projection(cube)
+        if not rows:
+            return
+        updated = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+        try:
+            success, failed = bulk(self.es, projection_docs(rows, self.index_name_projection, updated),
+                                   chunk_size=500, raise_on_error=False)
+            self.es.indices.refresh(index=self.index_name_projection)
+            total = rows[-1]
+            if not failed:
+                # Clusters that stopped consuming this month are not rewritten:
+                # drop their stale rows (previous months are kept as history)
+                self.es.delete_by_query(index=self.index_name_projection, conflicts='proceed', body={
+                    "query": {"bool": {"filter": [
+                        {"term": {"month": total['month']}},
+                        {"range": {"projection_updated": {"lt": updated}}}
+                    ]}}
+                })
+
+            print(f"[OK] Proyección {total['month']}: {total['projected_credits']:,.0f} créditos "
+                  f"({total['projected_credits_lower']:,.0f} - {total['projected_credits_upper']:,.0f}), "
+                  f"{success} documentos en {self.index_name_projection}")
+            if failed:
+                print(f"[ERROR] Fallidos: {len(failed)} documentos, filas anteriores sin eliminar")
+        except Exception as e:
+            print(f"Error indexando proyección: {e}")
+
     def run(self):
         """Main execution"""
         print("=" * 60)
@@ -441,8 +562,11 @@ class CDPToElasticsearch:
         # Index raw records
         self.index_records(records)
 
-        # Index aggregated summary
-        self.index_summary(records)
+        # Index aggregated summary and hourly anomalies from one consumption cube
+        cube = ConsumptionCube.from_records(records)
+        self.index_summary(records, cube)
+        self.index_anomalies(cube)
+        self.index_budget_projection(cube)
 
         print("\n" + "=" * 60)
         print("[OK] Ingesta completada!")
@@ -450,6 +574,8 @@ class CDPToElasticsearch:
         print(f"\nÍndices creados:")
         print(f"  - {self.index_name_records}-YYYY.MM.DD (registros individuales)")
         print(f"  - {self.index_name_summary}-YYYY.MM.DD (datos agregados)")
+        print(f"  - {self.index_name_anomalies} (picos de consumo horario)")
+        print(f"  - {self.index_name_projection} (proyección a fin de mes)")
         print(f"\nPuedes crear visualizaciones en Kibana usando estos índices.")
 
 
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check for the command-line scripts
+Imports each script in a fresh interpreter and fails if it takes longer than
+its budget or loads heavy dependencies (Elasticsearch client, Prophet,
+pandas, NumPy) that should only be imported on first use
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+HEAVY_MODULES = ('elasticsearch', 'prophet', 'pandas', 'numpy')
+
+# module: (seconds, heavy modules it may import at load time)
+IMPORT_BUDGETS = {
+    'es_client': (0.1, ()),
+    'get_top_clusters': (0.1, ()),
+    'list_indices': (0.1, ()),
+    'verify_labels': (0.1, ()),
+    'compare_quantities': (0.1, ()),
+    'forecast_with_prophet': (0.1, ()),
+}
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps({{'seconds': seconds, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, repeat=3):
+    """Best import time over repeat fresh interpreters, and the heavy modules loaded"""
+    best, loaded = None, []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=Path(__file__).parent, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'error')
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        loaded = probe['loaded']
+        best = probe['seconds'] if best is None else min(best, probe['seconds'])
+    return best, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Comprobar el tiempo de importación de los scripts')
+    parser.add_argument('modules', nargs='*', default=list(IMPORT_BUDGETS), help='Módulos a comprobar')
+    parser.add_argument('--repeat', type=int, default=3, help='Intentos por módulo (se toma el mejor)')
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'Módulo':28s} {'Tiempo':>9s} {'Límite':>9s}  Estado")
+    for module in args.modules:
+        budget, allowed = IMPORT_BUDGETS.get(module, (0.1, ()))
+        try:
+            seconds, loaded = measure(module, args.repeat)
+        except RuntimeError as e:
+            failures += 1
+            print(f"{module:28s} {'-':>9s} {budget:>8.2f}s  [ERROR] {e}")
+            continue
+
+        unexpected = [m for m in loaded if m not in allowed]
+        problems = []
+        if seconds > budget:
+            problems.append('demasiado lento')
+        if unexpected:
+            problems.append(f"importa {', '.join(unexpected)} al cargar")
+        failures += bool(problems)
+        status = '[ERROR] ' + '; '.join(problems) if problems else '[OK]'
+        print(f"{module:28s} {seconds:>8.3f}s {budget:>8.2f}s  {status}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,18 +4,10 @@
 import subprocess
 import json
 from datetime import datetime, timedelta, timezone
-from elasticsearch import Elasticsearch
-import urllib3
-
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-# Connect to Elasticsearch
-es = Elasticsearch(
-    ['https://gea-data-cloud-masorange-es.es.europe-west1.gcp.cloud.es.io'],
-    basic_auth=('infra_admin', 'imdeveloperS'),
-    verify_certs=True,
-    request_timeout=30
-)
+from es_client import lazy_client
+
+# Elasticsearch client, connected on first query
+es = lazy_client()
 
 def get_cdp_total_quantity(days=30):
     """Get total quantity from CDP for last N days"""
@@ -12,7 +12,8 @@ INSTRUCCIONES:
 ELASTICSEARCH_URL = 'https://tu-cluster.es.europe-west1.gcp.cloud.es.io'
 KIBANA_URL = 'https://tu-cluster.kb.europe-west1.gcp.cloud.es.io'
 
-# Credenciales (CAMBIAR ESTOS VALORES)
+# Credenciales (CAMBIAR ESTOS VALORES); sin config.py se leen de las variables
+# de entorno ELASTICSEARCH_URL, ELASTICSEARCH_USERNAME y ELASTICSEARCH_PASSWORD
 USERNAME = 'tu_usuario'
 PASSWORD = 'tu_contraseña'
 
@@ -30,3 +31,10 @@ TOP_CLUSTERS = ['gea-cem-prod', 'gcp-prod-datahub']
 
 # Configuración de datos históricos
 HISTORICAL_DAYS = 30  # Días de datos históricos a obtener
+
+# Presupuesto mensual en créditos por cluster ('Total' para toda la cuenta);
+# la proyección a fin de mes marca los que lo superan o pueden superarlo
+MONTHLY_BUDGETS = {
+    # 'gea-cem-prod': 5000,
+    # 'Total': 20000,
+}
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+CDP Consumption Cube
+Sparse cluster x instance_type x environment x day x hour-of-day cube with
+credits, hours, quantity and record count as measures. Built once from the
+consumption records and shared by every consumer (dashboard, ES summary, ...)
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from cdp_aggregation import ConsumptionColumns, EPOCH_WEEKDAY
+
+DIMENSIONS = ('cluster', 'instance_type', 'environment', 'day', 'hour')
+MEASURES = ('credits', 'hours', 'quantity', 'records')
+
+
+class ConsumptionCube:
+    """
+    Sparse consumption cube
+
+    Only occupied cells are stored: coords (cells, 5) holds each cell's position
+    along DIMENSIONS and measures (cells, 4) its values, so memory grows with
+    the distinct combinations actually seen, not with the product of the
+    dimension sizes. Roll-ups are dense arrays over the kept dimensions only.
+    The day axis is a contiguous daily range (days without consumption are zero).
+    Records whose date parses but hour does not are kept with hour -1: they
+    count in every roll-up that aggregates the hour away and are left out of
+    those that keep it. Records without a parseable date are left out and
+    counted in 'dropped'.
+    """
+
+    def __init__(self, coords, measures, labels, dropped=0):
+        self.coords = np.asarray(coords, dtype=np.int64).reshape(-1, len(DIMENSIONS))
+        self.measures = np.asarray(measures, dtype=np.float64).reshape(-1, len(MEASURES))
+        self.labels = {dim: list(labels[dim]) for dim in DIMENSIONS}
+        self.dropped = dropped
+        self._index = {dim: {label: i for i, label in enumerate(self.labels[dim])} for dim in DIMENSIONS}
+
+    @classmethod
+    def from_dense(cls, values, labels, dropped=0):
+        """Build the cube from a dense (clusters, ..., 24, measures) array"""
+        occupied = np.argwhere(np.asarray(values).any(axis=-1))
+        return cls(occupied, values[tuple(occupied.T)], labels, dropped=dropped)
+
+    @classmethod
+    def from_records(cls, records):
+        """Build the cube from raw CDP consumption records"""
+        return cls.from_columns(ConsumptionColumns(records))
+
+    @classmethod
+    def from_columns(cls, cols):
+        """Build the cube from already loaded ConsumptionColumns"""
+        # Contiguous day axis covering every valid date
+        missing = np.iinfo(np.int64).min
+        date_days = np.full(len(cols.date_labels), missing, dtype=np.int64)
+        for code, label in enumerate(cols.date_labels):
+            try:
+                date_days[code] = np.datetime64(label, 'D').astype(np.int64)
+            except ValueError:
+                continue
+        record_days = date_days[cols.date] if cols.size else np.zeros(0, dtype=np.int64)
+        valid = record_days != missing
+        if valid.any():
+            first_day, last_day = record_days[valid].min(), record_days[valid].max()
+        else:
+            first_day, last_day = 0, -1
+        day_labels = [str(d) for d in np.arange(first_day, last_day + 1).astype('datetime64[D]')]
+
+        labels = {
+            'cluster': cols.cluster_labels,
+            'instance_type': cols.instance_type_labels,
+            'environment': cols.environment_labels,
+            'day': day_labels,
+            'hour': list(range(24)),
+        }
+        if not valid.any():
+            return cls(np.zeros((0, len(DIMENSIONS))), np.zeros((0, len(MEASURES))), labels,
+                       dropped=int((~valid).sum()))
+
+        # Sum the records of each occupied cell: one bincount over the cells seen
+        # (hours shifted by one while encoding, so the unknown hour -1 fits)
+        shape = tuple(len(labels[dim]) for dim in DIMENSIONS[:-1]) + (25,)
+        flat = np.ravel_multi_index(
+            (cols.cluster[valid], cols.instance_type[valid], cols.environment[valid],
+             record_days[valid] - first_day, cols.hour_of_day[valid] + 1),
+            shape
+        )
+        cells, inverse = np.unique(flat, return_inverse=True)
+        measures = np.empty((len(cells), len(MEASURES)), dtype=np.float64)
+        for m, weights in enumerate((cols.credits[valid], cols.hours[valid], cols.quantity[valid], None)):
+            measures[:, m] = np.bincount(inverse, weights=weights, minlength=len(cells))
+        coords = np.stack(np.unravel_index(cells, shape), axis=1)
+        coords[:, -1] -= 1
+        return cls(coords, measures, labels, dropped=int((~valid).sum()))
+
+    @property
+    def shape(self):
+        return tuple(len(self.labels[dim]) for dim in DIMENSIONS)
+
+    @property
+    def nbytes(self):
+        return self.coords.nbytes + self.measures.nbytes
+
+    def _axis(self, dim):
+        if dim not in DIMENSIONS:
+            raise ValueError(f"Dimension desconocida: {dim}")
+        return DIMENSIONS.index(dim)
+
+    def _positions(self, dim, selector):
+        """Resolve a label, a list of labels or an inclusive label slice to axis positions"""
+        index = self._index[dim]
+        if isinstance(selector, slice):
+            labels = self.labels[dim]
+            start = index[selector.start] if selector.start is not None else 0
+            stop = index[selector.stop] + 1 if selector.stop is not None else len(labels)
+            return list(range(start, stop))
+        if isinstance(selector, (list, tuple, set)):
+            return [index[label] for label in selector if label in index]
+        return [index[selector]] if selector in index else []
+
+    def dice(self, **selectors):
+        """
+        Sub-cube restricted to the given labels per dimension
+
+        Each selector is a label, a list of labels or a slice of labels
+        (inclusive on both ends, e.g. day=slice('2025-01-01', '2025-01-31')).
+        """
+        coords = self.coords.copy()
+        kept = np.ones(len(coords), dtype=bool)
+        labels = dict(self.labels)
+        for dim, selector in selectors.items():
+            axis = self._axis(dim)
+            positions = self._positions(dim, selector)
+            remap = np.full(len(self.labels[dim]), -1, dtype=np.int64)
+            remap[positions] = np.arange(len(positions))
+            # Cells of unknown hour (-1) match no hour selector
+            known = coords[:, axis] >= 0
+            coords[:, axis] = np.where(known, remap[np.where(known, coords[:, axis], 0)], -1)
+            kept &= coords[:, axis] >= 0
+            labels[dim] = [self.labels[dim][p] for p in positions]
+        return ConsumptionCube(coords[kept], self.measures[kept], labels, dropped=self.dropped)
+
+    def slice(self, dim, label):
+        """Sub-cube with one dimension fixed to a single label"""
+        return self.dice(**{dim: [label]})
+
+    def rollup(self, *keep, measure=None):
+        """
+        Aggregate away every dimension not listed in keep
+
+        Returns an ndarray with the kept dimensions in the order given, plus a
+        trailing measures axis unless a single measure is requested.
+        """
+        axes = [self._axis(dim) for dim in keep]
+        shape = tuple(len(self.labels[dim]) for dim in keep)
+        columns = range(len(MEASURES)) if measure is None else [MEASURES.index(measure)]
+        size = int(np.prod(shape))
+        coords, measures = self.coords, self.measures
+        if 'hour' in keep:
+            known = coords[:, self._axis('hour')] >= 0
+            coords, measures = coords[known], measures[known]
+        if size and len(coords):
+            flat = np.ravel_multi_index(tuple(coords[:, axes].T), shape) if axes else np.zeros(len(coords), dtype=np.int64)
+            values = np.stack([np.bincount(flat, weights=measures[:, m], minlength=size) for m in columns], axis=-1)
+        else:
+            values = np.zeros((size, len(columns)))
+        values = values.reshape(shape + (len(columns),))
+        return values[..., 0] if measure is not None else values
+
+    def to_dict(self, *keep, measure='credits'):
+        """Roll up to the kept dimensions and return {label tuple: value} for non-empty cells"""
+        values = self.rollup(*keep, measure=measure)
+        seen = self.rollup(*keep, measure='records') > 0
+        result = {}
+        for position in zip(*np.nonzero(seen)):
+            key = tuple(self.labels[dim][p] for dim, p in zip(keep, position))
+            result[key if len(key) > 1 else key[0]] = float(values[position])
+        return result
+
+    def total(self, measure='credits'):
+        """Grand total for one measure"""
+        return float(self.measures[:, MEASURES.index(measure)].sum())
+
+    def hour_range(self):
+        """
+        (first, end) epoch hours of the data: the day axis starts at first and
+        end is the hour after the last one with any record (None if empty)
+        """
+        records = self.rollup('day', 'hour', measure='records').ravel()
+        if not self.labels['day'] or not records.any():
+            return None
+        first = int(np.datetime64(self.labels['day'][0], 'D').astype(np.int64)) * 24
+        return first, first + int(np.flatnonzero(records)[-1]) + 1
+
+    def day_of_week(self):
+        """Weekday (0=Monday) of each label on the day axis"""
+        days = np.array(self.labels['day'], dtype='datetime64[D]').astype(np.int64)
+        return (days + EPOCH_WEEKDAY) % 7
+
+    def save(self, path):
+        """Serialize the cube to a compressed .npz file"""
+        path = Path(path)
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                coords=self.coords.astype(np.int32),
+                measures=self.measures,
+                labels=np.array(json.dumps(self.labels)),
+                dropped=np.array(self.dropped)
+            )
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Load a cube previously written with save()"""
+        with np.load(path) as data:
+            labels = json.loads(str(data['labels']))
+            if 'values' in data:
+                # Dense cubes saved by earlier versions
+                return cls.from_dense(data['values'], labels, dropped=int(data['dropped']))
+            return cls(data['coords'], data['measures'], labels, dropped=int(data['dropped']))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Compact data payload for the generated CDP dashboard
+All chart datasets are packed into one deduplicated, quantized structure with
+short keys, optionally gzip+base64 encoded or written to a sidecar script
+"""
+
+import base64
+import gzip
+import json
+from pathlib import Path
+
+from downsampling import MAX_POINTS, lttb_indices
+
+PAYLOAD_VERSION = 2
+PAYLOAD_MODES = ('gzip', 'json', 'sidecar')
+# Decimals kept for credits and hours (the dashboard shows at most 2)
+PRECISION = 2
+
+
+def _q(value, precision=PRECISION):
+    return None if value is None else round(value, precision)
+
+
+def compact_payload(analysis, precision=PRECISION, max_points=MAX_POINTS):
+    """
+    Pack every chart dataset into one compact structure
+
+    Keys: d dates, dc/dh credits/hours per date, c clusters, ch hours per
+    cluster, cd credits per cluster and date (cluster-major, null where the
+    cluster had no records), hr/wd credits by hour of day / weekday (null where
+    nothing was recorded), hz horizon views. Only what the charts draw is
+    shipped; per-cluster insights are rendered server-side. Periods longer
+    than max_points days keep the dates LTTB picks on the daily credits, shared
+    by every series so the stacked cluster chart stays aligned.
+    """
+    consumption = analysis['consumption']
+    by_date = consumption['by_date'] if consumption['has_data'] else {}
+    by_cluster = consumption['by_cluster']
+    by_cluster_and_date = consumption['by_cluster_and_date']
+
+    dates = sorted(by_date)
+    if len(dates) > max_points:
+        kept = lttb_indices([by_date[d]['credits'] for d in dates], max_points)
+        dates = [dates[i] for i in kept.tolist()]
+    clusters = list(by_cluster)
+
+    horizons = {
+        days: {key: _q(value, precision) if isinstance(value, float) else value for key, value in view.items()}
+        for days, view in consumption.get('horizons', {}).get('horizons', {}).items()
+    }
+
+    return {
+        'v': PAYLOAD_VERSION,
+        'hz': horizons,
+        'd': dates,
+        'dc': [_q(by_date[d]['credits'], precision) for d in dates],
+        'dh': [_q(by_date[d]['hours'], precision) for d in dates],
+        'c': clusters,
+        'ch': [_q(by_cluster[c]['hours'], precision) for c in clusters],
+        'cd': [[_q(by_cluster_and_date.get(d, {}).get(c), precision) for d in dates] for c in clusters],
+        'hr': [_q(consumption['by_hour_of_day'].get(h), precision) for h in range(24)],
+        'wd': [_q(consumption['by_day_of_week'].get(d), precision) for d in range(7)],
+    }
+
+
+def encode_payload(compact, mode='gzip', sidecar_path=None):
+    """
+    Serialize the compact payload for the dashboard template
+
+    gzip     gzip + base64 embedded in the page (smallest single file)
+    json     plain compact JSON embedded in the page
+    sidecar  gzip + base64 written to a .data.js file next to the page, loaded
+             with a script tag so it also works when opened from file://
+    Returns the JavaScript literal that replaces @@dashboard_data@@.
+    """
+    if mode not in PAYLOAD_MODES:
+        raise ValueError(f"Modo de payload no soportado: {mode} (usa {', '.join(PAYLOAD_MODES)})")
+
+    raw = json.dumps(compact, separators=(',', ':'))
+    if mode == 'json':
+        wrapper = {'encoding': 'json', 'data': compact}
+        return json.dumps(wrapper, separators=(',', ':')).replace('</', '<\\/')
+
+    packed = base64.b64encode(gzip.compress(raw.encode('utf-8'), mtime=0)).decode('ascii')
+    wrapper = {'encoding': 'gzip-base64', 'data': packed}
+    if mode == 'gzip':
+        return json.dumps(wrapper)
+
+    sidecar_path = Path(sidecar_path)
+    with open(sidecar_path, 'w', encoding='utf-8') as f:
+        f.write(f"window.CDP_DASHBOARD_PAYLOAD = {json.dumps(wrapper)};\n")
+    return json.dumps({'encoding': 'sidecar', 'src': sidecar_path.name})
+
+
+def endpoint_payload(url):
+    """Payload reference for served pages: the browser fetches the compact JSON from url"""
+    return json.dumps({'encoding': 'url', 'src': url})
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+CDP Dashboard Server
+Hosts the CDP dashboard locally: the page and one JSON endpoint per chart are
+served from an in-memory snapshot that a background thread refreshes
+incrementally, with ETags so unchanged data costs a 304
+"""
+
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cdp_dashboard import render_dashboard
+from dashboard_payload import compact_payload, endpoint_payload
+
+DEFAULT_PORT = 8050
+DEFAULT_REFRESH_SECONDS = 15 * 60
+
+
+def _json_body(data):
+    return json.dumps(data, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def build_endpoints(analysis):
+    """
+    JSON documents served under /api/, one per chart or section
+
+    Shapes match the datasets the dashboard charts read (see expandPayload in
+    cdp_dashboard_template.html); 'payload' is the compact form the page loads.
+    """
+    consumption = analysis['consumption']
+    by_date = consumption['by_date'] if consumption['has_data'] else {}
+    return {
+        'payload': compact_payload(analysis),
+        'summary': {
+            key: analysis.get(key)
+            for key in ('total_clusters', 'active_clusters', 'stopped_clusters', 'total_nodes',
+                        'active_nodes', 'total_datalakes', 'running_datalakes', 'cost_estimate', 'cost_source')
+        },
+        'horizons': consumption.get('horizons', {}),
+        'consumption_by_date': dict(sorted(by_date.items())),
+        'cluster_data': dict(sorted(consumption['by_cluster_and_date'].items())),
+        'cluster_usage_hours': {name: data['hours'] for name, data in consumption['by_cluster'].items()},
+        'hourly': dict(sorted(consumption['by_hour_of_day'].items())),
+        'weekly': dict(sorted(consumption['by_day_of_week'].items())),
+        'underutilization': consumption.get('underutilization', []),
+        'recommendations': analysis.get('recommendations', []),
+    }
+
+
+class DashboardState:
+    """Latest rendered page and endpoint bodies with their ETags"""
+
+    def __init__(self, dashboard):
+        self.dashboard = dashboard
+        self.lock = threading.Lock()
+        self.documents = {}
+        self.refreshed_at = None
+
+    def publish(self):
+        """Analyze the collected data once and pre-serialize every document"""
+        dashboard = self.dashboard
+        analysis = dashboard.analyze_data()
+        clusters = dashboard.data.get('datahubs', {}).get('clusters', [])
+        datalakes = dashboard.data.get('datalakes', {}).get('datalakes', [])
+
+        sections = dashboard.render_sections(analysis, clusters, datalakes)
+        sections['dashboard_data'] = endpoint_payload('api/payload')
+        documents = {'/': ('text/html; charset=utf-8', render_dashboard(sections).encode('utf-8'))}
+        for name, data in build_endpoints(analysis).items():
+            documents[f'/api/{name}'] = ('application/json', _json_body(data))
+
+        refreshed_at = datetime.now().isoformat(timespec='seconds')
+        documents['/api/status'] = ('application/json', _json_body({
+            'refreshed_at': refreshed_at,
+            'records': len(dashboard.data.get('consumption', {}).get('records', [])),
+            'endpoints': sorted(documents),
+        }))
+
+        tagged = {
+            path: (content_type, body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"')
+            for path, (content_type, body) in documents.items()
+        }
+        with self.lock:
+            self.documents = tagged
+            self.refreshed_at = refreshed_at
+
+    def get(self, path):
+        with self.lock:
+            return self.documents.get(path)
+
+
+def make_handler(state):
+    class DashboardHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path == '/index.html':
+                path = '/'
+            document = state.get(path)
+            if document is None:
+                self.send_error(404, 'Recurso no encontrado')
+                return
+
+            content_type, body, etag = document
+            if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            # Browsers must revalidate, which the ETag turns into a cheap 304
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return DashboardHandler
+
+
+def refresh_loop(state, interval, stop):
+    """Fetch new consumption records every interval seconds and republish"""
+    while not stop.wait(interval):
+        try:
+            started = time.perf_counter()
+            new_records = state.dashboard.refresh_data()
+            state.publish()
+            print(f"[OK] Datos actualizados ({new_records} registros nuevos) en {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            print(f"[ERROR] No se pudieron actualizar los datos: {e}")
+
+
+def serve(dashboard, host='127.0.0.1', port=DEFAULT_PORT, refresh_seconds=DEFAULT_REFRESH_SECONDS):
+    """Serve the dashboard until interrupted; dashboard must already hold collected data"""
+    state = DashboardState(dashboard)
+    state.publish()
+
+    stop = threading.Event()
+    refresher = threading.Thread(target=refresh_loop, args=(state, refresh_seconds, stop), daemon=True)
+    refresher.start()
+
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    print(f"[OK] Dashboard disponible en http://{host}:{port}/ (actualización cada {refresh_seconds // 60} min)")
+    print("     Pulsa Ctrl+C para detener el servidor")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nDeteniendo servidor...")
+    finally:
+        stop.set()
+        server.server_close()
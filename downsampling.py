@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Time-series downsampling for dashboard charts
+Largest-Triangle-Three-Buckets (LTTB) keeps the points that preserve the shape
+of a series (peaks, drops, trend changes) while capping how many are embedded
+"""
+
+import numpy as np
+
+# Points per series kept in the HTML (about one per 5px of chart width)
+MAX_POINTS = 200
+
+
+def lttb_indices(y, max_points=MAX_POINTS, x=None):
+    """
+    Positions of the points LTTB keeps, always including the first and last
+
+    The series is split into max_points - 2 buckets; in each bucket the point
+    forming the largest triangle with the previously kept point and the average
+    of the next bucket is kept. Series already within max_points are returned whole.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+
+    every = (n - 2) / (max_points - 2)
+    kept = np.empty(max_points, dtype=np.int64)
+    kept[0] = a = 0
+    for i in range(max_points - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(max(int((i + 2) * every) + 1, end + 1), n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    kept[-1] = n - 1
+    return kept
+
+
+def _positions(labels):
+    """X coordinates for sorted labels: day numbers for ISO dates, else positions"""
+    try:
+        return np.array([np.datetime64(label[:10], 'D') for label in labels]).astype(np.int64)
+    except (TypeError, ValueError):
+        return np.arange(len(labels))
+
+
+def downsample_series(series, max_points=MAX_POINTS, key=None):
+    """
+    Downsample a {label: value} series (e.g. {date: GB}) keeping sorted label order
+
+    key selects the measure when values are dicts (e.g. 'total' for daily
+    costs); the whole entry is kept for every selected label.
+    """
+    if len(series) <= max_points:
+        return series
+    labels = sorted(series)
+    values = [series[label][key] if key else series[label] for label in labels]
+    kept = lttb_indices(values, max_points, _positions(labels))
+    return {labels[i]: series[labels[i]] for i in kept.tolist()}
+
+
+def downsample_history(historical_data, max_points=MAX_POINTS):
+    """Downsample the storage, instance and cost series of every period of a GCP history"""
+    return {
+        period: {
+            **data,
+            'storage': downsample_series(data.get('storage', {}), max_points),
+            'instances': downsample_series(data.get('instances', {}), max_points),
+            'costs': downsample_series(data.get('costs', {}), max_points, key='total'),
+        }
+        for period, data in historical_data.items()
+    }
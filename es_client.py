@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Shared Elasticsearch client factory
+Scripts get a lazy client at import time; the elasticsearch package is only
+imported, and the connection only configured, on the first real request
+"""
+
+import os
+from functools import lru_cache
+
+REQUEST_TIMEOUT = 30
+# Setting in config.py -> environment variable used when config.py lacks it
+SETTINGS = (
+    ('ELASTICSEARCH_URL', 'ELASTICSEARCH_URL'),
+    ('USERNAME', 'ELASTICSEARCH_USERNAME'),
+    ('PASSWORD', 'ELASTICSEARCH_PASSWORD'),
+)
+
+
+def _settings():
+    """URL, username and password from config.py, else from the environment"""
+    try:
+        import config
+    except ImportError:
+        config = None
+    values = [getattr(config, name, None) or os.environ.get(env) for name, env in SETTINGS]
+    missing = [f"{name} (o ${env})" for (name, env), value in zip(SETTINGS, values) if not value]
+    if missing:
+        raise RuntimeError(f"Falta configuración de Elasticsearch: {', '.join(missing)}. "
+                           f"Defínela en config.py (ver config.example.py) o en variables de entorno")
+    return values
+
+
+@lru_cache(maxsize=None)
+def get_client():
+    """The process-wide Elasticsearch client, created on first call"""
+    import urllib3
+    from elasticsearch import Elasticsearch
+
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    url, username, password = _settings()
+    return Elasticsearch(
+        [url],
+        basic_auth=(username, password),
+        verify_certs=True,
+        request_timeout=REQUEST_TIMEOUT
+    )
+
+
+class LazyClient:
+    """Stands in for the client: any attribute access builds it through get_client()"""
+
+    def __getattr__(self, name):
+        return getattr(get_client(), name)
+
+
+def lazy_client():
+    """Module-level `es` for scripts: cheap to create, connects on first use"""
+    return LazyClient()
+
+
+def bulk(client, actions, **kwargs):
+    """elasticsearch.helpers.bulk, imported on first use"""
+    from elasticsearch.helpers import bulk as helpers_bulk
+    if isinstance(client, LazyClient):
+        client = get_client()
+    return helpers_bulk(client, actions, **kwargs)
@@ -4,40 +4,65 @@ Create forecasts using Prophet (Facebook's forecasting library)
 Stores predictions back in Elasticsearch for visualization
 """
 
-from elasticsearch import Elasticsearch
-from elasticsearch.helpers import bulk
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta, timezone
-import urllib3
-
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-# Try to import Prophet
-try:
-    from prophet import Prophet
-    PROPHET_AVAILABLE = True
-except ImportError:
-    PROPHET_AVAILABLE = False
+import argparse
+import contextlib
+import hashlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+
+from es_client import bulk, lazy_client
+
+# Prophet takes seconds to import: only check it is installed here, and
+# import it when a model is actually fitted. pandas and NumPy (and
+# batch_forecast, which needs NumPy) are likewise imported by the functions
+# that build or forecast frames, so --help and importers of the constants
+# stay cheap
+PROPHET_AVAILABLE = importlib.util.find_spec('prophet') is not None
+# Warn once, not again from every forecasting worker process
+if not PROPHET_AVAILABLE and multiprocessing.parent_process() is None:
     print("\n[WARNING] Prophet no esta instalado.")
     print("Para instalar: pip install prophet")
     print("Nota: Prophet requiere pystan que puede necesitar compilacion.\n")
 
-es = Elasticsearch(
-    ['https://gea-data-cloud-masorange-es.es.europe-west1.gcp.cloud.es.io'],
-    basic_auth=('infra_admin', 'imdeveloperS'),
-    verify_certs=True,
-    request_timeout=30
-)
+es = lazy_client()
 
-def get_historical_data(cluster_name=None, days=30):
-    """Get historical consumption data"""
+# Upper bound for the clusters returned by the terms aggregation
+MAX_CLUSTERS = 1000
+
+def daily_consumption_query(days=30, cluster_name=None):
+    """Aggregation query: daily credits in total and per cluster, no raw hits"""
 
     to_date = datetime.now(timezone.utc)
     from_date = to_date - timedelta(days=days)
 
+    # Days without records are real zero-consumption days: return them too,
+    # over the whole queried range
+    daily = {
+        "date_histogram": {
+            "field": "@timestamp",
+            "calendar_interval": "1d",
+            "min_doc_count": 0,
+            "extended_bounds": {
+                "min": int(from_date.timestamp() * 1000),
+                "max": int(to_date.timestamp() * 1000)
+            }
+        },
+        "aggs": {
+            "credits": {"sum": {"field": "credits"}}
+        }
+    }
+
     query = {
-        "size": 10000,
+        "size": 0,
         "query": {
             "range": {
                 "@timestamp": {
@@ -46,7 +71,13 @@ def get_historical_data(cluster_name=None, days=30):
                 }
             }
         },
-        "sort": [{"@timestamp": "asc"}]
+        "aggs": {
+            "daily": daily,
+            "by_cluster": {
+                "terms": {"field": "cluster_name", "size": MAX_CLUSTERS},
+                "aggs": {"daily": daily}
+            }
+        }
     }
 
     # Add cluster filter if specified
@@ -59,139 +90,486 @@ def get_historical_data(cluster_name=None, days=30):
                 ]
             }
         }
+        del query["aggs"]["by_cluster"]
 
-    result = es.search(index="cdp-consumption-records-*", body=query)
+    return query
 
-    # Convert to DataFrame
-    data = []
-    for hit in result['hits']['hits']:
-        source = hit['_source']
-        data.append({
-            'ds': pd.to_datetime(source['@timestamp']),
-            'y': source.get('credits', 0),
-            'cluster_name': source.get('cluster_name', 'Unknown')
-        })
+def daily_frame(histogram, cluster_name):
+    """
+    DataFrame (ds, y, cluster_name) from date_histogram buckets
+
+    Empty days are kept as zeros, except those before the first day with
+    consumption: the cluster did not exist yet.
+    """
+    import pandas as pd
+
+    credits = [b['credits']['value'] or 0.0 for b in histogram['buckets']]
+    first = next((i for i, value in enumerate(credits) if value > 0), None)
+    if first is None:
+        return pd.DataFrame()
+    return pd.DataFrame({
+        'ds': pd.to_datetime([b['key'] for b in histogram['buckets'][first:]], unit='ms'),
+        'y': credits[first:],
+        'cluster_name': cluster_name
+    })
+
+def get_daily_history(days=30):
+    """
+    Daily credits for the total and every cluster in a single request
+
+    Elasticsearch aggregates all records server-side (date_histogram with a
+    terms sub-aggregation), so the history is complete regardless of the
+    number of records. Returns (total DataFrame, {cluster: DataFrame}).
+    """
+    result = es.search(index="cdp-consumption-records-*", body=daily_consumption_query(days))
+    aggs = result['aggregations']
+
+    clusters = {
+        bucket['key']: daily_frame(bucket['daily'], bucket['key'])
+        for bucket in aggs['by_cluster']['buckets']
+    }
+    return daily_frame(aggs['daily'], 'Total'), clusters
+
+def get_historical_data(cluster_name=None, days=30):
+    """Get daily historical consumption (total or one cluster)"""
+
+    result = es.search(index="cdp-consumption-records-*", body=daily_consumption_query(days, cluster_name))
+    return daily_frame(result['aggregations']['daily'], cluster_name or 'Total')
+
+# Composite aggregation page size for the hourly history
+HOURLY_PAGE_SIZE = 10000
+
+def hourly_consumption_query(days=30, after=None):
+    """Composite aggregation query: hourly credits per cluster, one page"""
+
+    to_date = datetime.now(timezone.utc)
+    from_date = to_date - timedelta(days=days)
+
+    composite = {
+        "size": HOURLY_PAGE_SIZE,
+        "sources": [
+            {"cluster": {"terms": {"field": "cluster_name"}}},
+            {"hour": {"date_histogram": {"field": "@timestamp", "fixed_interval": "1h"}}}
+        ]
+    }
+    if after:
+        composite["after"] = after
 
-    df = pd.DataFrame(data)
+    return {
+        "size": 0,
+        "query": {
+            "range": {
+                "@timestamp": {
+                    "gte": from_date.isoformat(),
+                    "lte": to_date.isoformat()
+                }
+            }
+        },
+        "aggs": {
+            "hourly": {
+                "composite": composite,
+                "aggs": {
+                    "credits": {"sum": {"field": "credits"}}
+                }
+            }
+        }
+    }
 
-    # Aggregate by day
-    if not df.empty:
-        df_daily = df.groupby(df['ds'].dt.date).agg({
-            'y': 'sum',
-            'cluster_name': 'first'
-        }).reset_index()
-        df_daily['ds'] = pd.to_datetime(df_daily['ds'])
-        return df_daily
-    return pd.DataFrame()
+def get_hourly_history(days=30):
+    """
+    Hourly credits for the total and every cluster
+
+    A year is 8,760 hours per cluster, beyond what a single terms/date_histogram
+    response may hold, so the hourly buckets are paged with a composite
+    aggregation. Returns (total DataFrame, {cluster: DataFrame}).
+    """
+    import pandas as pd
+
+    clusters, hours, credits = [], [], []
+    after = None
+    while True:
+        result = es.search(index="cdp-consumption-records-*", body=hourly_consumption_query(days, after))
+        hourly = result['aggregations']['hourly']
+        for bucket in hourly['buckets']:
+            clusters.append(bucket['key']['cluster'])
+            hours.append(bucket['key']['hour'])
+            credits.append(bucket['credits']['value'])
+        after = hourly.get('after_key')
+        if not hourly['buckets'] or not after:
+            break
+
+    if not hours:
+        return pd.DataFrame(), {}
+    frame = pd.DataFrame({'ds': pd.to_datetime(hours, unit='ms'), 'y': credits, 'cluster_name': clusters})
+    # Composite buckets only exist for hours with records: fill the others
+    # with zero, from each series' first hour to the last hour queried
+    end = frame['ds'].max()
+
+    def filled(df, name):
+        hourly_range = pd.date_range(df['ds'].min(), end, freq='h')
+        y = df.groupby('ds')['y'].sum().reindex(hourly_range, fill_value=0.0)
+        return pd.DataFrame({'ds': hourly_range, 'y': y.to_numpy(), 'cluster_name': name})
+
+    return filled(frame, 'Total'), {
+        name: filled(group, name)
+        for name, group in frame.groupby('cluster_name', sort=False)
+    }
+
+def batch_forecast_frames(series, periods=7, hourly=False):
+    """
+    Forecast {name: DataFrame} with the vectorized batch forecaster
+
+    All series are aligned on one daily (or hourly) index and fitted together:
+    trend plus weekly seasonality, and daily seasonality too for hourly data
+    (see batch_forecast.py). periods counts steps of the series. Series with
+    too little history get an empty DataFrame.
+    """
+    import numpy as np
+    import pandas as pd
+    from batch_forecast import HARMONICS, HOURLY_HARMONICS, HOURLY_SEASON_PERIODS, SEASON_PERIODS, batch_forecast
+
+    step = pd.Timedelta(hours=1) if hourly else pd.Timedelta(days=1)
+    names = [name for name, df in series.items() if not df.empty]
+    if not names:
+        return {name: pd.DataFrame() for name in series}
+
+    start = min(series[name]['ds'].min() for name in names)
+    end = max(series[name]['ds'].max() for name in names)
+    y = np.full((len(names), (end - start) // step + 1), np.nan)
+    for row, name in enumerate(names):
+        df = series[name]
+        y[row, ((df['ds'] - start) // step).to_numpy()] = df['y'].to_numpy()
+
+    if hourly:
+        result = batch_forecast(y, periods, HOURLY_SEASON_PERIODS, HOURLY_HARMONICS)
+    else:
+        result = batch_forecast(y, periods, SEASON_PERIODS, HARMONICS)
+    forecasts = {name: pd.DataFrame() for name in series}
+    for row, name in enumerate(names):
+        if np.isnan(result['yhat'][row, 0]):
+            continue
+        forecasts[name] = pd.DataFrame({
+            'ds': start + (result['last'][row] + 1 + np.arange(periods)) * step,
+            'yhat': result['yhat'][row],
+            'yhat_lower': result['lower'][row],
+            'yhat_upper': result['upper'][row]
+        })
+    return forecasts
 
 def create_simple_forecast(df, periods=7):
-    """Create simple forecast using linear regression"""
+    """Create simple forecast: trend plus weekly seasonality by least squares"""
 
-    if df.empty or len(df) < 7:
+    forecast = batch_forecast_frames({None: df}, periods)[None]
+    if forecast.empty:
         print("[WARNING] No hay suficientes datos para crear prediccion")
-        return pd.DataFrame()
+    return forecast
 
-    # Prepare data
-    df = df.copy()
-    df['ds_numeric'] = (df['ds'] - df['ds'].min()).dt.days
+# Fitted Prophet models, one JSON file per series
+MODEL_DIR = Path(__file__).with_name('forecast_models')
 
-    # Simple linear regression
-    from numpy.polynomial import Polynomial
+def training_window_hash(df):
+    """Digest of the training days and values; unchanged when no new data arrived"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(df['ds'].to_numpy(dtype='datetime64[s]').tobytes())
+    digest.update(df['y'].to_numpy(dtype='float64').tobytes())
+    return digest.hexdigest()
 
-    p = Polynomial.fit(df['ds_numeric'], df['y'], 1)
+def model_path(cluster_name, model_dir=MODEL_DIR):
+    return Path(model_dir) / (re.sub(r'[^A-Za-z0-9_.-]', '_', cluster_name or 'Total') + '.json')
 
-    # Create future dates
-    last_date = df['ds'].max()
-    future_dates = pd.date_range(
-        start=last_date + timedelta(days=1),
-        periods=periods,
-        freq='D'
+def load_model(path):
+    """(training window hash, Prophet model) saved at path, or (None, None)"""
+    from prophet.serialize import model_from_json
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        return saved['window'], model_from_json(saved['model'])
+    except (OSError, ValueError, KeyError) as e:
+        if Path(path).exists():
+            print(f"[WARNING] Modelo guardado ignorado ({path}): {e}")
+        return None, None
+
+def save_model(path, model, window):
+    from prophet.serialize import model_to_json
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'window': window, 'model': model_to_json(model)}, f)
+
+def stan_init(model):
+    """Fitted parameters of a model, as initial values for the next fit (warm start)"""
+    params = {name: model.params[name][0][0] for name in ('k', 'm', 'sigma_obs')}
+    params.update({name: model.params[name][0] for name in ('delta', 'beta')})
+    return params
+
+def new_prophet_model():
+    from prophet import Prophet
+
+    return Prophet(
+        daily_seasonality=True,
+        weekly_seasonality=True,
+        yearly_seasonality=False,
+        interval_width=0.95
     )
 
-    future_df = pd.DataFrame({'ds': future_dates})
-    future_df['ds_numeric'] = (future_df['ds'] - df['ds'].min()).dt.days
+def fit_prophet(df, model_file=None):
+    """
+    Fitted Prophet model for df, reusing the one saved in model_file
+
+    A saved model trained on exactly the same window is reused as is;
+    otherwise the new fit is warm-started from its parameters, which makes
+    the Stan optimization converge in a few iterations.
+    """
+    window = training_window_hash(df)
+    saved_window, saved = load_model(model_file) if model_file else (None, None)
+    if saved is not None and saved_window == window:
+        print("[INFO] Modelo sin cambios reutilizado")
+        return saved
+
+    model = new_prophet_model()
+    if saved is not None:
+        try:
+            model.fit(df, init=stan_init(saved))
+        except Exception as e:
+            print(f"[WARNING] Arranque en caliente fallido ({e}), ajustando desde cero")
+            model = new_prophet_model().fit(df)
+    else:
+        model.fit(df)
+
+    if model_file:
+        save_model(model_file, model, window)
+    return model
+
+def prophet_forecast(df, periods=7, model_file=None):
+    """Prophet forecast of the periods after df; raises on any Prophet error (no fallback)"""
+
+    model = fit_prophet(df[['ds', 'y']], model_file)
+
+    # Create future dataframe
+    future = model.make_future_dataframe(periods=periods)
 
     # Predict
-    future_df['yhat'] = p(future_df['ds_numeric'])
-    future_df['yhat_lower'] = future_df['yhat'] * 0.9  # 10% lower bound
-    future_df['yhat_upper'] = future_df['yhat'] * 1.1  # 10% upper bound
+    forecast = model.predict(future)
+
+    # Return only future predictions
+    return forecast[forecast['ds'] > df['ds'].max()][
+        ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+    ]
 
-    return future_df[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+def forecast_with_prophet(df, periods=7, model_file=None):
+    """Create forecast using Prophet
 
-def forecast_with_prophet(df, periods=7):
-    """Create forecast using Prophet"""
+    With model_file the fitted model is persisted and reused or warm-started
+    on the next run (see fit_prophet). Falls back to the batch forecaster
+    when Prophet is not installed or fails.
+    """
 
     if not PROPHET_AVAILABLE:
-        print("[INFO] Usando prediccion simple (linear regression)")
+        print("[INFO] Usando prediccion simple (tendencia + estacionalidad semanal)")
         return create_simple_forecast(df, periods)
 
     if df.empty or len(df) < 7:
+        import pandas as pd
+
         print("[WARNING] No hay suficientes datos")
         return pd.DataFrame()
 
     try:
-        # Create and fit model
-        model = Prophet(
-            daily_seasonality=True,
-            weekly_seasonality=True,
-            yearly_seasonality=False,
-            interval_width=0.95
-        )
-
-        model.fit(df)
-
-        # Create future dataframe
-        future = model.make_future_dataframe(periods=periods)
-
-        # Predict
-        forecast = model.predict(future)
-
-        # Return only future predictions
-        return forecast[forecast['ds'] > df['ds'].max()][
-            ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
-        ]
+        return prophet_forecast(df, periods, model_file)
 
     except Exception as e:
         print(f"[WARNING] Error con Prophet: {e}")
         print("[INFO] Usando prediccion simple")
         return create_simple_forecast(df, periods)
 
-def save_forecast_to_es(forecast_df, cluster_name=None):
-    """Save forecast to Elasticsearch"""
-
-    if forecast_df.empty:
-        return
-
-    index_name = f"cdp-consumption-forecast-{datetime.now(timezone.utc).strftime('%Y.%m.%d')}"
-
-    docs = []
-    for _, row in forecast_df.iterrows():
-        doc = {
+# Current forecast per interval: an alias over a single index that every run overwrites
+FORECAST_ALIASES = {'1d': 'cdp-consumption-forecast', '1h': 'cdp-hourly-forecast'}
+# Previous forecasts, one summary document per cluster and run (outside the
+# cdp-consumption-forecast-* pattern, so Kibana panels never count them)
+ARCHIVE_INDEX = 'cdp-forecast-archive'
+# Daily indices written before the alias existed
+LEGACY_FORECAST_INDICES = 'cdp-consumption-forecast-20*'
+
+def forecast_docs(forecasts, index_name, created, interval='1d'):
+    """
+    Bulk actions for {cluster_name or None: forecast DataFrame}, built column-wise
+
+    Document IDs are cluster|forecast_date, so writing a forecast for the same
+    cluster and date again overwrites the previous document.
+    """
+    frames = [df.assign(cluster_name=name or 'Total') for name, df in forecasts.items() if not df.empty]
+    if not frames:
+        return []
+    import pandas as pd
+
+    frame = pd.concat(frames, ignore_index=True)
+    dates = frame['ds'].dt.strftime('%Y-%m-%dT%H:%M:%S').tolist()
+
+    return [
+        {
             '_index': index_name,
+            '_id': f"{cluster}|{date}",
             '_source': {
-                '@timestamp': row['ds'].isoformat(),
-                'forecast_date': row['ds'].isoformat(),
-                'predicted_credits': float(row['yhat']),
-                'predicted_credits_lower': float(row['yhat_lower']),
-                'predicted_credits_upper': float(row['yhat_upper']),
-                'cluster_name': cluster_name if cluster_name else 'Total',
-                'forecast_created': datetime.now(timezone.utc).isoformat(),
+                '@timestamp': date,
+                'forecast_date': date,
+                'predicted_credits': yhat,
+                'predicted_credits_lower': lower,
+                'predicted_credits_upper': upper,
+                'cluster_name': cluster,
+                'forecast_created': created,
+                'interval': interval,
                 'is_forecast': True
             }
         }
-        docs.append(doc)
+        for cluster, date, yhat, lower, upper in zip(
+            frame['cluster_name'].tolist(), dates, frame['yhat'].astype(float).tolist(),
+            frame['yhat_lower'].astype(float).tolist(), frame['yhat_upper'].astype(float).tolist())
+    ]
+
+def ensure_forecast_alias(alias):
+    """Create the alias and its backing index on first use"""
+    if not es.indices.exists_alias(name=alias):
+        es.indices.create(index=f"{alias}-000001", body={"aliases": {alias: {"is_write_index": True}}})
+        print(f"[OK] Indice {alias}-000001 creado con alias {alias}")
+
+def archive_forecasts(index):
+    """
+    Summarize the forecasts stored in index into ARCHIVE_INDEX
+
+    Each run of each cluster becomes one document with the predicted totals and
+    the forecast range. Returns the number of archived runs and the failed
+    archive writes.
+    """
+    if not es.indices.exists(index=ARCHIVE_INDEX):
+        es.indices.create(index=ARCHIVE_INDEX, body={"mappings": {"properties": {
+            "cluster_name": {"type": "keyword"},
+            "interval": {"type": "keyword"},
+            "forecast_created": {"type": "date"},
+            "forecast_from": {"type": "date"},
+            "forecast_to": {"type": "date"},
+            "points": {"type": "integer"},
+            "predicted_credits": {"type": "float"},
+            "predicted_credits_lower": {"type": "float"},
+            "predicted_credits_upper": {"type": "float"}
+        }}})
 
+    docs = []
+    after = None
+    while True:
+        composite = {
+            "size": 1000,
+            "sources": [
+                {"cluster": {"terms": {"field": "cluster_name"}}},
+                {"created": {"terms": {"field": "forecast_created"}}},
+                {"interval": {"terms": {"field": "interval", "missing_bucket": True}}}
+            ]
+        }
+        if after:
+            composite["after"] = after
+        result = es.search(index=index, body={
+            "size": 0,
+            "aggs": {
+                "runs": {
+                    "composite": composite,
+                    "aggs": {
+                        "predicted": {"sum": {"field": "predicted_credits"}},
+                        "lower": {"sum": {"field": "predicted_credits_lower"}},
+                        "upper": {"sum": {"field": "predicted_credits_upper"}},
+                        "from": {"min": {"field": "forecast_date"}},
+                        "to": {"max": {"field": "forecast_date"}}
+                    }
+                }
+            }
+        })
+        runs = result['aggregations']['runs']
+        for bucket in runs['buckets']:
+            key = bucket['key']
+            interval = key['interval'] or '1d'
+            docs.append({
+                '_index': ARCHIVE_INDEX,
+                '_id': f"{interval}|{key['cluster']}|{key['created']}",
+                '_source': {
+                    'cluster_name': key['cluster'],
+                    'interval': interval,
+                    'forecast_created': key['created'],
+                    'forecast_from': bucket['from']['value'],
+                    'forecast_to': bucket['to']['value'],
+                    'points': bucket['doc_count'],
+                    'predicted_credits': bucket['predicted']['value'],
+                    'predicted_credits_lower': bucket['lower']['value'],
+                    'predicted_credits_upper': bucket['upper']['value']
+                }
+            })
+        after = runs.get('after_key')
+        if not runs['buckets'] or not after:
+            break
+
+    failed = []
     if docs:
-        success, failed = bulk(es, docs, raise_on_error=False)
-        print(f"[OK] {success} predicciones guardadas en {index_name}")
-        if failed:
-            print(f"[WARNING] {len(failed)} documentos fallaron")
+        _, failed = bulk(es, docs, raise_on_error=False)
+    return len(docs) - len(failed), failed
+
+def migrate_legacy_forecasts():
+    """Archive and delete the daily forecast indices of previous versions"""
+    indices = [idx['index'] for idx in es.cat.indices(index=LEGACY_FORECAST_INDICES, format="json")]
+    if not indices:
+        return
+    archived, failed = archive_forecasts(LEGACY_FORECAST_INDICES)
+    if failed:
+        print(f"[WARNING] {len(failed)} ejecuciones no se pudieron archivar; "
+              f"se conservan los indices de forecast antiguos")
+        return
+    for index_name in indices:
+        es.indices.delete(index=index_name)
+    print(f"[OK] {len(indices)} indices de forecast antiguos eliminados ({archived} ejecuciones archivadas)")
+
+def save_forecasts_to_es(forecasts, interval='1d'):
+    """
+    Replace the current forecast for interval with forecasts
+
+    The previous forecast is summarized into the archive, the new documents
+    overwrite it in one bulk request (same cluster|date IDs) and whatever
+    the new run did not rewrite is deleted. If archiving fails the previous
+    forecast is left untouched; if some new documents fail, nothing is
+    deleted, so the previous values remain for the dates they missed.
+    """
+
+    alias = FORECAST_ALIASES[interval]
+    created = datetime.now(timezone.utc).isoformat()
+    docs = forecast_docs(forecasts, alias, created, interval)
+    if not docs:
+        return
+
+    ensure_forecast_alias(alias)
+    archived, failed = archive_forecasts(alias)
+    if failed:
+        print(f"[WARNING] {len(failed)} ejecuciones no se pudieron archivar; "
+              f"se conserva la prediccion anterior en {alias}")
+        return
+
+    success, failed = bulk(es, docs, raise_on_error=False)
+    if failed:
+        print(f"[WARNING] {success} predicciones guardadas en {alias}, {len(failed)} documentos fallaron; "
+              f"se conservan las predicciones anteriores ({archived} ejecuciones archivadas)")
+        return
+    es.indices.refresh(index=alias)
+    deleted = es.delete_by_query(index=alias, conflicts='proceed', body={
+        "query": {"range": {"forecast_created": {"lt": created}}}
+    })
+    print(f"[OK] {success} predicciones guardadas en {alias} "
+          f"({deleted.get('deleted', 0)} obsoletas eliminadas, {archived} ejecuciones archivadas)")
+
+def save_forecast_to_es(forecast_df, cluster_name=None):
+    """Save forecast to Elasticsearch"""
+
+    save_forecasts_to_es({cluster_name: forecast_df})
 
 def create_forecast_index_template():
     """Create index template for forecast data"""
 
     template = {
-        "index_patterns": ["cdp-consumption-forecast-*"],
+        "index_patterns": ["cdp-consumption-forecast-*", "cdp-hourly-forecast-*"],
         "template": {
             "settings": {
                 "number_of_shards": 1,
@@ -206,6 +584,7 @@ def create_forecast_index_template():
                     "predicted_credits_upper": {"type": "float"},
                     "cluster_name": {"type": "keyword"},
                     "forecast_created": {"type": "date"},
+                    "interval": {"type": "keyword"},
                     "is_forecast": {"type": "boolean"}
                 }
             }
@@ -228,63 +607,178 @@ def create_forecast_index_template():
     except Exception as e:
         print(f"[WARNING] Error creando template: {e}")
 
+# Clusters with consumption in the last ACTIVE_DAYS days are forecast
+ACTIVE_DAYS = 3
+# Seconds each model fit may take before its result is abandoned
+FIT_TIMEOUT = 300
+
+def active_clusters(cluster_history, active_days=ACTIVE_DAYS):
+    """Clusters with enough history and consumption in the last active_days days"""
+    import pandas as pd
+
+    cutoff = pd.Timestamp(datetime.now(timezone.utc).date()) - timedelta(days=active_days)
+    return sorted(
+        cluster for cluster, df in cluster_history.items()
+        if len(df) >= 7 and (df.loc[df['ds'] >= cutoff, 'y'] > 0).any()
+    )
+
+def fit_forecast(cluster_name, df, periods, model_dir=None):
+    """Forecasting process worker: (cluster_name, forecast, seconds, error)"""
+
+    started = time.perf_counter()
+    try:
+        # Per-model messages would interleave between workers
+        with contextlib.redirect_stdout(io.StringIO()):
+            model_file = model_path(cluster_name, model_dir) if model_dir else None
+            forecast = forecast_with_prophet(df, periods=periods, model_file=model_file)
+        return cluster_name, forecast, time.perf_counter() - started, None
+    except Exception as e:
+        import pandas as pd
+
+        return cluster_name, pd.DataFrame(), time.perf_counter() - started, str(e)
+
+def fit_process(conn, cluster_name, df, periods, model_dir):
+    """Child process body: send fit_forecast's result back through conn"""
+    conn.send(fit_forecast(cluster_name, df, periods, model_dir))
+    conn.close()
+
+def report_forecast(name, forecast, seconds):
+    label = name or 'Total'
+    if forecast.empty:
+        print(f"   [WARNING] {label}: datos insuficientes")
+    else:
+        print(f"   {label:30s} {forecast['yhat'].sum():12.2f} creditos ({seconds:.1f}s)")
+
+def forecast_all(series, periods=7, workers=None, timeout=FIT_TIMEOUT, engine='auto', model_dir=MODEL_DIR,
+                 hourly=False):
+    """
+    Fit one model per series
+
+    series maps a cluster name (None for the total) to its daily history.
+    The 'batch' engine (used by 'auto' when Prophet is not installed, and
+    always for hourly series) fits all series together in one vectorized call. With 'prophet' each fit runs
+    isolated in its own process, at most workers at a time: a failing model
+    only loses its own forecast, and a fit still running timeout seconds after
+    it started is killed. Prophet models are persisted in model_dir (None to
+    always fit from scratch).
+    """
+    if hourly or engine == 'batch' or (engine == 'auto' and not PROPHET_AVAILABLE):
+        started = time.perf_counter()
+        forecasts = batch_forecast_frames(series, periods, hourly)
+        seconds = time.perf_counter() - started
+        for name, forecast in forecasts.items():
+            report_forecast(name, forecast, seconds)
+        return {name: forecast for name, forecast in forecasts.items() if not forecast.empty}
+
+    workers = workers or min(len(series), os.cpu_count() or 1)
+    queue = list(series.items())
+    running = {}
+    forecasts = {}
+
+    while queue or running:
+        while queue and len(running) < workers:
+            name, df = queue.pop(0)
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=fit_process, args=(sender, name, df, periods, model_dir),
+                                              daemon=True)
+            process.start()
+            sender.close()
+            running[receiver] = (name, process, time.monotonic() + timeout)
+
+        next_deadline = min(deadline for _, _, deadline in running.values())
+        ready = multiprocessing.connection.wait(list(running), timeout=max(0, next_deadline - time.monotonic()))
+        for receiver in list(running):
+            name, process, deadline = running[receiver]
+            label = name or 'Total'
+            if receiver in ready:
+                try:
+                    _, forecast, seconds, error = receiver.recv()
+                except EOFError:
+                    process.join()
+                    forecast, error = None, f"el proceso termino sin resultado (codigo {process.exitcode})"
+            elif time.monotonic() >= deadline:
+                process.terminate()
+                forecast, error = None, 'tiempo limite superado'
+            else:
+                continue
+            del running[receiver]
+            receiver.close()
+            process.join()
+            if error:
+                print(f"   [WARNING] {label}: {error}")
+                continue
+            report_forecast(name, forecast, seconds)
+            if not forecast.empty:
+                forecasts[name] = forecast
+
+    return forecasts
+
 def main():
+    parser = argparse.ArgumentParser(description='Prediccion de consumo CDP por cluster')
+    parser.add_argument('--days', type=int, default=30, help='Dias de historico para entrenar')
+    parser.add_argument('--periods', type=int, default=7, help='Dias a predecir')
+    parser.add_argument('--workers', type=int, help='Procesos en paralelo (por defecto, uno por CPU)')
+    parser.add_argument('--timeout', type=int, default=FIT_TIMEOUT, help='Segundos maximos por modelo')
+    parser.add_argument('--engine', choices=('auto', 'prophet', 'batch'), default='auto',
+                        help='prophet, batch (tendencia + estacionalidad semanal con NumPy, todos los clusters a la vez) '
+                             'o auto (prophet si esta instalado)')
+    parser.add_argument('--refit', action='store_true',
+                        help='Descartar los modelos Prophet guardados y ajustarlos desde cero')
+    parser.add_argument('--hourly', action='store_true',
+                        help='Prediccion horaria (estacionalidad diaria y semanal, motor batch) '
+                             'para planificar ventanas de parada')
+    args = parser.parse_args()
+
     print("=" * 70)
     print("Prediccion de Consumo CDP con Machine Learning")
     print("=" * 70)
 
     if not PROPHET_AVAILABLE:
-        print("\n[INFO] Prophet no disponible, usando regresion lineal simple")
+        print("\n[INFO] Prophet no disponible, usando prediccion por lotes (tendencia + estacionalidad semanal)")
         print("       Para mejores resultados, instala Prophet:")
         print("       pip install prophet\n")
 
+    if args.refit and MODEL_DIR.exists():
+        shutil.rmtree(MODEL_DIR)
+
     # Create template
     print("\n1. Creando template para indices de forecast...")
     create_forecast_index_template()
+    migrate_legacy_forecasts()
+
+    if args.hourly:
+        print("\n2. Obteniendo datos historicos por hora (total y por cluster)...")
+        df_total, cluster_history = get_hourly_history(days=args.days)
+    else:
+        print("\n2. Obteniendo datos historicos diarios (total y por cluster)...")
+        df_total, cluster_history = get_daily_history(days=args.days)
+    clusters = active_clusters(cluster_history)
+    unit = 'Horas' if args.hourly else 'Dias'
+    print(f"   {unit} obtenidos: {len(df_total)} ({len(clusters)} clusters activos de {len(cluster_history)})")
+
+    series = {None: df_total} if not df_total.empty else {}
+    series.update({cluster: cluster_history[cluster] for cluster in clusters})
+    if not series:
+        print("[WARNING] No hay datos historicos")
+        return
 
-    # Forecast total consumption
-    print("\n2. Obteniendo datos historicos (total)...")
-    df_total = get_historical_data()
-    print(f"   Registros obtenidos: {len(df_total)}")
-
-    if not df_total.empty:
-        print("\n3. Creando prediccion para los proximos 7 dias (total)...")
-        forecast_total = forecast_with_prophet(df_total, periods=7)
-
-        if not forecast_total.empty:
-            print(f"   Prediccion creada: {len(forecast_total)} dias")
-            print("\n   Predicciones:")
-            for _, row in forecast_total.iterrows():
-                print(f"     {row['ds'].strftime('%Y-%m-%d')}: "
-                      f"{row['yhat']:.2f} creditos "
-                      f"({row['yhat_lower']:.2f} - {row['yhat_upper']:.2f})")
-
-            print("\n4. Guardando predicciones en Elasticsearch...")
-            save_forecast_to_es(forecast_total)
-
-    # Forecast by cluster
-    clusters = ["gea-cem-prod", "gcp-prod-datahub"]
-
-    for cluster in clusters:
-        print(f"\n5. Prediccion para {cluster}...")
-        df_cluster = get_historical_data(cluster_name=cluster)
-
-        if not df_cluster.empty:
-            forecast_cluster = forecast_with_prophet(df_cluster, periods=7)
-
-            if not forecast_cluster.empty:
-                print(f"   Proximos 7 dias para {cluster}:")
-                total_predicted = forecast_cluster['yhat'].sum()
-                print(f"   Total predicho: {total_predicted:.2f} creditos")
+    interval = '1h' if args.hourly else '1d'
+    periods = args.periods * 24 if args.hourly else args.periods
+    print(f"\n3. Creando predicciones para los proximos {periods} {unit.lower()} ({len(series)} modelos)...")
+    started = time.perf_counter()
+    forecasts = forecast_all(series, periods=periods, workers=args.workers,
+                             timeout=args.timeout, engine=args.engine, hourly=args.hourly)
+    print(f"   {len(forecasts)} de {len(series)} predicciones en {time.perf_counter() - started:.1f}s")
 
-                save_forecast_to_es(forecast_cluster, cluster_name=cluster)
+    print("\n4. Guardando predicciones en Elasticsearch...")
+    save_forecasts_to_es(forecasts, interval=interval)
 
     print("\n" + "=" * 70)
     print("Predicciones completadas!")
     print("=" * 70)
     print("\nPROXIMOS PASOS:")
     print("1. Ve a Kibana -> Discover")
-    print("2. Crea un Data View para 'cdp-consumption-forecast-*'")
+    print(f"2. Crea un Data View para '{FORECAST_ALIASES[interval]}'")
     print("3. Crea visualizaciones combinando datos historicos + forecast")
     print("\nLos datos de forecast tienen el campo 'is_forecast: true'")
     print("para distinguirlos de los datos reales.")
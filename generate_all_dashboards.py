@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Generar TODOS los dashboards (CDP y GCP) en un único proceso
+Cada fuente de datos se consulta una sola vez y los datos recopilados se
+comparten en memoria entre todas las variantes de dashboard
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+from dashboard_payload import PAYLOAD_MODES
+
+# Proyectos del dashboard multi-proyecto
+PROJECT_IDS = ['mo-cloudera-dev', 'mo-cloudera-prod']
+
+
+def collect_gcp_data(project_ids):
+    """
+    Recopilar datos actuales e históricos de cada proyecto una sola vez
+
+    El proyecto por defecto (autodetectado por GCPClient) se añade si no está
+    en la lista. Devuelve (projects_data, proyecto por defecto).
+    """
+    from gcp_integration import GCPClient
+    from generate_gcp_dashboard_multiproject import collect_current_data, collect_historical_data
+
+    default_client = GCPClient()
+    clients = {default_client.project_id: default_client}
+    for project_id in project_ids:
+        if project_id not in clients:
+            clients[project_id] = GCPClient(project_id=project_id)
+
+    projects_data = {}
+    for project_id, client in clients.items():
+        try:
+            projects_data[project_id] = {
+                'current': collect_current_data(client),
+                'historical': collect_historical_data(client),
+            }
+        except Exception as e:
+            print(f"[ERROR] No se pudo procesar {project_id}: {e}")
+
+    return projects_data, default_client.project_id
+
+
+def render_gcp_dashboards(projects_data, default_project, project_ids, stamp, self_contained=False):
+    """Generar las cuatro variantes de dashboard GCP a partir de los mismos datos"""
+    import generate_gcp_dashboard
+    import generate_gcp_dashboard_combined
+    import generate_gcp_dashboard_historical
+    import generate_gcp_dashboard_multiproject
+    from asset_cache import build_self_contained
+    from section_cache import SectionCache
+
+    outputs = []
+    default = projects_data.get(default_project)
+    multiproject = {project_id: projects_data[project_id] for project_id in project_ids if project_id in projects_data}
+    section_cache = SectionCache(generate_gcp_dashboard_multiproject.SECTION_CACHE_FILE,
+                                 sources=generate_gcp_dashboard_multiproject.SECTION_SOURCES)
+
+    variants = []
+    if default:
+        variants += [
+            (f"gcp_dashboard_{stamp}.html",
+             lambda: generate_gcp_dashboard.generate_html_dashboard(default['current'])),
+            (f"gcp_dashboard_historical_{stamp}.html",
+             lambda: generate_gcp_dashboard_historical.generate_html_dashboard_with_history(default['current'], default['historical'])),
+            (f"gcp_dashboard_complete_{stamp}.html",
+             lambda: generate_gcp_dashboard_combined.generate_combined_html_dashboard(default['current'], default['historical'])),
+        ]
+    if multiproject:
+        variants.append((f"gcp_dashboard_multiproject_{stamp}.html",
+                         lambda: generate_gcp_dashboard_multiproject.generate_multiproject_html_dashboard(multiproject, section_cache)))
+
+    for output_file, render in variants:
+        try:
+            html = render()
+        except Exception as e:
+            print(f"[ERROR] No se pudo generar {output_file}: {e}")
+            continue
+        if self_contained:
+            html = build_self_contained(html)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(html)
+        print(f"[OK] Dashboard generado: {output_file}")
+        outputs.append(output_file)
+
+    section_cache.save()
+    return outputs
+
+
+def render_cdp_dashboard(days, payload_mode, self_contained=False):
+    """Recopilar datos de CDP una vez y generar cdp_dashboard.html y el cubo de consumo"""
+    from cdp_dashboard import CDPDashboard
+
+    dashboard = CDPDashboard()
+    dashboard.collect_data(days=days)
+    output_file = dashboard.generate_html(payload_mode=payload_mode, self_contained=self_contained)
+    dashboard.save_cube()
+    return [output_file]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generar todos los dashboards CDP y GCP en un único proceso')
+    parser.add_argument('--projects', nargs='+', default=PROJECT_IDS,
+                        help='Proyectos GCP del dashboard multi-proyecto')
+    parser.add_argument('--days', type=int, default=30, help='Días de consumo CDP a recopilar')
+    parser.add_argument('--payload', choices=PAYLOAD_MODES, default='gzip',
+                        help='Formato de los datos de las gráficas del dashboard CDP')
+    parser.add_argument('--self-contained', action='store_true',
+                        help='Generar HTML minificados con las librerías de gráficos embebidas (sin CDN)')
+    parser.add_argument('--skip-cdp', action='store_true', help='No generar el dashboard CDP')
+    parser.add_argument('--skip-gcp', action='store_true', help='No generar los dashboards GCP')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("GENERACIÓN DE TODOS LOS DASHBOARDS")
+    print("=" * 80)
+    print()
+
+    started = time.perf_counter()
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    outputs = []
+
+    if not args.skip_cdp:
+        try:
+            outputs += render_cdp_dashboard(args.days, args.payload, args.self_contained)
+        except Exception as e:
+            print(f"[ERROR] Dashboard CDP: {e}")
+
+    if not args.skip_gcp:
+        try:
+            projects_data, default_project = collect_gcp_data(args.projects)
+            outputs += render_gcp_dashboards(projects_data, default_project, args.projects, stamp, args.self_contained)
+        except Exception as e:
+            print(f"[ERROR] Dashboards GCP: {e}")
+
+    print()
+    print("=" * 80)
+    print(f"{len(outputs)} dashboards generados en {time.perf_counter() - started:.1f}s:")
+    for output in outputs:
+        print(f"  - {output}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Generar Dashboard HTML con información completa de costos y recursos GCP
 """
 
 from gcp_integration import GCPClient
+from virtual_table import VIRTUAL_TABLE_ASSETS, buckets_table, machine_types_table, regions_table
 from datetime import datetime
 from google.cloud import compute_v1
 import json
@@ -179,6 +180,13 @@ def collect_data(client):
 def generate_html_dashboard(data):
     """Generar dashboard HTML con toda la información"""
 
+    # Preparar datos para los gráficos
+    machine_labels = list(data['machine_types'].keys())
+    machine_counts = [data['machine_types'][m]['count'] for m in machine_labels]
+
+    disk_labels = list(data['disks']['types'].keys())
+    disk_sizes = [data['disks']['types'][d]['total_gb'] for d in disk_labels]
+
     html = f"""
 <!DOCTYPE html>
 <html lang="es">
@@ -368,6 +376,7 @@ def generate_html_dashboard(data):
             transition: width 0.5s ease;
         }}
     </style>
+{VIRTUAL_TABLE_ASSETS}
 </head>
 <body>
     <div class="container">
@@ -442,108 +451,19 @@ def generate_html_dashboard(data):
         <!-- Tabla de tipos de máquina -->
         <div class="table-card">
             <h3>Detalle de Tipos de Máquina</h3>
-            <table>
-                <thead>
-                    <tr>
-                        <th>Tipo de Máquina</th>
-                        <th>Total</th>
-                        <th>Running</th>
-                        <th>Stopped</th>
-                        <th>% Utilización</th>
-                    </tr>
-                </thead>
-                <tbody>
-"""
-
-    # Agregar filas de tipos de máquina
-    for machine_type, info in sorted(data['machine_types'].items(), key=lambda x: x[1]['count'], reverse=True):
-        utilization = (info['running'] / info['count'] * 100) if info['count'] > 0 else 0
-        html += f"""
-                    <tr>
-                        <td><strong>{machine_type}</strong></td>
-                        <td>{info['count']}</td>
-                        <td><span class="status-badge status-running">{info['running']}</span></td>
-                        <td><span class="status-badge status-stopped">{info['stopped']}</span></td>
-                        <td>
-                            {utilization:.1f}%
-                            <div class="progress-bar">
-                                <div class="progress-fill" style="width: {utilization}%"></div>
-                            </div>
-                        </td>
-                    </tr>
-"""
-
-    html += """
-                </tbody>
-            </table>
+            """ + machine_types_table(data, 'machineTypesTable') + """
         </div>
 
         <!-- Tabla de buckets -->
         <div class="table-card">
             <h3>Buckets de Cloud Storage</h3>
-            <table>
-                <thead>
-                    <tr>
-                        <th>Bucket</th>
-                        <th>Ubicación</th>
-                        <th>Tamaño (GB)</th>
-                        <th>Costo Mensual</th>
-                    </tr>
-                </thead>
-                <tbody>
-"""
-
-    # Agregar filas de buckets
-    for bucket in sorted(data['storage']['buckets'], key=lambda x: x['size_gb'], reverse=True):
-        monthly_cost = bucket['size_gb'] * 0.020
-        html += f"""
-                    <tr>
-                        <td><strong>{bucket['name']}</strong></td>
-                        <td>{bucket['location']}</td>
-                        <td>{bucket['size_gb']:,.2f}</td>
-                        <td>${monthly_cost:,.2f}</td>
-                    </tr>
-"""
-
-    html += f"""
-                </tbody>
-            </table>
+            """ + buckets_table(data, 'bucketsTable') + f"""
         </div>
 
         <!-- Tabla de regiones -->
         <div class="table-card">
             <h3>Distribución por Región</h3>
-            <table>
-                <thead>
-                    <tr>
-                        <th>Región</th>
-                        <th>Instancias</th>
-                        <th>Discos</th>
-                    </tr>
-                </thead>
-                <tbody>
-"""
-
-    # Agregar filas de regiones
-    for region, info in sorted(data['regions'].items()):
-        html += f"""
-                    <tr>
-                        <td><strong>{region}</strong></td>
-                        <td>{info['instances']}</td>
-                        <td>{info['disks']}</td>
-                    </tr>
-"""
-
-    # Preparar datos para los gráficos
-    machine_labels = list(data['machine_types'].keys())
-    machine_counts = [data['machine_types'][m]['count'] for m in machine_labels]
-
-    disk_labels = list(data['disks']['types'].keys())
-    disk_sizes = [data['disks']['types'][d]['total_gb'] for d in disk_labels]
-
-    html += f"""
-                </tbody>
-            </table>
+            """ + regions_table(data, 'regionsTable') + f"""
         </div>
     </div>
 
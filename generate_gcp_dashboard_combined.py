@@ -5,6 +5,8 @@ Combina análisis temporal (1m, 3m, 6m, 1año) con datos detallados actuales
 """
 
 from gcp_integration import GCPClient
+from downsampling import downsample_history
+from virtual_table import VIRTUAL_TABLE_ASSETS, buckets_table, machine_types_table, regions_table
 from datetime import datetime, timedelta
 from google.cloud import compute_v1, monitoring_v3
 import json
@@ -538,6 +540,7 @@ def generate_combined_html_dashboard(current_data, historical_data):
             transition: width 0.5s ease;
         }}
     </style>
+{VIRTUAL_TABLE_ASSETS}
 </head>
 <body>
     <div class="container">
@@ -653,107 +656,25 @@ def generate_combined_html_dashboard(current_data, historical_data):
         <!-- Tabla de tipos de máquina -->
         <div class="table-card">
             <h3>Detalle de Tipos de Máquina</h3>
-            <table>
-                <thead>
-                    <tr>
-                        <th>Tipo de Máquina</th>
-                        <th>Total</th>
-                        <th>Running</th>
-                        <th>Stopped</th>
-                        <th>% Utilización</th>
-                    </tr>
-                </thead>
-                <tbody>
-"""
-
-    # Agregar filas de tipos de máquina
-    for machine_type, info in sorted(current_data['machine_types'].items(), key=lambda x: x[1]['count'], reverse=True):
-        utilization = (info['running'] / info['count'] * 100) if info['count'] > 0 else 0
-        html += f"""
-                    <tr>
-                        <td><strong>{machine_type}</strong></td>
-                        <td>{info['count']}</td>
-                        <td><span class="status-badge status-running">{info['running']}</span></td>
-                        <td><span class="status-badge status-stopped">{info['stopped']}</span></td>
-                        <td>
-                            {utilization:.1f}%
-                            <div class="progress-bar">
-                                <div class="progress-fill" style="width: {utilization}%"></div>
-                            </div>
-                        </td>
-                    </tr>
-"""
-
-    html += """
-                </tbody>
-            </table>
+            """ + machine_types_table(current_data, 'machineTypesTable') + """
         </div>
 
         <!-- Tabla de buckets -->
         <div class="table-card">
             <h3>Buckets de Cloud Storage</h3>
-            <table>
-                <thead>
-                    <tr>
-                        <th>Bucket</th>
-                        <th>Ubicación</th>
-                        <th>Tamaño (GB)</th>
-                        <th>Costo Mensual</th>
-                    </tr>
-                </thead>
-                <tbody>
-"""
-
-    # Agregar filas de buckets
-    for bucket in sorted(current_data['storage']['buckets'], key=lambda x: x['size_gb'], reverse=True):
-        monthly_cost = bucket['size_gb'] * 0.020
-        html += f"""
-                    <tr>
-                        <td><strong>{bucket['name']}</strong></td>
-                        <td>{bucket['location']}</td>
-                        <td>{bucket['size_gb']:,.2f}</td>
-                        <td>${monthly_cost:,.2f}</td>
-                    </tr>
-"""
-
-    html += """
-                </tbody>
-            </table>
+            """ + buckets_table(current_data, 'bucketsTable') + """
         </div>
 
         <!-- Tabla de regiones -->
         <div class="table-card">
             <h3>Distribución por Región</h3>
-            <table>
-                <thead>
-                    <tr>
-                        <th>Región</th>
-                        <th>Instancias</th>
-                        <th>Discos</th>
-                    </tr>
-                </thead>
-                <tbody>
-"""
-
-    # Agregar filas de regiones
-    for region, info in sorted(current_data['regions'].items()):
-        html += f"""
-                    <tr>
-                        <td><strong>{region}</strong></td>
-                        <td>{info['instances']}</td>
-                        <td>{info['disks']}</td>
-                    </tr>
-"""
-
-    html += f"""
-                </tbody>
-            </table>
+            """ + regions_table(current_data, 'regionsTable') + f"""
         </div>
     </div>
 
     <script>
         // Datos históricos
-        const historicalData = {json.dumps(historical_data)};
+        const historicalData = {json.dumps(downsample_history(historical_data))};
 
         let costTrendChart, storageTrendChart, instanceTrendChart;
         let currentPeriod = '1month';
@@ -5,6 +5,7 @@ Incluye vistas de 1 mes, 3 meses, 6 meses y 1 año
 """
 
 from gcp_integration import GCPClient
+from downsampling import downsample_history
 from datetime import datetime, timedelta
 from google.cloud import compute_v1, monitoring_v3
 import json
@@ -597,7 +598,7 @@ def generate_html_dashboard_with_history(current_data, historical_data):
 
     <script>
         // Datos históricos
-        const historicalData = {json.dumps(historical_data)};
+        const historicalData = {json.dumps(downsample_history(historical_data))};
 
         let costChart, storageChart, instanceChart;
         let currentPeriod = '1month';
@@ -5,10 +5,17 @@ Permite comparar dev y prod con selector de proyecto
 """
 
 from gcp_integration import GCPClient
+from downsampling import downsample_history
+from section_cache import SectionCache
+from virtual_table import VIRTUAL_TABLE_ASSETS, buckets_table, machine_types_table, regions_table
 from datetime import datetime
 from google.cloud import compute_v1, monitoring_v3
 import json
 import time
+from pathlib import Path
+
+SECTION_CACHE_FILE = Path(__file__).with_name('gcp_dashboard_multiproject.sections.json')
+SECTION_SOURCES = (__file__, Path(__file__).with_name('virtual_table.py'))
 
 
 def get_historical_storage_data(client, days=30):
@@ -106,7 +113,11 @@ def get_historical_instance_count(client, days=30):
 
 
 def collect_historical_data(client):
-    """Recopilar datos históricos para diferentes períodos"""
+    """Recopilar datos históricos para diferentes períodos
+
+    Las series se consultan una sola vez para el período más largo y cada
+    período se obtiene recortándolas por fecha.
+    """
     print(f"  Recopilando datos históricos de {client.project_id}...")
 
     periods = {
@@ -116,13 +127,18 @@ def collect_historical_data(client):
         '1year': 365
     }
 
+    longest = max(periods.values())
+    print(f"    - últimos {longest} días...")
+    storage_series = get_historical_storage_data(client, longest)
+    instance_series = get_historical_instance_count(client, longest)
+    now = time.time()
+
     historical_data = {}
 
     for period_name, days in periods.items():
-        print(f"    - {period_name}...")
-
-        storage_history = get_historical_storage_data(client, days)
-        instance_history = get_historical_instance_count(client, days)
+        since = datetime.fromtimestamp(now - days * 86400).strftime('%Y-%m-%d')
+        storage_history = {date: value for date, value in storage_series.items() if date >= since}
+        instance_history = {date: value for date, value in instance_series.items() if date >= since}
 
         cost_history = {}
         for date_str, storage_gb in storage_history.items():
@@ -281,13 +297,155 @@ def collect_current_data(client):
     return data
 
 
-def generate_multiproject_html_dashboard(projects_data):
-    """Generar dashboard HTML para múltiples proyectos"""
+def generate_project_content(project_id, current_data, active_class=''):
+    """Generar el bloque HTML (tarjetas, gráficos y tablas) de un proyecto"""
+
+    # Preparar datos para gráficos
+    machine_labels = list(current_data['machine_types'].keys()) if current_data['machine_types'] else []
+    machine_counts = [current_data['machine_types'][m]['count'] for m in machine_labels] if machine_labels else []
+
+    disk_labels = list(current_data['disks']['types'].keys()) if current_data['disks']['types'] else []
+    disk_sizes = [current_data['disks']['types'][d]['total_gb'] for d in disk_labels] if disk_labels else []
+
+    html = f"""
+        <div class="project-content {active_class}" id="content-{project_id}">
+            <div class="section-header">
+                <h2>Proyecto: {project_id}</h2>
+            </div>
+
+            <!-- Tarjetas de estadísticas principales -->
+            <div class="stats-grid">
+                <div class="stat-card cost">
+                    <div class="label">Costo Estimado Mensual</div>
+                    <div class="value">${current_data['costs']['total']:,.2f}</div>
+                    <div class="subvalue">Total del proyecto</div>
+                </div>
+
+                <div class="stat-card">
+                    <div class="label">Compute Engine</div>
+                    <div class="value">${current_data['costs']['compute']:,.2f}</div>
+                    <div class="subvalue">Instancias + Discos</div>
+                </div>
+
+                <div class="stat-card">
+                    <div class="label">Cloud Storage</div>
+                    <div class="value">${current_data['costs']['storage']:,.2f}</div>
+                    <div class="subvalue">{current_data['storage']['total_gb']:,.0f} GB</div>
+                </div>
+
+                <div class="stat-card success">
+                    <div class="label">Instancias Activas</div>
+                    <div class="value">{len(current_data['instances']['running'])}</div>
+                    <div class="subvalue">de {current_data['instances']['total']} totales</div>
+                </div>
+
+                <div class="stat-card">
+                    <div class="label">Tipos de Máquina</div>
+                    <div class="value">{len(current_data['machine_types'])}</div>
+                    <div class="subvalue">Diferentes configuraciones</div>
+                </div>
+
+                <div class="stat-card">
+                    <div class="label">Almacenamiento en Disco</div>
+                    <div class="value">{current_data['disks']['total_gb']:,.0f}</div>
+                    <div class="subvalue">GB en {current_data['disks']['count']} discos</div>
+                </div>
+            </div>
+
+            <!-- SECCIÓN HISTÓRICA -->
+            <div class="section-header">
+                <h2>📈 Análisis Histórico - Evolución Temporal</h2>
+            </div>
+
+            <div class="historical-chart">
+                <h3>Evolución de Costos Estimados</h3>
+                <div class="chart-container">
+                    <canvas id="costTrendChart-{project_id}"></canvas>
+                </div>
+            </div>
+
+            <div class="historical-chart">
+                <h3>Evolución del Almacenamiento (Cloud Storage)</h3>
+                <div class="chart-container">
+                    <canvas id="storageTrendChart-{project_id}"></canvas>
+                </div>
+            </div>
+
+            <div class="historical-chart">
+                <h3>Evolución del Número de Instancias</h3>
+                <div class="chart-container">
+                    <canvas id="instanceTrendChart-{project_id}"></canvas>
+                </div>
+            </div>
+
+            <!-- SECCIÓN DETALLADA ACTUAL -->
+            <div class="section-header">
+                <h2>📊 Estado Actual Detallado</h2>
+            </div>
+
+            <div class="charts-grid">
+                <div class="chart-card">
+                    <h3>Distribución de Costos</h3>
+                    <canvas id="costChart-{project_id}"></canvas>
+                </div>
+
+                <div class="chart-card">
+                    <h3>Estado de Instancias</h3>
+                    <canvas id="statusChart-{project_id}"></canvas>
+                </div>
+
+                <div class="chart-card">
+                    <h3>Tipos de Máquina</h3>
+                    <canvas id="machineChart-{project_id}"></canvas>
+                </div>
+
+                <div class="chart-card">
+                    <h3>Tipos de Disco</h3>
+                    <canvas id="diskChart-{project_id}"></canvas>
+                </div>
+            </div>
+
+            <!-- Tabla de tipos de máquina -->
+            <div class="table-card">
+                <h3>Detalle de Tipos de Máquina</h3>
+                """ + machine_types_table(current_data, f'machineTypesTable-{project_id}') + """
+            </div>
+
+            <!-- Tabla de buckets -->
+            <div class="table-card">
+                <h3>Buckets de Cloud Storage</h3>
+                """ + buckets_table(current_data, f'bucketsTable-{project_id}') + """
+            </div>
+
+            <!-- Tabla de regiones -->
+            <div class="table-card">
+                <h3>Distribución por Región</h3>
+                """ + regions_table(current_data, f'regionsTable-{project_id}') + f"""
+            </div>
+        </div>
+"""
+
+    return html
+
+
+def generate_multiproject_html_dashboard(projects_data, section_cache=None):
+    """Generar dashboard HTML para múltiples proyectos
+
+    Los bloques de cada proyecto se reutilizan de section_cache mientras sus
+    datos no cambien.
+    """
+    section_cache = section_cache or SectionCache(sources=SECTION_SOURCES)
 
     # Obtener lista de proyectos
     project_ids = list(projects_data.keys())
     first_project = project_ids[0]
 
+    # Los períodos largos se limitan a MAX_POINTS puntos por serie en los gráficos
+    chart_data = {
+        project_id: {**data, 'historical': downsample_history(data.get('historical', {}))}
+        for project_id, data in projects_data.items()
+    }
+
     html = f"""
 <!DOCTYPE html>
 <html lang="es">
@@ -573,6 +731,7 @@ def generate_multiproject_html_dashboard(projects_data):
             display: block;
         }}
     </style>
+{VIRTUAL_TABLE_ASSETS}
 </head>
 <body>
     <div class="container">
@@ -610,217 +769,14 @@ def generate_multiproject_html_dashboard(projects_data):
 
 """
 
-    # Generar contenido para cada proyecto
+    # Generar contenido para cada proyecto (reutilizando los bloques sin cambios)
     for project_id in project_ids:
         current_data = projects_data[project_id]['current']
         active_class = 'active' if project_id == first_project else ''
-
-        # Preparar datos para gráficos
-        machine_labels = list(current_data['machine_types'].keys()) if current_data['machine_types'] else []
-        machine_counts = [current_data['machine_types'][m]['count'] for m in machine_labels] if machine_labels else []
-
-        disk_labels = list(current_data['disks']['types'].keys()) if current_data['disks']['types'] else []
-        disk_sizes = [current_data['disks']['types'][d]['total_gb'] for d in disk_labels] if disk_labels else []
-
-        html += f"""
-        <div class="project-content {active_class}" id="content-{project_id}">
-            <div class="section-header">
-                <h2>Proyecto: {project_id}</h2>
-            </div>
-
-            <!-- Tarjetas de estadísticas principales -->
-            <div class="stats-grid">
-                <div class="stat-card cost">
-                    <div class="label">Costo Estimado Mensual</div>
-                    <div class="value">${current_data['costs']['total']:,.2f}</div>
-                    <div class="subvalue">Total del proyecto</div>
-                </div>
-
-                <div class="stat-card">
-                    <div class="label">Compute Engine</div>
-                    <div class="value">${current_data['costs']['compute']:,.2f}</div>
-                    <div class="subvalue">Instancias + Discos</div>
-                </div>
-
-                <div class="stat-card">
-                    <div class="label">Cloud Storage</div>
-                    <div class="value">${current_data['costs']['storage']:,.2f}</div>
-                    <div class="subvalue">{current_data['storage']['total_gb']:,.0f} GB</div>
-                </div>
-
-                <div class="stat-card success">
-                    <div class="label">Instancias Activas</div>
-                    <div class="value">{len(current_data['instances']['running'])}</div>
-                    <div class="subvalue">de {current_data['instances']['total']} totales</div>
-                </div>
-
-                <div class="stat-card">
-                    <div class="label">Tipos de Máquina</div>
-                    <div class="value">{len(current_data['machine_types'])}</div>
-                    <div class="subvalue">Diferentes configuraciones</div>
-                </div>
-
-                <div class="stat-card">
-                    <div class="label">Almacenamiento en Disco</div>
-                    <div class="value">{current_data['disks']['total_gb']:,.0f}</div>
-                    <div class="subvalue">GB en {current_data['disks']['count']} discos</div>
-                </div>
-            </div>
-
-            <!-- SECCIÓN HISTÓRICA -->
-            <div class="section-header">
-                <h2>📈 Análisis Histórico - Evolución Temporal</h2>
-            </div>
-
-            <div class="historical-chart">
-                <h3>Evolución de Costos Estimados</h3>
-                <div class="chart-container">
-                    <canvas id="costTrendChart-{project_id}"></canvas>
-                </div>
-            </div>
-
-            <div class="historical-chart">
-                <h3>Evolución del Almacenamiento (Cloud Storage)</h3>
-                <div class="chart-container">
-                    <canvas id="storageTrendChart-{project_id}"></canvas>
-                </div>
-            </div>
-
-            <div class="historical-chart">
-                <h3>Evolución del Número de Instancias</h3>
-                <div class="chart-container">
-                    <canvas id="instanceTrendChart-{project_id}"></canvas>
-                </div>
-            </div>
-
-            <!-- SECCIÓN DETALLADA ACTUAL -->
-            <div class="section-header">
-                <h2>📊 Estado Actual Detallado</h2>
-            </div>
-
-            <div class="charts-grid">
-                <div class="chart-card">
-                    <h3>Distribución de Costos</h3>
-                    <canvas id="costChart-{project_id}"></canvas>
-                </div>
-
-                <div class="chart-card">
-                    <h3>Estado de Instancias</h3>
-                    <canvas id="statusChart-{project_id}"></canvas>
-                </div>
-
-                <div class="chart-card">
-                    <h3>Tipos de Máquina</h3>
-                    <canvas id="machineChart-{project_id}"></canvas>
-                </div>
-
-                <div class="chart-card">
-                    <h3>Tipos de Disco</h3>
-                    <canvas id="diskChart-{project_id}"></canvas>
-                </div>
-            </div>
-
-            <!-- Tabla de tipos de máquina -->
-            <div class="table-card">
-                <h3>Detalle de Tipos de Máquina</h3>
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Tipo de Máquina</th>
-                            <th>Total</th>
-                            <th>Running</th>
-                            <th>Stopped</th>
-                            <th>% Utilización</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-"""
-
-        # Agregar filas de tipos de máquina
-        for machine_type, info in sorted(current_data['machine_types'].items(), key=lambda x: x[1]['count'], reverse=True):
-            utilization = (info['running'] / info['count'] * 100) if info['count'] > 0 else 0
-            html += f"""
-                        <tr>
-                            <td><strong>{machine_type}</strong></td>
-                            <td>{info['count']}</td>
-                            <td><span class="status-badge status-running">{info['running']}</span></td>
-                            <td><span class="status-badge status-stopped">{info['stopped']}</span></td>
-                            <td>
-                                {utilization:.1f}%
-                                <div class="progress-bar">
-                                    <div class="progress-fill" style="width: {utilization}%"></div>
-                                </div>
-                            </td>
-                        </tr>
-"""
-
-        html += """
-                    </tbody>
-                </table>
-            </div>
-
-            <!-- Tabla de buckets -->
-            <div class="table-card">
-                <h3>Buckets de Cloud Storage</h3>
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Bucket</th>
-                            <th>Ubicación</th>
-                            <th>Tamaño (GB)</th>
-                            <th>Costo Mensual</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-"""
-
-        # Agregar filas de buckets
-        for bucket in sorted(current_data['storage']['buckets'], key=lambda x: x['size_gb'], reverse=True):
-            monthly_cost = bucket['size_gb'] * 0.020
-            html += f"""
-                        <tr>
-                            <td><strong>{bucket['name']}</strong></td>
-                            <td>{bucket['location']}</td>
-                            <td>{bucket['size_gb']:,.2f}</td>
-                            <td>${monthly_cost:,.2f}</td>
-                        </tr>
-"""
-
-        html += """
-                    </tbody>
-                </table>
-            </div>
-
-            <!-- Tabla de regiones -->
-            <div class="table-card">
-                <h3>Distribución por Región</h3>
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Región</th>
-                            <th>Instancias</th>
-                            <th>Discos</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-"""
-
-        # Agregar filas de regiones
-        for region, info in sorted(current_data['regions'].items()):
-            html += f"""
-                        <tr>
-                            <td><strong>{region}</strong></td>
-                            <td>{info['instances']}</td>
-                            <td>{info['disks']}</td>
-                        </tr>
-"""
-
-        html += f"""
-                    </tbody>
-                </table>
-            </div>
-        </div>
-"""
+        html += section_cache.render(
+            f'project:{project_id}', [current_data, active_class],
+            lambda: generate_project_content(project_id, current_data, active_class)
+        )
 
     # JavaScript
     html += f"""
@@ -828,7 +784,7 @@ def generate_multiproject_html_dashboard(projects_data):
 
     <script>
         // Datos de todos los proyectos
-        const projectsData = {json.dumps(projects_data)};
+        const projectsData = {json.dumps(chart_data)};
 
         let currentProject = '{first_project}';
         let currentPeriod = '1month';
@@ -1149,7 +1105,10 @@ def main():
     print("Generando dashboard HTML multi-proyecto...")
     print(f"{'='*80}\n")
 
-    html = generate_multiproject_html_dashboard(projects_data)
+    section_cache = SectionCache(SECTION_CACHE_FILE, sources=SECTION_SOURCES)
+    html = generate_multiproject_html_dashboard(projects_data, section_cache)
+    section_cache.save()
+    print(f"  - Secciones: {section_cache.summary()}")
 
     # Guardar
     output_file = f"gcp_dashboard_multiproject_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Minimal precompiled HTML templates for the generated dashboards
+The static shell is split once into literal chunks and named @@slot@@
+placeholders; rendering only joins the chunks with the dynamic values
+"""
+
+import re
+from functools import lru_cache
+from pathlib import Path
+
+SLOT_PATTERN = re.compile(r'@@([a-z_]+)@@')
+
+
+class CompiledTemplate:
+    """Template split into static chunks and slot names"""
+
+    def __init__(self, source):
+        parts = SLOT_PATTERN.split(source)
+        self.chunks = parts[0::2]
+        self.slots = parts[1::2]
+
+    def render(self, **values):
+        """Fill every slot; raises KeyError naming the first missing slot"""
+        missing = [slot for slot in self.slots if slot not in values]
+        if missing:
+            raise KeyError(f"Faltan secciones para la plantilla: {', '.join(sorted(set(missing)))}")
+        output = [self.chunks[0]]
+        for slot, chunk in zip(self.slots, self.chunks[1:]):
+            output.append(values[slot])
+            output.append(chunk)
+        return ''.join(output)
+
+
+@lru_cache(maxsize=None)
+def _compile(path, mtime):
+    return CompiledTemplate(Path(path).read_text(encoding='utf-8'))
+
+
+def load_template(path):
+    """Compiled template for a file, cached per process until the file changes"""
+    path = Path(path).resolve()
+    return _compile(str(path), path.stat().st_mtime)
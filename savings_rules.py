@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+CDP Savings Recommendation Engine
+Savings rules are declared as data and evaluated in one vectorized pass over
+indexed, precomputed metrics per cluster, instance type and environment
+"""
+
+import operator
+
+import numpy as np
+
+# Approximate monthly cost of keeping a stopped cluster (storage, disks...)
+STOPPED_CLUSTER_MONTHLY_COST = 5 * 730
+
+OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+# Each rule:
+#   entity         'cluster', 'instance_type', 'environment' or 'global'
+#   mode           'group' -> one recommendation for all matches, 'each' -> one per match
+#   when           list of (metric, operator, value) conditions, all must hold
+#   top            optional (metric, n): keep only the n matches with the highest metric
+#   requires_data  only evaluated when real consumption data is available
+#   savings        (metric, rate): savings = sum(metric over matches) * rate ('count' = matches)
+#   title, description and action are format strings (see evaluate_rules for fields)
+RULES = [
+    {
+        'id': 'stopped_clusters',
+        'entity': 'cluster',
+        'mode': 'group',
+        'when': [('status', '==', 'STOPPED')],
+        'savings': ('count', STOPPED_CLUSTER_MONTHLY_COST),
+        'severity': 'medium',
+        'title': 'Clusters Detenidos',
+        'description': 'Tienes {count} cluster(s) detenido(s). Si no los necesitas, considera eliminarlos para evitar costos de almacenamiento.',
+        'action': 'Revisar y eliminar clusters que ya no se necesitan',
+    },
+    {
+        'id': 'high_consumption',
+        'entity': 'cluster',
+        'mode': 'group',
+        'requires_data': True,
+        'when': [('share', '>', 0.2)],
+        'savings': ('credits', 0.15),
+        'severity': 'high',
+        'title': 'Clusters de Alto Consumo',
+        'description': '{count} cluster(s) representan más del 20% del consumo total cada uno.',
+        'action': 'Revisar configuración de instancias, considerar auto-scaling o reducción de nodos',
+    },
+    {
+        'id': 'expensive_instance_types',
+        'entity': 'instance_type',
+        'mode': 'group',
+        'requires_data': True,
+        'when': [],
+        'top': ('credits', 3),
+        'savings': ('credits', 0.20),
+        'severity': 'medium',
+        'title': 'Tipos de Instancia Costosos',
+        'description': 'Los 3 tipos de instancia más costosos representan {share_pct:.1f}% del gasto.',
+        'action': 'Evaluar si se pueden usar tipos de instancia más económicos sin afectar rendimiento',
+    },
+    {
+        'id': 'low_utilization',
+        'entity': 'cluster',
+        'mode': 'each',
+        'requires_data': True,
+        'when': [('consumed', '==', True), ('status', '==', 'AVAILABLE'), ('utilization', '<', 30)],
+        'savings': ('credits', 0.5),
+        'severity': 'low',
+        'title': 'Baja Utilización: {name}',
+        'description': 'Utilización estimada: {utilization:.1f}%. El cluster está infrautilizado.',
+        'action': 'Considerar apagar en horarios no productivos o reducir número de nodos',
+    },
+    {
+        'id': 'autoscaling',
+        'entity': 'global',
+        'mode': 'group',
+        'when': [('active_clusters', '>', 3)],
+        'savings': ('cost_estimate', 0.10),
+        'severity': 'low',
+        'title': 'Considerar Auto-scaling',
+        'description': 'Tienes {active_clusters} clusters activos. El auto-scaling puede ayudar a reducir costos.',
+        'action': 'Implementar políticas de auto-scaling para ajustar capacidad según demanda',
+    },
+]
+
+
+def _table(rows):
+    """Turn a list of metric dicts into a dict of numpy columns"""
+    if not rows:
+        return {'name': np.array([], dtype=object)}
+    return {key: np.array([row[key] for row in rows]) for key in rows[0]}
+
+
+def build_metric_tables(analysis, clusters):
+    """
+    Precompute the metrics every rule can reference, one table per entity
+
+    Clusters are indexed by name once, so consumption and inventory are joined
+    without scanning the cluster list for every consumed cluster.
+    """
+    consumption = analysis.get('consumption', {})
+    total_credits = consumption.get('total_credits', 0)
+    by_cluster = consumption.get('by_cluster', {})
+    period_hours = consumption.get('period_days', 30) * 24
+
+    inventory = {}
+    for cluster in clusters:
+        inventory.setdefault(cluster.get('clusterName'), cluster)
+
+    cluster_rows = []
+    for name in list(inventory) + [n for n in by_cluster if n not in inventory]:
+        info = inventory.get(name)
+        usage = by_cluster.get(name)
+        credits = usage['credits'] if usage else 0.0
+        hours = usage['hours'] if usage else 0.0
+        node_count = info.get('nodeCount', 1) if info else 0
+        potential_hours = period_hours * node_count
+        cluster_rows.append({
+            'name': name,
+            'status': info.get('status', 'UNKNOWN') if info else 'UNKNOWN',
+            'environment': info.get('environmentName', 'Unknown') if info else 'Unknown',
+            'node_count': node_count,
+            'consumed': usage is not None,
+            'credits': credits,
+            'hours': hours,
+            'share': credits / total_credits if total_credits > 0 else 0.0,
+            'utilization': hours / potential_hours * 100 if potential_hours > 0 else 0.0,
+        })
+
+    type_rows = [
+        {
+            'name': name,
+            'credits': data['credits'],
+            'hours': data['hours'],
+            'records': data['count'],
+            'share': data['credits'] / total_credits if total_credits > 0 else 0.0,
+        }
+        for name, data in consumption.get('by_instance_type', {}).items()
+    ]
+
+    env_rows = [
+        {
+            'name': name,
+            'credits': data['credits'],
+            'hours': data['hours'],
+            'share': data['credits'] / total_credits if total_credits > 0 else 0.0,
+        }
+        for name, data in consumption.get('by_environment', {}).items()
+    ]
+
+    global_rows = [{
+        'name': 'global',
+        'active_clusters': analysis.get('active_clusters', 0),
+        'stopped_clusters': analysis.get('stopped_clusters', 0),
+        'cost_estimate': analysis.get('cost_estimate', 0),
+        'credits': total_credits,
+    }]
+
+    return {
+        'cluster': _table(cluster_rows),
+        'instance_type': _table(type_rows),
+        'environment': _table(env_rows),
+        'global': _table(global_rows),
+    }
+
+
+def _match(rule, table):
+    """Vectorized evaluation of a rule's conditions, returns matching row positions"""
+    mask = np.ones(len(table['name']), dtype=bool)
+    for metric, op, value in rule.get('when', []):
+        mask &= OPERATORS[op](table[metric], value)
+    positions = np.flatnonzero(mask)
+
+    if rule.get('top') and len(positions):
+        metric, n = rule['top']
+        order = np.argsort(-table[metric][positions], kind='stable')
+        positions = positions[order[:n]]
+    return positions
+
+
+def _savings(rule, table, positions):
+    metric, rate = rule['savings']
+    if metric == 'count':
+        return len(positions) * rate
+    return float(table[metric][positions].sum()) * rate
+
+
+def evaluate_rules(analysis, clusters, rules=RULES):
+    """
+    Evaluate every rule against the precomputed metric tables
+
+    Format fields available to title/description/action: count, savings,
+    share_pct (credits of the matches as % of total) and the global metrics;
+    rules in 'each' mode also get every metric of the matched row.
+    """
+    tables = build_metric_tables(analysis, clusters)
+    has_data = analysis.get('consumption', {}).get('has_data', False)
+    total_credits = analysis.get('consumption', {}).get('total_credits', 0)
+    global_fields = {key: values[0] for key, values in tables['global'].items()}
+
+    recommendations = []
+    for rule in rules:
+        if rule.get('requires_data') and not has_data:
+            continue
+
+        table = tables[rule['entity']]
+        if not len(table['name']):
+            continue
+        positions = _match(rule, table)
+        if not len(positions):
+            continue
+
+        groups = [positions] if rule.get('mode', 'group') == 'group' else [positions[i:i + 1] for i in range(len(positions))]
+        for group in groups:
+            savings = _savings(rule, table, group)
+            credits = float(table['credits'][group].sum()) if 'credits' in table else 0.0
+            fields = dict(global_fields)
+            fields.update({
+                'count': len(group),
+                'savings': savings,
+                'share_pct': credits / total_credits * 100 if total_credits > 0 else 0.0,
+            })
+            if rule.get('mode') == 'each':
+                fields.update({key: values[group[0]] for key, values in table.items()})
+
+            recommendation = {
+                'title': rule['title'].format(**fields),
+                'severity': rule['severity'],
+                'savings': savings,
+                'description': rule['description'].format(**fields),
+                'action': rule['action'].format(**fields),
+            }
+            names = [str(name) for name in table['name'][group]]
+            if rule['entity'] == 'instance_type':
+                recommendation['instances'] = names
+            else:
+                recommendation['clusters'] = names if rule['entity'] == 'cluster' else []
+            recommendations.append(recommendation)
+
+    # Sort by potential savings
+    recommendations.sort(key=lambda x: x.get('savings', 0), reverse=True)
+
+    return recommendations
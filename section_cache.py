@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Section-level cache for generated HTML dashboards
+Each section is keyed by a fingerprint of its input data (and of the
+generator's source code); unchanged sections reuse the fragment rendered on
+a previous run instead of being rendered again
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+
+def _default(value):
+    """JSON fallback for fingerprints: sets sorted, numpy values as lists/scalars"""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+def fingerprint(data, salt=''):
+    """Stable digest of JSON-like section input data"""
+    digest = hashlib.blake2b(salt.encode('utf-8'), digest_size=16)
+    digest.update(json.dumps(data, separators=(',', ':'), default=_default).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class SectionCache:
+    """
+    Rendered fragments by section name, optionally persisted to a JSON file
+
+    sources are files (usually the generator module itself) whose contents are
+    mixed into every fingerprint, so editing the rendering code invalidates
+    the cached fragments.
+    """
+
+    def __init__(self, path=None, sources=()):
+        self.path = Path(path) if path else None
+        self.salt = ''.join(hashlib.blake2b(Path(s).read_bytes(), digest_size=16).hexdigest() for s in sources)
+        self.entries = {}
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Advertencia: caché de secciones ignorada ({e})")
+
+    def render(self, name, inputs, render):
+        """Return the cached fragment for name if inputs are unchanged, else render() it"""
+        key = fingerprint(inputs, self.salt)
+        self.used.add(name)
+        cached = self.entries.get(name)
+        if cached and cached[0] == key:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        html = render()
+        self.entries[name] = [key, html]
+        return html
+
+    def save(self):
+        """Persist the fragments used in this run (stale sections are dropped)"""
+        if not self.path:
+            return
+        self.entries = {name: entry for name, entry in self.entries.items() if name in self.used}
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+
+    def summary(self):
+        return f"{self.hits} secciones reutilizadas, {self.misses} regeneradas"
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+CDP Shutdown Schedule Simulator
+Builds a 7x24 hour-of-week credit matrix per cluster and evaluates thousands
+of candidate stop/start schedules at once to find the ones that save the most
+credits for a bounded loss of coverage
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+HOURS_PER_WEEK = 7 * 24
+# CDP reports consumption in 4-hour blocks
+CDP_BLOCK_HOURS = 4
+
+
+def spread_blocks(matrix, block_hours=CDP_BLOCK_HOURS):
+    """
+    Spread block-reported credits evenly over the hours of each block
+
+    Only applied when every non-zero hour is a block start, i.e. the data was
+    reported in blocks; hourly data is returned unchanged.
+    """
+    hours = np.flatnonzero(matrix.reshape(-1, 24).any(axis=0))
+    if block_hours <= 1 or not len(hours) or np.any(hours % block_hours):
+        return matrix
+    starts = matrix[..., ::block_hours] / block_hours
+    return np.repeat(starts, block_hours, axis=-1)
+
+
+def matrix_from_marginals(by_hour, by_day):
+    """
+    Estimate a 7x24 matrix from per-hour and per-weekday totals (analysis 'by_hour'/'by_day')
+
+    Assumes the hourly profile is the same every weekday, scaled by each day's total.
+    """
+    hourly = np.array([by_hour.get(h, by_hour.get(str(h), 0)) for h in range(24)], dtype=np.float64)
+    daily = np.array([by_day.get(d, by_day.get(str(d), 0)) for d in range(7)], dtype=np.float64)
+    total = hourly.sum()
+    if total <= 0:
+        return np.zeros((7, 24))
+    return np.outer(daily, hourly / total)
+
+
+def matrices_from_cube(cube):
+    """
+    Exact average-week credit matrices for every cluster in a ConsumptionCube
+
+    Returns (cluster labels, array of shape (clusters, 7, 24)) with credits per
+    average week: each weekday is divided by how many times it occurs in the cube.
+    """
+    per_day = cube.rollup('cluster', 'day', 'hour', measure='credits')
+    weekdays = cube.day_of_week()
+    matrices = np.zeros((per_day.shape[0], 7, 24))
+    occurrences = np.bincount(weekdays, minlength=7)
+    for d in range(7):
+        if occurrences[d]:
+            matrices[:, d, :] = per_day[:, weekdays == d, :].sum(axis=1) / occurrences[d]
+    return cube.labels['cluster'], matrices
+
+
+def candidate_schedules(min_hours=2, max_hours=16):
+    """
+    Candidate stop windows as boolean hour-of-week masks
+
+    Every daily window (stop hour x duration) is combined with four day
+    policies: every day, weekdays only, every day plus the whole weekend off,
+    and weekdays plus the whole weekend off. A weekend-only schedule is added too.
+    Returns (masks of shape (K, 168), list of schedule descriptions).
+    """
+    masks = []
+    schedules = []
+    weekend = np.zeros((7, 24), dtype=bool)
+    weekend[5:] = True
+
+    for stop_hour in range(24):
+        for length in range(min_hours, max_hours + 1):
+            start_hour = (stop_hour + length) % 24
+
+            for days, weekend_off in ((range(7), False), (range(5), False), (range(7), True), (range(5), True)):
+                mask = np.zeros((7, 24), dtype=bool)
+                for d in days:
+                    # Windows crossing midnight stop on day d and start on day d+1
+                    mask[d, stop_hour:min(24, stop_hour + length)] = True
+                    if stop_hour + length > 24:
+                        mask[(d + 1) % 7, :stop_hour + length - 24] = True
+                if weekend_off:
+                    mask |= weekend
+                masks.append(mask.ravel())
+                schedules.append({
+                    'stop_hour': stop_hour,
+                    'start_hour': start_hour,
+                    'weekdays_only': len(days) == 5,
+                    'weekend_off': weekend_off,
+                })
+
+    masks.append(weekend.ravel())
+    schedules.append({'stop_hour': None, 'start_hour': None, 'weekdays_only': False, 'weekend_off': True})
+    return np.array(masks), schedules
+
+
+def schedule_label(schedule):
+    """Human readable description of a candidate schedule"""
+    if schedule['stop_hour'] is None:
+        return 'Apagado en fin de semana'
+    label = f"Apagado {schedule['stop_hour']:02d}:00-{schedule['start_hour']:02d}:00"
+    label += ' (Lun-Vie)' if schedule['weekdays_only'] else ' (todos los días)'
+    if schedule['weekend_off']:
+        label += ' + fin de semana'
+    return label
+
+
+def simulate(names, matrices, max_coverage_loss=0.05, idle_quantile=0.25, top=3,
+             masks=None, schedules=None, block_hours=CDP_BLOCK_HOURS):
+    """
+    Evaluate every candidate schedule for every cluster in one matrix product
+
+    Savings are the credits consumed inside the stop window. Coverage loss is
+    the share of the cluster's activity that falls inside the window, where
+    activity is the credits above the cluster's idle baseline (the given
+    quantile of its non-zero hours); clusters with a flat profile use their
+    plain credit share instead. Returns {cluster: [best schedules]} with savings
+    per week and per 30-day month.
+    """
+    if masks is None:
+        masks, schedules = candidate_schedules()
+
+    week = spread_blocks(np.asarray(matrices, dtype=np.float64), block_hours).reshape(len(names), HOURS_PER_WEEK)
+    totals = week.sum(axis=1)
+
+    # Idle baseline per cluster and activity above it
+    baselines = np.zeros(len(names))
+    for c in range(len(names)):
+        used = week[c][week[c] > 0]
+        if len(used):
+            baselines[c] = np.quantile(used, idle_quantile)
+    activity = np.clip(week - baselines[:, None], 0, None)
+    flat = activity.sum(axis=1) <= 0
+    activity[flat] = week[flat]
+    activity_totals = activity.sum(axis=1)
+
+    weights = masks.T.astype(np.float64)
+    savings = week @ weights
+    with np.errstate(divide='ignore', invalid='ignore'):
+        loss = np.where(activity_totals[:, None] > 0, (activity @ weights) / activity_totals[:, None], 0.0)
+
+    feasible = (loss <= max_coverage_loss) & (savings > 0)
+    ranked = np.where(feasible, savings, -np.inf)
+    off_hours = masks.sum(axis=1)
+
+    results = {}
+    for c, name in enumerate(names):
+        best = []
+        for k in np.argsort(-ranked[c], kind='stable')[:top]:
+            if not feasible[c, k]:
+                break
+            best.append({
+                **schedules[k],
+                'label': schedule_label(schedules[k]),
+                'off_hours_per_week': int(off_hours[k]),
+                'savings_week': float(savings[c, k]),
+                'savings_month': float(savings[c, k]) * 30 / 7,
+                'savings_pct': float(savings[c, k] / totals[c] * 100) if totals[c] > 0 else 0.0,
+                'coverage_loss': float(loss[c, k]),
+            })
+        results[name] = best
+    return results
+
+
+def simulate_analysis(analysis, **kwargs):
+    """Run the simulator on analysis['consumption']['by_cluster'] by_hour/by_day data"""
+    by_cluster = analysis['consumption']['by_cluster']
+    period_weeks = analysis['consumption'].get('period_days', 30) / 7
+    names = list(by_cluster)
+    matrices = np.array([matrix_from_marginals(data['by_hour'], data['by_day']) for data in by_cluster.values()])
+    return simulate(names, matrices.reshape(len(names), 7, 24) / period_weeks, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulador de horarios de apagado por cluster')
+    parser.add_argument('--cube', default='cdp_consumption_cube.npz',
+                        help='Cubo de consumo guardado por cdp_dashboard.py')
+    parser.add_argument('--max-coverage-loss', type=float, default=0.05,
+                        help='Pérdida máxima de actividad permitida (0-1)')
+    parser.add_argument('--top', type=int, default=3, help='Horarios a mostrar por cluster')
+    args = parser.parse_args()
+
+    from consumption_cube import ConsumptionCube
+
+    try:
+        cube = ConsumptionCube.load(args.cube)
+    except FileNotFoundError:
+        print(f"[ERROR] No se encontró el cubo {args.cube}. Ejecuta primero cdp_dashboard.py")
+        sys.exit(1)
+
+    names, matrices = matrices_from_cube(cube)
+    results = simulate(names, matrices, max_coverage_loss=args.max_coverage_loss, top=args.top)
+
+    print("=" * 70)
+    print("Simulación de Horarios de Apagado")
+    print("=" * 70)
+    for name, best in sorted(results.items(), key=lambda x: -(x[1][0]['savings_month'] if x[1] else 0)):
+        print(f"\n{name}")
+        if not best:
+            print("  Sin horarios viables con la pérdida de cobertura indicada")
+        for schedule in best:
+            print(f"  - {schedule['label']}: {schedule['savings_month']:,.2f} créditos/mes "
+                  f"({schedule['savings_pct']:.1f}%), pérdida de actividad {schedule['coverage_loss'] * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Virtualized tables for generated dashboards
+Tables are embedded as compact JSON rows and drawn by a small client-side
+renderer that only creates the DOM rows in view, with sorting and filtering,
+so pages with thousands of rows render in constant time
+"""
+
+import json
+
+# Visible height of a table before it scrolls
+DEFAULT_HEIGHT = 420
+
+# Included once per page, inside <head>
+VIRTUAL_TABLE_ASSETS = """
+    <style>
+        .vtable-toolbar { display: flex; justify-content: space-between; align-items: center; gap: 10px; margin-bottom: 10px; }
+        .vtable-filter { padding: 6px 10px; border: 1px solid #ddd; border-radius: 5px; min-width: 220px; font-size: 0.95em; }
+        .vtable-count { color: #666; font-size: 0.9em; }
+        .vtable-scroll { overflow-y: auto; }
+        .vtable-scroll table { width: 100%; }
+        .vtable-scroll thead th { position: sticky; top: 0; z-index: 1; cursor: pointer; user-select: none; }
+        .vtable-spacer td { padding: 0 !important; border: 0 !important; }
+    </style>
+    <script>
+        // Virtualized table: only the rows in view (plus a buffer) exist in the DOM
+        const VirtualTable = (() => {
+            const ROW_BUFFER = 10;
+            const DEFAULT_ROW_HEIGHT = 40;
+            const escapeHtml = (value) => String(value).replace(/[&<>"']/g,
+                c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]));
+            const formatNumber = (value, decimals) => Number(value).toLocaleString('en-US',
+                {minimumFractionDigits: decimals, maximumFractionDigits: decimals});
+
+            function renderCell(column, value) {
+                if (value === null || value === undefined) return '<td>N/A</td>';
+                let text = column.type === 'number' || column.type === 'progress'
+                    ? formatNumber(value, column.decimals || 0)
+                    : escapeHtml(value);
+                if (column.bold) text = `<strong>${text}</strong>`;
+                text = `${column.prefix || ''}${text}${column.suffix || ''}`;
+                if (column.type === 'badge') {
+                    const badgeClass = (column.classes || {})[value] || column.default_class || '';
+                    text = `<span class="status-badge ${badgeClass}">${text}</span>`;
+                }
+                if (column.type === 'progress') {
+                    text += `<div class="progress-bar"><div class="progress-fill" style="width: ${value}%"></div></div>`;
+                }
+                return `<td>${text}</td>`;
+            }
+
+            function compare(a, b) {
+                if (a === b) return 0;
+                if (a === null || a === undefined) return 1;
+                if (b === null || b === undefined) return -1;
+                return typeof a === 'string' ? a.localeCompare(b) : a - b;
+            }
+
+            function mount(id, spec) {
+                const container = document.getElementById(id);
+                if (!container) return;
+                const columns = spec.columns;
+                const state = {rows: spec.rows.slice(), sortColumn: null, sortDesc: false, rowHeight: 0, frame: null};
+
+                container.innerHTML = `
+                    <div class="vtable-toolbar">
+                        <input type="search" class="vtable-filter" placeholder="Filtrar...">
+                        <span class="vtable-count"></span>
+                    </div>
+                    <div class="vtable-scroll" style="max-height: ${spec.height}px">
+                        <table class="${spec.table_class || ''}">
+                            <thead><tr>${columns.map((c, i) => `<th data-column="${i}">${escapeHtml(c.label)}</th>`).join('')}</tr></thead>
+                            <tbody></tbody>
+                        </table>
+                    </div>`;
+                const filter = container.querySelector('.vtable-filter');
+                const count = container.querySelector('.vtable-count');
+                const scroll = container.querySelector('.vtable-scroll');
+                const tbody = container.querySelector('tbody');
+                const headers = container.querySelectorAll('th');
+                const spacer = (height) => `<tr class="vtable-spacer"><td colspan="${columns.length}" style="height: ${height}px"></td></tr>`;
+
+                function draw() {
+                    state.frame = null;
+                    const rows = state.rows;
+                    const rowHeight = state.rowHeight || DEFAULT_ROW_HEIGHT;
+                    const first = Math.max(0, Math.floor(scroll.scrollTop / rowHeight) - ROW_BUFFER);
+                    const last = Math.min(rows.length, first + Math.ceil(spec.height / rowHeight) + 2 * ROW_BUFFER);
+                    tbody.innerHTML = spacer(first * rowHeight)
+                        + rows.slice(first, last).map(row => `<tr>${row.map((v, i) => renderCell(columns[i], v)).join('')}</tr>`).join('')
+                        + spacer((rows.length - last) * rowHeight);
+                    count.textContent = rows.length === spec.rows.length
+                        ? `${rows.length} filas`
+                        : `${rows.length} de ${spec.rows.length} filas`;
+
+                    // Measure the real row height once the table is visible
+                    const sample = tbody.rows[1];
+                    if (!state.rowHeight && last > first && sample && sample.offsetHeight) {
+                        state.rowHeight = sample.offsetHeight;
+                        draw();
+                    }
+                }
+
+                function update() {
+                    const query = filter.value.trim().toLowerCase();
+                    const rows = query
+                        ? spec.rows.filter(row => row.some(v => v !== null && String(v).toLowerCase().includes(query)))
+                        : spec.rows.slice();
+                    if (state.sortColumn !== null) {
+                        const i = state.sortColumn;
+                        const direction = state.sortDesc ? -1 : 1;
+                        rows.sort((a, b) => compare(a[i], b[i]) * direction);
+                    }
+                    headers.forEach((th, i) => {
+                        th.textContent = columns[i].label + (i === state.sortColumn ? (state.sortDesc ? ' ▼' : ' ▲') : '');
+                    });
+                    state.rows = rows;
+                    scroll.scrollTop = 0;
+                    draw();
+                }
+
+                headers.forEach(th => th.addEventListener('click', () => {
+                    const i = Number(th.dataset.column);
+                    state.sortDesc = state.sortColumn === i ? !state.sortDesc : columns[i].type !== 'text';
+                    state.sortColumn = i;
+                    update();
+                }));
+                filter.addEventListener('input', update);
+                scroll.addEventListener('scroll', () => {
+                    if (state.frame === null) state.frame = requestAnimationFrame(draw);
+                });
+                draw();
+            }
+
+            return {mount};
+        })();
+    </script>
+"""
+
+
+def column(label, kind='text', **options):
+    """
+    Column spec for virtual_table
+
+    kind is 'text', 'number', 'badge' or 'progress' (a percentage with a bar).
+    Options: decimals, prefix, suffix, bold, and for badges classes
+    ({value: css class}) and default_class.
+    """
+    return {'label': label, 'type': kind, **options}
+
+
+def virtual_table(table_id, columns, rows, table_class='', height=DEFAULT_HEIGHT):
+    """
+    Placeholder and data for a virtualized table
+
+    rows are lists with one value per column, already in the initial order.
+    The page must include VIRTUAL_TABLE_ASSETS in its <head>.
+    """
+    spec = {'columns': columns, 'rows': rows, 'table_class': table_class, 'height': height}
+    data = json.dumps(spec, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    return (f'<div class="vtable" id="{table_id}"></div>\n'
+            f'<script>VirtualTable.mount({json.dumps(table_id)}, {data});</script>')
+
+
+# GCP inventory tables shared by the GCP dashboard generators
+
+def machine_types_table(data, table_id):
+    """Machine types with total, running and stopped instances and utilization"""
+    columns = [
+        column('Tipo de Máquina', bold=True),
+        column('Total', 'number'),
+        column('Running', 'badge', default_class='status-running'),
+        column('Stopped', 'badge', default_class='status-stopped'),
+        column('% Utilización', 'progress', decimals=1, suffix='%'),
+    ]
+    rows = [
+        [machine_type, info['count'], info['running'], info['stopped'],
+         (info['running'] / info['count'] * 100) if info['count'] > 0 else 0]
+        for machine_type, info in sorted(data['machine_types'].items(), key=lambda x: x[1]['count'], reverse=True)
+    ]
+    return virtual_table(table_id, columns, rows)
+
+
+def buckets_table(data, table_id, cost_per_gb=0.020):
+    """Cloud Storage buckets with size and estimated monthly cost"""
+    columns = [
+        column('Bucket', bold=True),
+        column('Ubicación'),
+        column('Tamaño (GB)', 'number', decimals=2),
+        column('Costo Mensual', 'number', decimals=2, prefix='$'),
+    ]
+    rows = [
+        [bucket['name'], bucket['location'], bucket['size_gb'], bucket['size_gb'] * cost_per_gb]
+        for bucket in sorted(data['storage']['buckets'], key=lambda x: x['size_gb'], reverse=True)
+    ]
+    return virtual_table(table_id, columns, rows)
+
+
+def regions_table(data, table_id):
+    """Instances and disks per region"""
+    columns = [
+        column('Región', bold=True),
+        column('Instancias', 'number'),
+        column('Discos', 'number'),
+    ]
+    rows = [[region, info['instances'], info['disks']] for region, info in sorted(data['regions'].items())]
+    return virtual_table(table_id, columns, rows)